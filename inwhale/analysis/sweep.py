@@ -0,0 +1,305 @@
+import inspect
+import math
+
+import torch
+from torch import nn
+
+from ..core.uniform import AsymmetricUniformQuantizer, SymmetricUniformQuantizer
+from ..observers.base import Observer
+from ..observers.kl import KLDivergenceObserver
+from ..observers.minmax import MinMaxObserver
+from ..observers.moving_average import MovingAverageObserver
+from ..profiling import register_hook
+from ..rounding.nearest import NearestRounding
+
+
+class FixedRangeObserver(Observer):
+    """
+    An observer that always reports the range it was built with.
+    Lets a quantizer run with a range computed elsewhere.
+    """
+
+    def __init__(self, min_val, max_val):
+        super().__init__()
+        self.min_val = min_val
+        self.max_val = max_val
+
+    def observe(self, x):
+        pass
+
+    def get_range(self):
+        return self.min_val, self.max_val
+
+
+class SufficientStats:
+    """
+    Statistics of one tensor that several observers can share.
+
+    Each statistic is computed on first use and cached, so a sweep over many
+    configurations reads the tensor once for aminmax and once per histogram
+    size, no matter how many configurations need them.
+    """
+
+    def __init__(self, x):
+        self.x = x.detach()
+        self._minmax = None
+        self._histograms = {}
+
+    @property
+    def minmax(self):
+        if self._minmax is None:
+            self._minmax = torch.aminmax(self.x)
+        return self._minmax
+
+    def histogram(self, num_bins):
+        """
+        |x| histogram over [0, max|x|], binned exactly like KLDivergenceObserver.observe.
+        returns (hist, abs_max)
+        """
+        if num_bins not in self._histograms:
+            abs_x = self.x.flatten().abs().float()
+            abs_max = max(float(abs_x.max()), 1e-8)
+            hist = torch.histc(abs_x, bins=num_bins, min=0.0, max=abs_max)
+            self._histograms[num_bins] = (hist, abs_max)
+        return self._histograms[num_bins]
+
+
+def _takes_bits(cls):
+    return "bits" in inspect.signature(cls).parameters
+
+
+def observer_range(observer_cls, bits, stats):
+    """
+    Range that `observer_cls` would report after observing stats.x once.
+
+    MinMax and MovingAverage observers reduce to the shared aminmax, the KL
+    observer reuses the shared histogram; any other observer is built and run.
+    """
+    if observer_cls in (MinMaxObserver, MovingAverageObserver):
+        return stats.minmax
+
+    if observer_cls is KLDivergenceObserver:
+        observer = KLDivergenceObserver(bits=bits)
+        observer.hist, observer.abs_max = stats.histogram(observer.num_bins)
+        return observer.get_range()
+
+    observer = observer_cls(bits) if _takes_bits(observer_cls) else observer_cls()
+    observer.observe(stats.x)
+    return observer.get_range()
+
+
+def _uniform_params(quantizer_cls, bits, ranges, rounding, device):
+    """
+    Scales, zero points and code bounds for several bit widths, shaped [B, 1].
+    Same math as SymmetricUniformQuantizer / AsymmetricUniformQuantizer.
+    """
+    bits = torch.tensor(bits, device=device, dtype=torch.float32).unsqueeze(1)
+    min_val = torch.stack([r[0] for r in ranges]).float().reshape(-1, 1)
+    max_val = torch.stack([r[1] for r in ranges]).float().reshape(-1, 1)
+
+    if quantizer_cls is SymmetricUniformQuantizer:
+        qmin = -torch.pow(2.0, bits - 1)
+        qmax = torch.pow(2.0, bits - 1) - 1
+        max_abs = torch.max(min_val.abs(), max_val.abs())
+        scale = torch.clamp(max_abs / qmax, min=1e-8)
+        return scale, torch.zeros_like(scale), qmin, qmax
+
+    qmin = torch.zeros_like(bits)
+    qmax = torch.pow(2.0, bits) - 1
+    constant = max_val == min_val
+
+    scale = torch.clamp((max_val - min_val) / (qmax - qmin), min=1e-8)
+    scale = torch.where(constant, torch.ones_like(scale), scale)
+    zero_point = torch.clamp(rounding.round(qmin - min_val / scale), qmin, qmax)
+    zero_point = torch.where(constant, qmin, zero_point)
+    return scale, zero_point, qmin, qmax
+
+
+def _batched_errors(x, quantizer_cls, bits, ranges, rounding, chunk_size):
+    """
+    Quantizes x for every bit width at once, in chunks of chunk_size elements.
+    returns per-bit-width sums: squared error, max error, clipped count
+    """
+    x = x.flatten().float()
+    scale, zero_point, qmin, qmax = _uniform_params(
+        quantizer_cls, bits, ranges, rounding, x.device
+    )
+
+    sq_err = torch.zeros(len(bits), dtype=torch.float64, device=x.device)
+    max_err = torch.zeros(len(bits), device=x.device)
+    clipped = torch.zeros(len(bits), dtype=torch.long, device=x.device)
+
+    for start in range(0, x.numel(), chunk_size):
+        chunk = x[start : start + chunk_size].unsqueeze(0)
+
+        codes = rounding.round(chunk / scale + zero_point)
+        clipped += ((codes < qmin) | (codes > qmax)).sum(dim=1)
+        codes = torch.clamp(codes, qmin, qmax)
+
+        err = ((codes - zero_point) * scale - chunk).abs()
+        sq_err += err.double().pow(2).sum(dim=1)
+        max_err = torch.max(max_err, err.amax(dim=1))
+
+    return sq_err, max_err, clipped
+
+
+class _ClipCounter:
+    """
+    Profiling hook counting the codes one quantizer pushes outside
+    [qmin, qmax], read from the input of its clamp stage.
+    """
+
+    def __init__(self, quantizer):
+        self.quantizer = quantizer
+        self.clipped = None
+
+    def start(self, stage, name, obj, args):
+        if stage == "clamp" and obj is self.quantizer and args:
+            qx = args[0]
+            outside = int(((qx < obj.qmin) | (qx > obj.qmax)).sum())
+            self.clipped = (self.clipped or 0) + outside
+
+    def stop(self, token, result):
+        pass
+
+
+def _quantizer_errors(x, quantizer_cls, bits, value_range, rounding):
+    """
+    Reference path for any quantizer: build it, run it, measure it.
+    The clip count comes from a profiling hook on the quantizer's clamp
+    stage, from the codes before clamping, like the batched path.
+    """
+    quantizer = quantizer_cls(bits, FixedRangeObserver(*value_range), rounding)
+    counter = _ClipCounter(quantizer)
+
+    handle = register_hook(counter)
+    try:
+        qx = quantizer.quantize(x)
+    finally:
+        handle.remove()
+    err = (quantizer.dequantize(qx) - x).abs()
+
+    return float(err.double().pow(2).sum()), float(err.max()), counter.clipped
+
+
+def _metrics(sq_err, max_err, clipped, signal, numel):
+    mse = sq_err / numel
+    if sq_err == 0:
+        sqnr = math.inf
+    elif signal == 0:
+        sqnr = -math.inf
+    else:
+        sqnr = 10.0 * math.log10(signal / sq_err)
+    return {
+        "mse": mse,
+        "sqnr": sqnr,
+        "max_error": max_err,
+        "clip_rate": None if clipped is None else clipped / numel,
+    }
+
+
+def _named_tensors(target):
+    if isinstance(target, nn.Module):
+        params = target.named_parameters()
+        return {name: p.detach() for name, p in params if p.dim() >= 2}
+    return {"tensor": target.detach()}
+
+
+def _batchable(quantizer_cls, bits):
+    if quantizer_cls is SymmetricUniformQuantizer:
+        return bits > 1
+    return quantizer_cls is AsymmetricUniformQuantizer
+
+
+def _sweep_config(x, quantizer_cls, rounding, bits, range_for, chunk_size):
+    """
+    (sq_err, max_err, clipped) per bit width for one quantizer/observer/rounding.
+    """
+    results = {}
+
+    batched = [b for b in bits if _batchable(quantizer_cls, b)]
+    if batched:
+        ranges = [range_for(b) for b in batched]
+        sq_err, max_err, clipped = _batched_errors(
+            x, quantizer_cls, batched, ranges, rounding, chunk_size
+        )
+        for i, b in enumerate(batched):
+            results[b] = (float(sq_err[i]), float(max_err[i]), int(clipped[i]))
+
+    for b in bits:
+        if b not in results:
+            results[b] = _quantizer_errors(x, quantizer_cls, b, range_for(b), rounding)
+
+    return results
+
+
+def sweep(
+    target,
+    bits=(2, 3, 4, 8),
+    roundings=(NearestRounding,),
+    observers=(MinMaxObserver,),
+    quantizers=(SymmetricUniformQuantizer,),
+    chunk_size=1 << 20,
+):
+    """
+    Docstring for sweep
+
+    Quantization error for every combination of
+    quantizer class x observer class x rounding class x bit width.
+
+    target is a tensor, or a model whose weight matrices (parameters with
+    2+ dims) are swept one by one.
+
+    Work is shared instead of repeated per configuration:
+
+    - each tensor's aminmax and |x| histogram are computed once (SufficientStats)
+      and reused by every observer that can work from them
+    - an observer's range is computed once per tensor, and once per bit width
+      only for observers whose constructor takes `bits`
+    - for SymmetricUniformQuantizer / AsymmetricUniformQuantizer every bit
+      width is evaluated in ONE batched pass: the scales become a [B, 1] column
+      and x is broadcast against it, chunk_size elements at a time
+
+    Other quantizer classes (and 1-bit symmetric, which has its own sign path)
+    are run one configuration at a time through the quantizer itself.
+
+    returns a list of dicts, one per configuration, with
+    tensor, quantizer, observer, rounding, bits, mse, sqnr (dB), max_error, clip_rate
+    """
+    rows = []
+
+    for name, x in _named_tensors(target).items():
+        stats = SufficientStats(x)
+        signal = float(x.double().pow(2).sum())
+        ranges = {}
+
+        def range_for(observer_cls, b):
+            key = (observer_cls, b if _takes_bits(observer_cls) else None)
+            if key not in ranges:
+                ranges[key] = observer_range(observer_cls, b, stats)
+            return ranges[key]
+
+        for quantizer_cls in quantizers:
+            for observer_cls in observers:
+                for rounding_cls in roundings:
+                    results = _sweep_config(
+                        x,
+                        quantizer_cls,
+                        rounding_cls(),
+                        bits,
+                        lambda b: range_for(observer_cls, b),
+                        chunk_size,
+                    )
+
+                    for b in bits:
+                        row = {
+                            "tensor": name,
+                            "quantizer": quantizer_cls.__name__,
+                            "observer": observer_cls.__name__,
+                            "rounding": rounding_cls.__name__,
+                            "bits": b,
+                        }
+                        row.update(_metrics(*results[b], signal, x.numel()))
+                        rows.append(row)
+
+    return rows
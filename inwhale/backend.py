@@ -0,0 +1,336 @@
+"""
+Array backends: the same quantizer code runs on torch tensors and NumPy arrays.
+
+Quantizers, observers and rounding strategies never import torch or numpy at
+module level. Instead they ask for the backend of the array they were given:
+
+xp = get_backend(x)
+scale = xp.clip(max_abs / qmax, 1e-8, None)
+
+get_backend() only returns the torch backend when x IS a torch tensor, and it
+checks that through sys.modules, so a process that only ever passes NumPy
+arrays never imports torch.
+
+Both backends use the same IEEE float32 operations in the same order, and
+both round half to even, so the uniform quantizers and the deterministic
+rounding strategies give bit-identical results. Where the two libraries
+differ internally the results can differ in the last bit: log2 (libm vs
+SLEEF), reductions such as mean/quantile (summation order) and histogram bin
+edges. Random numbers (StochasticRounding) come from different generators.
+"""
+
+import sys
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self):
+        import torch
+
+        self.torch = torch
+
+    def abs(self, x):
+        return self.torch.abs(x)
+
+    def sign(self, x):
+        return self.torch.sign(x)
+
+    def floor(self, x):
+        return self.torch.floor(x)
+
+    def ceil(self, x):
+        return self.torch.ceil(x)
+
+    def trunc(self, x):
+        return self.torch.trunc(x)
+
+    def round(self, x):
+        return self.torch.round(x)
+
+    def log2(self, x):
+        return self.torch.log2(x)
+
+    def log(self, x):
+        return self.torch.log(x)
+
+    def frexp(self, x):
+        return self.torch.frexp(x)
+
+    def pow(self, base, exponent):
+        return self.torch.pow(base, exponent)
+
+    def maximum(self, a, b):
+        return self.torch.max(a, b)
+
+    def minimum(self, a, b):
+        return self.torch.min(a, b)
+
+    def clip(self, x, lo=None, hi=None):
+        return self.torch.clamp(x, lo, hi)
+
+    def where(self, condition, a, b):
+        return self.torch.where(condition, a, b)
+
+    def zeros_like(self, x):
+        return self.torch.zeros_like(x)
+
+    def ones_like(self, x):
+        return self.torch.ones_like(x)
+
+    def full_like(self, x, value):
+        return self.torch.full_like(x, value)
+
+    def zeros(self, shape, like, dtype=None):
+        return self.torch.zeros(shape, dtype=dtype or like.dtype, device=like.device)
+
+    def arange(self, start, stop, like):
+        return self.torch.arange(start, stop, device=like.device)
+
+    def tensor(self, value, like):
+        return self.torch.tensor(value, device=like.device)
+
+    def linspace(self, start, stop, num, like):
+        return self.torch.linspace(start, stop, num, device=like.device)
+
+    def all(self, x):
+        return bool(self.torch.all(x))
+
+    def any(self, x):
+        return bool(self.torch.any(x))
+
+    def isnan(self, x):
+        return self.torch.isnan(x)
+
+    def amin(self, x, dim, keepdim=False):
+        return self.torch.amin(x, dim=dim, keepdim=keepdim)
+
+    def amax(self, x, dim, keepdim=False):
+        return self.torch.amax(x, dim=dim, keepdim=keepdim)
+
+    def sum(self, x, dim=None):
+        return x.sum() if dim is None else x.sum(dim=dim)
+
+    def mean(self, x):
+        return self.torch.mean(x)
+
+    def cumsum(self, x):
+        return self.torch.cumsum(x, 0)
+
+    def concat(self, arrays):
+        return self.torch.cat(arrays)
+
+    def argmin(self, x):
+        return int(self.torch.argmin(x))
+
+    def quantile(self, x, qs):
+        q = self.torch.tensor(qs, dtype=x.dtype, device=x.device)
+        return self.torch.quantile(x, q)
+
+    def histc(self, x, bins, lo, hi):
+        return self.torch.histc(x, bins=bins, min=lo, max=hi)
+
+    def index_add(self, target, index, source):
+        return target.index_add(0, index, source)
+
+    def floor_divide(self, a, b):
+        return self.torch.div(a, b, rounding_mode="floor")
+
+    def rand(self, shape, like, generator=None):
+        return self.torch.rand(
+            shape, dtype=like.dtype, device=like.device, generator=generator
+        )
+
+    def detach(self, x):
+        return x.detach()
+
+    def numel(self, x):
+        return x.numel()
+
+    def moveaxis(self, x, source, destination):
+        return x.movedim(source, destination)
+
+    def float32(self, x):
+        return x.float()
+
+    def float64(self, x):
+        return x.double()
+
+    def int64(self, x):
+        return x.long()
+
+    def uint8(self, x):
+        return x.to(self.torch.uint8)
+
+
+class NumpyBackend:
+    name = "numpy"
+
+    def __init__(self):
+        import numpy as np
+
+        self.np = np
+
+    def abs(self, x):
+        return self.np.abs(x)
+
+    def sign(self, x):
+        return self.np.sign(x)
+
+    def floor(self, x):
+        return self.np.floor(x)
+
+    def ceil(self, x):
+        return self.np.ceil(x)
+
+    def trunc(self, x):
+        return self.np.trunc(x)
+
+    def round(self, x):
+        return self.np.round(x)
+
+    def log2(self, x):
+        return self.np.log2(x)
+
+    def log(self, x):
+        return self.np.log(x)
+
+    def frexp(self, x):
+        return self.np.frexp(x)
+
+    def pow(self, base, exponent):
+        return self.np.power(base, exponent)
+
+    def maximum(self, a, b):
+        return self.np.maximum(a, b)
+
+    def minimum(self, a, b):
+        return self.np.minimum(a, b)
+
+    def clip(self, x, lo=None, hi=None):
+        return self.np.clip(x, lo, hi)
+
+    def where(self, condition, a, b):
+        return self.np.where(condition, a, b)
+
+    def zeros_like(self, x):
+        return self.np.zeros_like(x)
+
+    def ones_like(self, x):
+        return self.np.ones_like(x)
+
+    def full_like(self, x, value):
+        return self.np.full_like(x, value)
+
+    def zeros(self, shape, like, dtype=None):
+        return self.np.zeros(shape, dtype=dtype or self.np.asarray(like).dtype)
+
+    def arange(self, start, stop, like):
+        return self.np.arange(start, stop)
+
+    def tensor(self, value, like):
+        return self.np.asarray(value, dtype=self.np.asarray(like).dtype)
+
+    def linspace(self, start, stop, num, like):
+        dtype = self.np.asarray(like).dtype
+        return self.np.linspace(start, stop, num, dtype=dtype)
+
+    def all(self, x):
+        return bool(self.np.all(x))
+
+    def any(self, x):
+        return bool(self.np.any(x))
+
+    def isnan(self, x):
+        return self.np.isnan(x)
+
+    def amin(self, x, dim, keepdim=False):
+        axis = tuple(dim) if isinstance(dim, (list, tuple)) else dim
+        return self.np.amin(x, axis=axis, keepdims=keepdim)
+
+    def amax(self, x, dim, keepdim=False):
+        axis = tuple(dim) if isinstance(dim, (list, tuple)) else dim
+        return self.np.amax(x, axis=axis, keepdims=keepdim)
+
+    def sum(self, x, dim=None):
+        return x.sum() if dim is None else x.sum(axis=dim)
+
+    def mean(self, x):
+        return self.np.mean(x)
+
+    def cumsum(self, x):
+        return self.np.cumsum(x, 0)
+
+    def concat(self, arrays):
+        return self.np.concatenate(arrays)
+
+    def argmin(self, x):
+        return int(self.np.argmin(x))
+
+    def quantile(self, x, qs):
+        return self.np.quantile(x, qs).astype(x.dtype)
+
+    def histc(self, x, bins, lo, hi):
+        hist, _ = self.np.histogram(x, bins=bins, range=(lo, hi))
+        return hist.astype(x.dtype)
+
+    def index_add(self, target, index, source):
+        out = target.copy()
+        self.np.add.at(out, index, source)
+        return out
+
+    def floor_divide(self, a, b):
+        return self.np.floor_divide(a, b)
+
+    def rand(self, shape, like, generator=None):
+        generator = generator or self.np.random.default_rng()
+        return generator.random(shape, dtype=self.np.asarray(like).dtype)
+
+    def detach(self, x):
+        return x
+
+    def numel(self, x):
+        return self.np.size(x)
+
+    def moveaxis(self, x, source, destination):
+        return self.np.moveaxis(x, source, destination)
+
+    def float32(self, x):
+        return self.np.asarray(x, dtype=self.np.float32)
+
+    def float64(self, x):
+        return self.np.asarray(x, dtype=self.np.float64)
+
+    def int64(self, x):
+        return self.np.asarray(x, dtype=self.np.int64)
+
+    def uint8(self, x):
+        return self.np.asarray(x, dtype=self.np.uint8)
+
+
+_backends = {}
+
+
+def _backend(cls):
+    if cls not in _backends:
+        _backends[cls] = cls()
+    return _backends[cls]
+
+
+def is_torch(x):
+    """
+    True if x is a torch tensor. Never imports torch: if torch was not
+    imported yet, nobody can have made a tensor.
+    """
+    torch = sys.modules.get("torch")
+    return torch is not None and isinstance(x, torch.Tensor)
+
+
+def get_backend(x):
+    """
+    TorchBackend for torch tensors, NumpyBackend for everything else
+    (ndarrays, NumPy scalars, Python numbers).
+    """
+    if is_torch(x):
+        return _backend(TorchBackend)
+    return _backend(NumpyBackend)
@@ -0,0 +1,277 @@
+"""
+Opt-in cache that skips re-quantizing tensors that have not changed.
+
+Quantizing the same weights again (evaluation loops, repeated exports, QAT
+snapshots) re-runs observe() and _compute_scale() on identical data. With a
+cache attached,
+
+q.cache = ParamCache(max_bytes=256 << 20)
+
+q.quantize(w) remembers the quantizer's parameters (scale, zero_point, ...)
+and the codes it returned. The next q.quantize(w) on the SAME, UNMODIFIED
+tensor restores the parameters and returns the cached codes without touching
+the observer, which is left as it was (see BaseQuantizer.cache_params).
+
+Observers take a cache the same way (obs.cache = ParamCache()). A hit
+restores the observer state left behind by the first observe(x), which makes
+expensive per-call observers (MSEObserver, PercentileObserver, KL) free on
+repeated tensors. For accumulating observers (MinMax) shared across tensors
+this means a hit forgets anything observed in between.
+
+"Unmodified" is decided by tensor_key(): the data pointer, torch's _version
+counter, shape, strides, dtype and device. Every in-place op bumps _version,
+so w.add_(1) or w.copy_(...) makes the next call a miss. Writes through
+w.data are NOT seen: w.data is a separate tensor with its own version
+counter, so w.data.mul_(3) leaves w's key unchanged and the next call is a
+stale hit. Update parameters in place under torch.no_grad() instead, or call
+cache.invalidate(w) after touching w.data. NumPy arrays have no version
+counter, so only read-only arrays (arr.flags.writeable == False) are cached;
+writeable arrays always miss.
+
+A tensor that requires grad, while grad mode is on, bypasses the cache
+altogether: a hit could only hand back detached codes, and turning the cache
+on must not change what autograd sees. Under torch.no_grad() (evaluation,
+export) parameters are cached as usual.
+
+A freed tensor's address can be reused by a new one, so every entry also
+keeps a weak reference to its tensor and only hits for that exact object.
+
+Entries are evicted least-recently-used first once their arrays add up to
+more than max_bytes. Codes of quantizers with integer_codes = True are stored
+as int8/uint8 when [qmin, qmax] fits.
+"""
+
+import functools
+import weakref
+from collections import OrderedDict
+
+from .backend import is_torch
+
+
+def tensor_key(x):
+    """
+    Cache key for x, or None if x cannot be cached safely.
+    """
+    if is_torch(x):
+        try:
+            version = x._version
+        except RuntimeError:
+            # inference-mode tensors have no version counter
+            return None
+        return (
+            x.data_ptr(),
+            version,
+            tuple(x.shape),
+            x.stride(),
+            x.dtype,
+            x.device,
+        )
+
+    flags = getattr(x, "flags", None)
+    if flags is None or flags.writeable:
+        return None
+    return (
+        x.__array_interface__["data"][0],
+        x.shape,
+        x.strides,
+        x.dtype,
+    )
+
+
+def _tracks_grad(x):
+    if not getattr(x, "requires_grad", False):
+        return False
+    import torch
+
+    return torch.is_grad_enabled()
+
+
+def _nbytes(value):
+    if is_torch(value):
+        return value.numel() * value.element_size()
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    return getattr(value, "nbytes", 0)
+
+
+def _is_array(value):
+    return is_torch(value) or hasattr(value, "__array_interface__")
+
+
+def _compact_dtype(codes, bounds):
+    # narrowest integer dtype for float codes known to be integers in
+    # bounds = (qmin, qmax), or None; decided without reading the codes
+    if bounds is None:
+        return None
+    lo, hi = bounds
+    if is_torch(codes):
+        import torch
+
+        if not codes.is_floating_point():
+            return None
+        uint8, int8 = torch.uint8, torch.int8
+    else:
+        import numpy as np
+
+        if codes.dtype.kind != "f":
+            return None
+        uint8, int8 = np.uint8, np.int8
+
+    if 0 <= lo and hi <= 255:
+        return uint8
+    if -128 <= lo and hi <= 127:
+        return int8
+    return None
+
+
+class _Codes:
+    """
+    Stored copy of a quantize() result, compacted when possible.
+    """
+
+    __slots__ = ("data", "dtype")
+
+    def __init__(self, codes, bounds=None):
+        self.dtype = codes.dtype
+        compact = _compact_dtype(codes, bounds) if _is_array(codes) else None
+        if not _is_array(codes):
+            # e.g. SparseCodes, already compact and never modified in place
+            self.data = codes
+        elif compact is None:
+            self.data = codes.detach().clone() if is_torch(codes) else codes.copy()
+        elif is_torch(codes):
+            self.data = codes.detach().to(compact)
+        else:
+            self.data = codes.astype(compact)
+
+    def get(self):
+        # always a fresh array: callers may modify the codes they get back
+        if not _is_array(self.data):
+            return self.data
+        if is_torch(self.data):
+            return self.data.to(self.dtype)
+        return self.data.astype(self.dtype)
+
+    @property
+    def nbytes(self):
+        return _nbytes(self.data)
+
+
+class _Entry:
+    __slots__ = ("ref", "state", "codes", "nbytes")
+
+    def __init__(self, x, state, codes):
+        self.ref = weakref.ref(x)
+        self.state = state
+        self.codes = codes
+        self.nbytes = _nbytes(state) + (codes.nbytes if codes is not None else 0)
+
+
+class ParamCache:
+    """
+    LRU map from tensor_key(x) to (state, codes), bounded by max_bytes.
+    """
+
+    def __init__(self, max_bytes=64 << 20):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive.")
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, x):
+        """
+        returns the entry stored for x, or None
+        """
+        key = tensor_key(x)
+        entry = self.entries.get(key) if key is not None else None
+        if entry is None or entry.ref() is not x:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def store(self, x, state, codes=None, bounds=None):
+        """
+        bounds: (qmin, qmax) when the codes are known to be integers in that
+        range, which lets them be stored as int8/uint8
+        """
+        key = tensor_key(x)
+        if key is None:
+            return
+        codes = _Codes(codes, bounds) if codes is not None else None
+        entry = _Entry(x, state, codes)
+        self.discard(key)
+        if entry.nbytes > self.max_bytes:
+            return
+
+        self.entries[key] = entry
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def invalidate(self, x):
+        """
+        Drops the entry for x, e.g. after writing to x.data.
+        """
+        key = tensor_key(x)
+        if key is not None:
+            self.discard(key)
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+
+def cached(func):
+    """
+    Wraps quantize(x) / observe(x) so an attached ParamCache is consulted.
+
+    The owner provides _cache_state() and _restore_cache_state(state).
+    Without a cache the wrapper does one attribute check and calls through.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, x, *args, **kwargs):
+        cache = self.cache
+        if cache is None or args or kwargs or _tracks_grad(x):
+            return func(self, x, *args, **kwargs)
+
+        entry = cache.lookup(x)
+        if entry is not None:
+            self._restore_cache_state(entry.state)
+            return entry.codes.get() if entry.codes is not None else None
+
+        result = func(self, x)
+        bounds = None
+        if getattr(self, "integer_codes", False):
+            bounds = (self.qmin, self.qmax)
+        cache.store(x, self._cache_state(), result, bounds)
+        return result
+
+    wrapper.__cached__ = True
+    return wrapper
+
+
+def cache_methods(cls, names):
+    """
+    Applies cached() to the methods in `names` that `cls` itself defines.
+    Called from __init_subclass__, before the profiling hooks are applied.
+    """
+    for name in names:
+        func = cls.__dict__.get(name)
+        if not callable(func) or getattr(func, "__cached__", False):
+            continue
+        setattr(cls, name, cached(func))
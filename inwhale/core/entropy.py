@@ -0,0 +1,312 @@
+"""
+Entropy coding (interleaved rANS) of quantized codes, for compact storage.
+
+8-bit codes from the uniform quantizers are far from uniformly distributed:
+weights are bell-shaped, so most codes sit near the zero point and the
+extreme levels are rare. Their entropy is well below 8 bits, and rANS stores
+them in (almost exactly) that many bits.
+
+rANS in one paragraph. A symbol s with frequency f[s] (the frequencies are
+scaled to sum to M = 2^scale_bits) and cumulative frequency c[s] is pushed
+onto an integer state x by
+
+x' = (x // f[s]) * M + (x % f[s]) + c[s]
+
+which grows x by about log2(M / f[s]) bits: few for frequent symbols, many
+for rare ones. Decoding pops it again with a table lookup:
+
+slot = x' % M,  s = symbol_of[slot],  x = f[s] * (x' // M) + slot - c[s]
+
+The state is kept in [2^16, 2^32) by writing / reading 16-bit words
+(renormalization). The coder is a stack, so encoding runs backwards.
+
+Interleaving makes that loop vectorized: symbol i goes to lane i % lanes,
+every lane has its own state and word stream, and each encode / decode step
+handles one symbol of ALL lanes with NumPy array ops. A block of n symbols
+takes n / lanes steps. Every lane also stores its final state and word count
+(8 bytes), so lanes are capped at n / MIN_LANE_SYMBOLS: short blocks get
+fewer lanes instead of growing past their input.
+
+The decoder folds the table lookups into two per-slot tables,
+
+x = slot_freq[slot] * (x' // M) + slot_bias[slot]
+
+keeps only the slots inside the loop (symbol_of is applied once at the end),
+and refills just the lanes whose state dropped below 2^16.
+
+Streaming. compress() cuts the codes into blocks of `block_size` and yields
+one self-contained chunk of bytes per block, each with its own frequency
+table (so the table follows the statistics of that part of the tensor).
+decompress() consumes chunks one at a time and yields the decoded codes, so
+neither side needs the whole tensor in memory. write_codes() / read_codes()
+frame the chunks in a file.
+
+This module needs NumPy (the optional "numpy" extra). Codes may be torch
+tensors or NumPy arrays; decoded codes are returned as NumPy float32 arrays
+like the ones quantize() produced.
+"""
+
+import struct
+
+import numpy as np
+
+from ..backend import is_torch
+
+RANS_L = 1 << 16
+WORD_BITS = 16
+WORD_MASK = (1 << WORD_BITS) - 1
+
+_MAGIC = b"IWRB"
+_HEADER = struct.Struct("<4sIIHIi")  # magic, numel, lanes, scale_bits, symbols, qmin
+_FILE_MAGIC = b"IWRC"
+
+# fewest symbols per lane, keeps the 8-byte per-lane header below 1/8 bit each
+MIN_LANE_SYMBOLS = 512
+
+
+def _to_integers(codes):
+    if is_torch(codes):
+        codes = codes.detach().cpu().numpy()
+    codes = np.asarray(codes)
+    if codes.dtype.kind == "f":
+        if not np.all(codes == np.round(codes)):
+            raise ValueError("Codes must be integers.")
+    elif codes.dtype.kind not in "iu":
+        raise ValueError(f"Codes must be integers, got dtype {codes.dtype}.")
+    return codes.astype(np.int64)
+
+
+def normalize_frequencies(counts, scale_bits=12):
+    """
+    Scales symbol counts to frequencies summing to exactly 2^scale_bits,
+    keeping every symbol that occurs at frequency >= 1.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    m = 1 << scale_bits
+    present = counts > 0
+    if total == 0:
+        raise ValueError("Cannot build a frequency table from no symbols.")
+    if int(present.sum()) > m:
+        raise ValueError(f"More than 2^{scale_bits} distinct symbols.")
+
+    freq = np.where(present, np.maximum(counts * m // total, 1), 0)
+
+    # hand the rounding error to the largest frequencies
+    diff = m - int(freq.sum())
+    while diff != 0:
+        order = np.flatnonzero(present)
+        order = order[np.argsort(-freq[order], kind="stable")]
+        step = 1 if diff > 0 else -1
+        for s in order[: abs(diff)]:
+            if freq[s] + step >= 1:
+                freq[s] += step
+                diff -= step
+            if diff == 0:
+                break
+    return freq
+
+
+class EncodedBlock:
+    """
+    One rANS-coded block: frequency table, final lane states and the 16-bit
+    words of every lane, stored lane after lane.
+    """
+
+    def __init__(self, numel, qmin, scale_bits, freq, states, counts, words):
+        self.numel = numel
+        self.qmin = qmin
+        self.scale_bits = scale_bits
+        self.freq = freq
+        self.states = states
+        self.counts = counts
+        self.words = words
+
+    @property
+    def lanes(self):
+        return len(self.states)
+
+    def to_bytes(self):
+        header = _HEADER.pack(
+            _MAGIC, self.numel, self.lanes, self.scale_bits, len(self.freq), self.qmin
+        )
+        return b"".join(
+            [
+                header,
+                self.freq.astype("<u2").tobytes(),
+                self.states.astype("<u4").tobytes(),
+                self.counts.astype("<u4").tobytes(),
+                self.words.astype("<u2").tobytes(),
+            ]
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, numel, lanes, scale_bits, symbols, qmin = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not an rANS block.")
+
+        offset = _HEADER.size
+
+        def take(dtype, count):
+            nonlocal offset
+            out = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += out.nbytes
+            return out.astype(np.int64)
+
+        freq = take("<u2", symbols)
+        states = take("<u4", lanes)
+        counts = take("<u4", lanes)
+        words = take("<u2", int(counts.sum()))
+        return cls(numel, qmin, scale_bits, freq, states, counts, words)
+
+
+def rans_encode(symbols, freq, scale_bits=12, lanes=1024, qmin=0):
+    """
+    symbols: 1-D integer array in [0, len(freq)), every symbol with freq > 0
+    returns EncodedBlock
+    """
+    symbols = _to_integers(symbols).ravel()
+    freq = np.asarray(freq, dtype=np.int64)
+    cdf = np.concatenate([[0], np.cumsum(freq)[:-1]])
+    n = symbols.size
+    lanes = max(1, min(lanes, n // MIN_LANE_SYMBOLS))
+
+    # pad to whole steps with the most frequent symbol (cheapest to code)
+    steps = -(-n // lanes)
+    padded = np.full(steps * lanes, int(np.argmax(freq)), dtype=np.int64)
+    padded[:n] = symbols
+    grid = padded.reshape(steps, lanes)
+
+    state = np.full(lanes, RANS_L, dtype=np.int64)
+    emitted = np.zeros((steps, lanes), dtype=bool)
+    words = np.zeros((steps, lanes), dtype=np.int64)
+    bound = (RANS_L >> scale_bits) << WORD_BITS
+
+    for t in range(steps - 1, -1, -1):
+        s = grid[t]
+        f = freq[s]
+
+        emit = state >= bound * f
+        emitted[t] = emit
+        words[t] = state & WORD_MASK
+        state = np.where(emit, state >> WORD_BITS, state)
+
+        state = ((state // f) << scale_bits) + (state % f) + cdf[s]
+
+    # the decoder reads lane l's words in step order, stored lane after lane
+    emitted, words = emitted.T, words.T
+    return EncodedBlock(
+        n,
+        qmin,
+        scale_bits,
+        freq,
+        state,
+        emitted.sum(axis=1),
+        words[emitted],
+    )
+
+
+def rans_decode(block):
+    """
+    Inverse of rans_encode, returns the 1-D int64 symbols.
+    """
+    scale_bits = block.scale_bits
+    m = 1 << scale_bits
+    freq = block.freq
+    cdf = np.concatenate([[0], np.cumsum(freq)[:-1]])
+    symbol_of = np.repeat(np.arange(len(freq)), freq)
+    slot_freq = freq[symbol_of]
+    slot_bias = np.arange(m) - cdf[symbol_of]
+
+    lanes = block.lanes
+    steps = -(-block.numel // lanes) if block.numel else 0
+    state = block.states.copy()
+    position = np.concatenate([[0], np.cumsum(block.counts)[:-1]])
+    words = block.words
+    slots = np.empty((steps, lanes), dtype=np.int64)
+
+    for t in range(steps):
+        slot = state & (m - 1)
+        slots[t] = slot
+        state = slot_freq[slot] * (state >> scale_bits) + slot_bias[slot]
+
+        # at most one word per step, since the state stays below 2^32
+        refill = np.flatnonzero(state < RANS_L)
+        if refill.size:
+            read = position[refill]
+            state[refill] = (state[refill] << WORD_BITS) | words[read]
+            position[refill] = read + 1
+
+    return symbol_of[slots.ravel()[: block.numel]]
+
+
+def compress(codes, qmin, qmax, block_size=1 << 20, lanes=1024, scale_bits=12):
+    """
+    Yields one bytes chunk per block of `block_size` codes (flattened order).
+    Codes must be integers in [qmin, qmax], as returned by quantize().
+    """
+    if qmax - qmin + 1 > (1 << scale_bits) or not 1 <= scale_bits <= 15:
+        raise ValueError("Need qmax - qmin + 1 <= 2^scale_bits, scale_bits <= 15.")
+
+    flat = _to_integers(codes).reshape(-1)
+    for start in range(0, flat.size, block_size):
+        symbols = flat[start : start + block_size] - qmin
+        if symbols.min() < 0 or symbols.max() > qmax - qmin:
+            raise ValueError("Codes outside [qmin, qmax].")
+
+        counts = np.bincount(symbols, minlength=qmax - qmin + 1)
+        freq = normalize_frequencies(counts, scale_bits)
+        yield rans_encode(symbols, freq, scale_bits, lanes, qmin).to_bytes()
+
+
+def decompress(chunks, dtype=np.float32):
+    """
+    Yields the codes of every chunk, one 1-D array per chunk.
+    """
+    for chunk in chunks:
+        block = EncodedBlock.from_bytes(chunk)
+        yield (rans_decode(block) + block.qmin).astype(dtype)
+
+
+def write_codes(f, codes, qmin, qmax, **kwargs):
+    """
+    Writes the shape and the compress() chunks of `codes` to a binary file.
+    kwargs go to compress(). returns the number of bytes written
+    """
+    shape = tuple(codes.shape)
+    written = f.write(_FILE_MAGIC + struct.pack(f"<I{len(shape)}Q", len(shape), *shape))
+    for chunk in compress(codes, qmin, qmax, **kwargs):
+        written += f.write(struct.pack("<Q", len(chunk)))
+        written += f.write(chunk)
+    written += f.write(struct.pack("<Q", 0))
+    return written
+
+
+def read_chunks(f):
+    """
+    Reads the header written by write_codes, returns (shape, chunk iterator).
+    """
+    if f.read(4) != _FILE_MAGIC:
+        raise ValueError("Not an entropy-coded codes file.")
+    (ndim,) = struct.unpack("<I", f.read(4))
+    shape = struct.unpack(f"<{ndim}Q", f.read(8 * ndim))
+
+    def chunks():
+        while True:
+            (length,) = struct.unpack("<Q", f.read(8))
+            if length == 0:
+                return
+            yield f.read(length)
+
+    return shape, chunks()
+
+
+def read_codes(f, dtype=np.float32):
+    """
+    Reads a whole tensor written by write_codes.
+    """
+    shape, chunks = read_chunks(f)
+    blocks = list(decompress(chunks, dtype))
+    flat = np.concatenate(blocks) if blocks else np.zeros(0, dtype=dtype)
+    return flat.reshape(shape)
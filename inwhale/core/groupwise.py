@@ -0,0 +1,215 @@
+from ..backend import get_backend
+from ..observers.minmax import PerChannelMinMaxObserver
+from .quantizer import BaseQuantizer
+from .uniform import AsymmetricUniformQuantizer
+
+
+class GroupwiseQuantizer(BaseQuantizer):
+    """
+    Docstring for GroupwiseQuantizer
+
+    A per-tensor scale is decided by the single largest value in the tensor.
+    For LLM weights that is a problem: one outlier stretches the scale and every
+    other value gets only a handful of the 2^bits levels.
+
+    Group-wise quantization splits the LAST dimension into contiguous groups of
+    `group_size` elements, and every group gets its own scale and zero_point.
+
+    w.shape = [out, in], group_size = g
+    groups  = w.reshape(-1, g)          -> [out * in / g, g]
+
+    Each row of `groups` is one group, so a PerChannelMinMaxObserver over dim 0
+    gives exactly one (min, max) per group, and AsymmetricUniformQuantizer does
+    the rest with its usual math:
+
+    scale      = (max - min) / (qmax - qmin)        shape [num_groups, 1]
+    zero_point = round(qmin - min / scale)          shape [num_groups, 1]
+
+    Like every other quantizer here, the observer keeps its state between
+    calls, so use one GroupwiseQuantizer per tensor.
+
+    Double quantization (double_quant=True, as in QLoRA)
+    ------------------------------------------------------
+    With group_size = 64 a float32 scale and zero_point cost 64 / 64 = 1 bit
+    per weight on top of a 4-bit code. Since bits <= 8, every zero_point is
+    an integer in [qmin, qmax] already and is stored exactly as one uint8,
+    zp - qmin. The scales are quantized again, per block of `scale_block`
+    consecutive groups. A uniform grid over the scales themselves would
+    have an absolute step of (max - min) / 255, which wipes out a small
+    scale sharing a block with large ones. So the second level works on
+    l = log2(scale) instead, where a fixed step is a fixed RELATIVE error:
+    l is centred on the block mean M_b, then quantized with an 8-bit
+    AsymmetricUniformQuantizer (one S_b, Z_b per block):
+
+    scale_codes[g] = round((log2(scale[g]) - M_b) / S_b + Z_b)   uint8 per group
+    M_b, S_b, Z_b                                                float per block
+
+    which is 16 + 96 / scale_block bits per group instead of 64. A decoded
+    scale is off by a factor of at most 2^(S_b / 2) and is always positive;
+    S_b is the block's spread in binades / 255. Centring also keeps a block
+    of identical scales (nearly) exact: it becomes all zeros.
+
+    dequantize() then decodes both levels in one broadcast expression over
+    [blocks, scale_block, group_size] views of the codes,
+
+    x' = (q - (zp_code + qmin)) * 2^((scale_code - Z_b) * S_b + M_b)
+
+    and the float32 scales are never stored; `scale` and `zero_point` decode
+    them on demand.
+    """
+
+    def __init__(
+        self,
+        bits,
+        rounding,
+        group_size=128,
+        signed=False,
+        double_quant=False,
+        scale_block=256,
+    ):
+        super().__init__(bits)
+        if group_size <= 0:
+            raise ValueError("group_size must be positive.")
+        if double_quant and bits > 8:
+            raise ValueError("double_quant stores zero points as uint8, bits <= 8.")
+
+        self.group_size = group_size
+        self.rounding = rounding
+        self.observer = PerChannelMinMaxObserver(dim=0)
+        self.quantizer = AsymmetricUniformQuantizer(
+            bits, self.observer, rounding, signed=signed
+        )
+
+        self.qmin = self.quantizer.qmin
+        self.qmax = self.quantizer.qmax
+        self.integer_codes = self.quantizer.integer_codes
+
+        self.double_quant = double_quant
+        self.scale_block = scale_block
+        self.scale_quantizer = AsymmetricUniformQuantizer(
+            8, PerChannelMinMaxObserver(dim=0), rounding
+        )
+        self.num_groups = None
+        self.scale_mean = None
+        self.scale_codes = None
+        self.zero_point_codes = None
+
+    @property
+    def scale(self):
+        if self.scale_codes is None:
+            return self.quantizer.scale
+        xp = get_backend(self.scale_codes)
+        codes = xp.float32(self.scale_codes).reshape(-1, self.scale_block)
+        log_scale = self.scale_quantizer.dequantize(codes) + self.scale_mean
+        scale = xp.pow(2.0, log_scale)
+        return scale.reshape(-1, 1)[: self.num_groups]
+
+    @property
+    def zero_point(self):
+        if self.zero_point_codes is None:
+            return self.quantizer.zero_point
+        xp = get_backend(self.zero_point_codes)
+        zero_point = xp.float32(self.zero_point_codes) + self.qmin
+        return zero_point.reshape(-1, 1)[: self.num_groups]
+
+    # the parameters live on the inner quantizers (and the codes here)
+    def _cache_state(self):
+        state = {"inner": self.quantizer._cache_state()}
+        if self.double_quant:
+            state["scale"] = self.scale_quantizer._cache_state()
+            state["codes"] = (
+                self.num_groups,
+                self.scale_mean,
+                self.scale_codes,
+                self.zero_point_codes,
+            )
+        return state
+
+    def _restore_cache_state(self, state):
+        self.quantizer._restore_cache_state(state["inner"])
+        if "codes" in state:
+            self.scale_quantizer._restore_cache_state(state["scale"])
+            (
+                self.num_groups,
+                self.scale_mean,
+                self.scale_codes,
+                self.zero_point_codes,
+            ) = state["codes"]
+
+    def _blocks(self, per_group):
+        # [padded groups] -> [blocks, scale_block, 1]
+        return per_group.reshape(-1, self.scale_block, 1)
+
+    def _per_block(self, param):
+        if hasattr(param, "shape"):
+            return param[..., None]
+        return param
+
+    def _compress_params(self, groups):
+        xp = get_backend(groups)
+        num_groups = groups.shape[0]
+        # per-group params are [num_groups, 1], or plain floats if x was constant
+        like = xp.zeros((num_groups, 1), like=groups)
+        scale = xp.float32(like + self.quantizer.scale).reshape(-1)
+        zero_point = xp.float32(like + self.quantizer.zero_point).reshape(-1)
+
+        # repeat the last group up to a whole block, sliced off on decode
+        pad = (-num_groups) % self.scale_block
+        if pad:
+            fill = xp.zeros((pad,), like=scale)
+            scale = xp.concat([scale, fill + scale[-1]])
+            zero_point = xp.concat([zero_point, fill + zero_point[-1]])
+
+        blocks = xp.log2(xp.clip(scale, 1e-30)).reshape(-1, self.scale_block)
+        self.scale_mean = xp.sum(blocks, dim=1).reshape(-1, 1) / self.scale_block
+        codes = self.scale_quantizer.quantize(blocks - self.scale_mean)
+        self.scale_codes = xp.uint8(codes.reshape(-1))
+        self.zero_point_codes = xp.uint8(zero_point - self.qmin)
+        self.num_groups = num_groups
+
+        # only the 8-bit codes are kept
+        self.quantizer.scale = None
+        self.quantizer.zero_point = None
+
+    def _to_groups(self, x):
+        if x.shape[-1] % self.group_size != 0:
+            raise ValueError(
+                f"Last dimension ({x.shape[-1]}) must be divisible by "
+                f"group_size ({self.group_size})."
+            )
+        return x.reshape(-1, self.group_size)
+
+    def quantize(self, x):
+        groups = self._to_groups(x)
+        qx = self.quantizer.quantize(groups)
+        if self.double_quant:
+            self._compress_params(groups)
+        return qx.reshape(x.shape)
+
+    def _dequantize_double(self, groups):
+        xp = get_backend(groups)
+        pad = (-groups.shape[0]) % self.scale_block
+        if pad:
+            fill = xp.zeros((pad, self.group_size), like=groups)
+            groups = xp.concat([groups, fill])
+        q = groups.reshape(-1, self.scale_block, self.group_size)
+
+        scale_codes = xp.float32(self._blocks(self.scale_codes))
+        zero_point = xp.float32(self._blocks(self.zero_point_codes)) + self.qmin
+        # [blocks, 1, 1], or a plain float when every block was constant
+        block_scale = self._per_block(self.scale_quantizer.scale)
+        block_zero_point = self._per_block(self.scale_quantizer.zero_point)
+        block_mean = self._per_block(self.scale_mean)
+
+        log_scale = (scale_codes - block_zero_point) * block_scale + block_mean
+        scale = xp.pow(2.0, log_scale)
+        dx = (q - zero_point) * scale
+        return dx.reshape(-1, self.group_size)[: self.num_groups]
+
+    def dequantize(self, qx):
+        groups = self._to_groups(qx)
+        if self.scale_codes is not None:
+            dx = self._dequantize_double(groups)
+        else:
+            dx = self.quantizer.dequantize(groups)
+        return dx.reshape(qx.shape)
@@ -0,0 +1,140 @@
+import torch
+
+from .quantizer import BaseQuantizer
+
+
+def _default_block_size(size):
+    # largest power of two dividing size
+    return size & -size
+
+
+def fwht(x, block_size=None):
+    """
+    Orthonormal fast Walsh-Hadamard transform over the last dimension.
+
+    The last dimension is split into blocks of block_size (a power of two,
+    default: the largest one dividing it) and every block gets H / sqrt(b),
+    with H the Sylvester Hadamard matrix. Instead of a [b, b] matmul, log2(b)
+    butterfly stages run over the whole tensor, each one in place on views of
+    a single copy of x:
+
+    a, c = x[..., pairs h apart]
+    a <- a + c,   c <- a_new - 2c = a - c
+
+    O(n log n) work and no matrix is ever built. The transform is its own
+    inverse.
+    """
+    n = x.shape[-1]
+    b = block_size if block_size is not None else _default_block_size(n)
+    if b <= 0 or b & (b - 1) or n % b:
+        raise ValueError(
+            f"block_size ({b}) must be a power of two dividing the last "
+            f"dimension ({n})."
+        )
+
+    if not x.is_floating_point():
+        x = x.float()
+    out = x.clone(memory_format=torch.contiguous_format)
+    blocks = out.view(-1, n // b, b)
+
+    h = 1
+    while h < b:
+        pairs = blocks.view(-1, n // b, b // (2 * h), 2, h)
+        a, c = pairs[..., 0, :], pairs[..., 1, :]
+        a.add_(c)
+        c.mul_(-2).add_(a)
+        h *= 2
+
+    return out.mul_(b**-0.5)
+
+
+class HadamardRotation:
+    """
+    Docstring for HadamardRotation
+
+    A random orthogonal rotation spreads every outlier over all the
+    coordinates it is mixed with, so after rotating, a MinMaxObserver or
+    MSEObserver sees a range close to the typical value instead of the worst
+    one (QuaRot, QuIP#).
+
+    Q = H_b D / sqrt(b) acting on the last dimension, where D is a fixed
+    diagonal of random signs (from `seed`) and H_b the block-diagonal
+    Hadamard matrix applied by fwht():
+
+    rotate(x)   = fwht(x * d)          = x @ Q.T
+    unrotate(y) = fwht(y) * d          = y @ Q
+
+    Sizes that are not a power of two are split into power-of-two blocks, so
+    the mixing only happens inside each block: 768 = 3 * 256 uses blocks of
+    256, an odd size gets no mixing at all.
+    """
+
+    def __init__(self, size, block_size=None, seed=0):
+        self.size = size
+        self.block_size = (
+            block_size if block_size is not None else _default_block_size(size)
+        )
+        generator = torch.Generator().manual_seed(seed)
+        self.signs = torch.randint(0, 2, (size,), generator=generator) * 2.0 - 1.0
+
+    def _signs(self, x):
+        if x.shape[-1] != self.size:
+            raise ValueError(
+                f"Expected last dimension {self.size}, got {x.shape[-1]}."
+            )
+        return self.signs.to(device=x.device, dtype=x.dtype)
+
+    def rotate(self, x):
+        x = x if x.is_floating_point() else x.float()
+        return fwht(x * self._signs(x), self.block_size)
+
+    def unrotate(self, y):
+        y = y if y.is_floating_point() else y.float()
+        return fwht(y, self.block_size) * self._signs(y)
+
+    def matrix(self):
+        """
+        The dense Q, [size, size]. Only meant for checks and small layers.
+        """
+        return self.rotate(torch.eye(self.size)).t()
+
+
+class RotatedQuantizer(BaseQuantizer):
+    """
+    Docstring for RotatedQuantizer
+
+    Wraps any quantizer with a HadamardRotation over the last dimension:
+
+    quantize(x)    = inner.quantize(rotate(x))
+    dequantize(qx) = unrotate(inner.dequantize(qx))
+
+    The codes and the inner quantizer's scale live in the rotated basis; only
+    dequantize() goes back. When the rotation is folded into the neighbouring
+    layers instead (see inwhale.ptq.folding.fold_rotation), quantize the
+    rotated weights directly with the inner quantizer.
+    """
+
+    def __init__(self, quantizer, rotation):
+        super().__init__(quantizer.bits)
+        self.quantizer = quantizer
+        self.rotation = rotation
+        self.qmin = quantizer.qmin
+        self.qmax = quantizer.qmax
+        self.integer_codes = quantizer.integer_codes
+
+    @property
+    def scale(self):
+        return self.quantizer.scale
+
+    # the parameters live on the inner quantizer
+    def _cache_state(self):
+        return self.quantizer._cache_state()
+
+    def _restore_cache_state(self, state):
+        self.quantizer._restore_cache_state(state)
+
+    def quantize(self, x):
+        return self.quantizer.quantize(self.rotation.rotate(x))
+
+    def dequantize(self, qx):
+        return self.rotation.unrotate(self.quantizer.dequantize(qx))
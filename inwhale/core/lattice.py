@@ -0,0 +1,164 @@
+import torch
+
+from .quantizer import BaseQuantizer
+
+
+def _index_dtype(num_bits):
+    # narrowest dtype whose non-negative range holds num_bits bits
+    for dtype, width in ((torch.uint8, 8), (torch.int16, 15), (torch.int32, 31)):
+        if num_bits <= width:
+            return dtype
+    return torch.int64
+
+
+def _round_other_way(x, rounded):
+    # Conway & Sloane's g(x): f(x) with the worst-rounded coordinate rounded
+    # the other way
+    err = x - rounded
+    worst = err.abs().argmax(dim=-1, keepdim=True)
+    step = 1.0 - 2.0 * (err.gather(-1, worst) < 0).to(x.dtype)
+    return rounded.scatter_add(-1, worst, step)
+
+
+def closest_dn(x):
+    """
+    Nearest point of D_n = {z in Z^n : sum(z) even} to every row of x [..., n].
+
+    f(x) = round(x) is the nearest integer vector. If its coordinate sum is
+    odd, the nearest D_n point is g(x): round the coordinate that was
+    furthest from an integer the other way (Conway & Sloane, 1982).
+    """
+    rounded = torch.round(x)
+    odd = torch.remainder(rounded.sum(dim=-1, keepdim=True), 2) != 0
+    return torch.where(odd, _round_other_way(x, rounded), rounded)
+
+
+def closest_e8(x):
+    """
+    Nearest point of E8 = D8 u (D8 + 1/2) to every row of x [..., 8].
+
+    Decode x against both cosets and keep whichever point is closer.
+    """
+    even = closest_dn(x)
+    odd = closest_dn(x - 0.5) + 0.5
+    closer = (x - even).pow(2).sum(-1, keepdim=True) <= (x - odd).pow(2).sum(
+        -1, keepdim=True
+    )
+    return torch.where(closer, even, odd)
+
+
+class LatticeQuantizer(BaseQuantizer):
+    """
+    Docstring for LatticeQuantizer
+
+    A scalar quantizer rounds every element on its own, so the cells of its
+    grid are cubes. Quantizing blocks of 4 or 8 elements to the nearest point
+    of the D4 or E8 lattice uses the densest packings in those dimensions:
+    their cells are rounder than cubes. E8 has exactly one point per unit
+    volume, like the integer grid, so at the same scale it gives a lower mean
+    squared error (normalized second moment 0.0717 against 0.0833). That
+    matters most at 2 bits per weight. D4 keeps every other integer point.
+
+    The last dimension is split into blocks of dim = 4 (D4) or 8 (E8), scaled
+    with the observer exactly like SymmetricUniformQuantizer
+
+    scale = max_abs / qmax,   y = clip(x / scale, qmin, qmax)
+
+    and every block is mapped to its nearest lattice point with the
+    Conway-Sloane decoders (closest_dn / closest_e8). Those are a handful of
+    rounds, argmaxes and wheres over the whole [blocks, dim] tensor at once.
+
+    Lattice points are then kept inside the cube [qmin, qmax]^dim. D4 points
+    are integer vectors; E8 points are k or k + 1/2 for an integer vector k.
+    One block is stored as one integer index
+
+    index = sum_i (k_i - qmin) << (bits * i)  |  half << (bits * dim)
+
+    i.e. bits per element plus, for E8, one coset bit per block. A 2-bit D4
+    block fits a uint8 and a 2-bit E8 block 17 bits (int32).
+
+    Near the faces of the cube the nearest lattice point can lie outside it.
+    For E8 each coset is clipped on its own (integer points to [qmin, qmax],
+    half-integer points to [qmin + 1/2, qmax - 1/2], so k stays storable)
+    and the closer of the two clipped points is kept. Clipping towards y
+    never moves a coordinate further from it, so every coordinate stays
+    within one grid unit of y. Clipping can break the even-sum rule, so a
+    few boundary blocks decode to a cube point rather than a lattice point.
+    """
+
+    LATTICES = {"d4": 4, "e8": 8}
+
+    def __init__(self, bits, observer, lattice="e8"):
+        if lattice not in self.LATTICES:
+            raise ValueError(f"Unknown lattice {lattice!r}, use 'd4' or 'e8'.")
+        if not 2 <= bits <= 7:
+            raise ValueError("LatticeQuantizer supports 2 to 7 bits per element.")
+        super().__init__(bits)
+
+        self.observer = observer
+        self.lattice = lattice
+        self.dim = self.LATTICES[lattice]
+        self.scale = None
+
+        self.qmin = -(1 << (bits - 1))
+        self.qmax = (1 << (bits - 1)) - 1
+
+        self.index_bits = bits * self.dim + (lattice == "e8")
+        self.dtype = _index_dtype(self.index_bits)
+
+    def _compute_scale(self):
+        min_val, max_val = self.observer.get_range()
+        max_abs = torch.maximum(min_val.abs(), max_val.abs())
+        self.scale = torch.clamp(max_abs / self.qmax, min=1e-8)
+
+    def _blocks(self, x):
+        if x.shape[-1] % self.dim != 0:
+            raise ValueError(
+                f"Last dimension ({x.shape[-1]}) must be divisible by "
+                f"the {self.lattice.upper()} block size ({self.dim})."
+            )
+        return x.reshape(*x.shape[:-1], -1, self.dim)
+
+    def quantize(self, x):
+        """
+        x [..., D] -> indices [..., D / dim]
+        """
+        self.observer.observe(x)
+        self._compute_scale()
+
+        y = torch.clamp(x.detach() / self.scale, self.qmin, self.qmax)
+        y = self._blocks(y.float())
+        if self.lattice == "e8":
+            # clip each coset into the cube on its own, then keep the closer
+            even = self.clamp(closest_dn(y))
+            odd = closest_dn(y - 0.5) + 0.5
+            odd = torch.clamp(odd, self.qmin + 0.5, self.qmax - 0.5)
+            closer = (y - even).pow(2).sum(-1, keepdim=True) <= (y - odd).pow(2).sum(
+                -1, keepdim=True
+            )
+            points = torch.where(closer, even, odd)
+        else:
+            points = self.clamp(closest_dn(y))
+
+        k = torch.floor(points).long() - self.qmin
+        shifts = torch.arange(self.dim, device=x.device) * self.bits
+        index = (k << shifts).sum(dim=-1)
+        if self.lattice == "e8":
+            half = (points[..., 0] != torch.floor(points[..., 0])).long()
+            index = index | (half << (self.bits * self.dim))
+        return index.to(self.dtype)
+
+    def decode(self, qx):
+        """
+        indices [..., D / dim] -> lattice points [..., D] in grid units
+        """
+        index = qx.long().unsqueeze(-1)
+        shifts = torch.arange(self.dim, device=qx.device) * self.bits
+        points = ((index >> shifts) & ((1 << self.bits) - 1)) + self.qmin
+        points = points.float()
+        if self.lattice == "e8":
+            points = points + 0.5 * ((index >> (self.bits * self.dim)) & 1)
+        return points.reshape(*qx.shape[:-1], -1)
+
+    def dequantize(self, qx):
+        return self.decode(qx) * self.scale
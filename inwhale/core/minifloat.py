@@ -0,0 +1,194 @@
+from collections import namedtuple
+
+import torch
+
+from ..rounding.nearest import NearestRounding
+from .quantizer import BaseQuantizer
+
+
+FloatFormat = namedtuple(
+    "FloatFormat", ["name", "exp_bits", "man_bits", "bias", "max_value", "dtype"]
+)
+FloatFormat.__doc__ = """
+A small sign / exponent / mantissa format.
+
+A normal value is (-1)^s * 1.m * 2^(e - bias) and a value with e = 0 is
+subnormal, (-1)^s * 0.m * 2^(1 - bias). max_value is the largest finite
+value; `dtype` names the native torch dtype, if the format has one.
+"""
+
+FORMATS = {
+    # OCP FP8: E4M3 has no infinities and a single NaN mantissa
+    "e4m3": FloatFormat("e4m3", 4, 3, 7, 448.0, "float8_e4m3fn"),
+    "e5m2": FloatFormat("e5m2", 5, 2, 15, 57344.0, "float8_e5m2"),
+    # OCP MX element formats, no infinities or NaNs at all
+    "e3m2": FloatFormat("e3m2", 3, 2, 3, 28.0, None),
+    "e2m3": FloatFormat("e2m3", 2, 3, 1, 7.5, None),
+    "e2m1": FloatFormat("e2m1", 2, 1, 1, 6.0, None),
+}
+
+
+def _emin(fmt):
+    # exponent of the smallest normal value
+    return 1 - fmt.bias
+
+
+def native_dtype(fmt):
+    """
+    The torch float8 dtype for fmt, or None on builds (or formats) without one.
+    """
+    return getattr(torch, fmt.dtype, None) if fmt.dtype else None
+
+
+def round_to_format(y, fmt, rounding):
+    """
+    Rounds y onto the grid of fmt with any RoundingStrategy.
+
+    Between 2^e and 2^(e+1) the format has 2^man_bits evenly spaced values,
+    step = 2^(e - man_bits); below the smallest normal the step stays at
+    2^(emin - man_bits) (subnormals). torch.frexp gives every element's e in
+    one pass, so the whole tensor is rounded as ordinary integers:
+
+    e = max(frexp(y).exponent - 1, emin)
+    q = ldexp(rounding.round(ldexp(y, man_bits - e)), e - man_bits)
+
+    then saturated to +-max_value. Rounding up to the next power of two just
+    lands on the first value of the next binade, which is representable.
+    """
+    _, exp = torch.frexp(y)
+    shift = torch.clamp(exp - 1, min=_emin(fmt)) - fmt.man_bits
+    q = torch.ldexp(rounding.round(torch.ldexp(y, -shift)), shift)
+    return torch.clamp(q, -fmt.max_value, fmt.max_value)
+
+
+def encode(q, fmt):
+    """
+    Bit pattern of values already on fmt's grid: sign | exponent | mantissa,
+    right-aligned in a uint8.
+    """
+    a = q.abs()
+    _, exp = torch.frexp(a)
+    normal = a >= 2.0 ** _emin(fmt)
+
+    e = torch.where(normal, exp - 1, torch.full_like(exp, _emin(fmt)))
+    significand = torch.ldexp(a, fmt.man_bits - e)  # 1.m or 0.m, times 2^M
+    mantissa = significand.to(torch.int32) - (normal.to(torch.int32) << fmt.man_bits)
+    biased = torch.where(normal, e + fmt.bias, torch.zeros_like(e))
+
+    sign = torch.signbit(q).to(torch.int32) << (fmt.exp_bits + fmt.man_bits)
+    return (sign | (biased << fmt.man_bits) | mantissa).to(torch.uint8)
+
+
+def round_and_encode(y, fmt, rounding):
+    """
+    encode(round_to_format(y, fmt, rounding), fmt) with a single frexp.
+
+    The significand is rounded as an integer m at the step of y's binade.
+    If rounding carried it up to 2^(man_bits + 1) the value moved to the next
+    binade: m is halved (exactly) and e bumped, so the bits come straight from
+    (e, m) without looking at the rounded value's exponent again. Saturating
+    y first is equivalent to saturating afterwards, since +-max_value is on
+    the grid and every RoundingStrategy rounds to a neighbouring grid value.
+    Powers of two are applied as multiplies by exp2(), not per-element ldexp.
+    """
+    y = torch.clamp(y, -fmt.max_value, fmt.max_value)
+    _, exp = torch.frexp(y)
+    e = torch.clamp(exp - 1, min=_emin(fmt))
+    m = rounding.round(y * torch.exp2((fmt.man_bits - e).float())).abs()
+
+    carry = m >= 2 ** (fmt.man_bits + 1)
+    m = torch.where(carry, m * 0.5, m)
+    e = e + carry.to(e.dtype)
+
+    normal = m >= 2**fmt.man_bits
+    mantissa = m.to(torch.int32) - (normal.to(torch.int32) << fmt.man_bits)
+    biased = torch.where(normal, e + fmt.bias, torch.zeros_like(e))
+
+    sign = torch.signbit(y).to(torch.int32) << (fmt.exp_bits + fmt.man_bits)
+    return (sign | (biased << fmt.man_bits) | mantissa).to(torch.uint8)
+
+
+def decode(codes, fmt):
+    """
+    uint8 bit patterns of fmt -> float32 values.
+    """
+    codes = codes.to(torch.int32)
+    mantissa = codes & ((1 << fmt.man_bits) - 1)
+    biased = (codes >> fmt.man_bits) & ((1 << fmt.exp_bits) - 1)
+    negative = ((codes >> (fmt.exp_bits + fmt.man_bits)) & 1).bool()
+
+    normal = biased > 0
+    significand = mantissa + (normal.to(torch.int32) << fmt.man_bits)
+    e = torch.where(normal, biased - fmt.bias, torch.full_like(biased, _emin(fmt)))
+    value = significand.float() * torch.exp2((e - fmt.man_bits).float())
+    return torch.where(negative, -value, value)
+
+
+class FP8Quantizer(BaseQuantizer):
+    """
+    Docstring for FP8Quantizer
+
+    Integer grids are evenly spaced, so small values get the same absolute
+    step as large ones. A floating point grid keeps the RELATIVE step
+    constant instead: 2^man_bits values per power of two.
+
+    E4M3: 4 exponent bits, 3 mantissa bits, max 448     (weights, activations)
+    E5M2: 5 exponent bits, 2 mantissa bits, max 57344   (gradients)
+
+    The observer's range is mapped onto the format's largest value, like the
+    uniform quantizers map it onto qmax:
+
+    scale = max_abs / max_value,    codes = fp8(x / scale),    x' = codes * scale
+
+    so a PerChannelMinMaxObserver gives one scale per channel.
+
+    Codes are the raw FP8 bit patterns, one uint8 per element. With nearest
+    rounding (the default) and a torch build that has torch.float8_e4m3fn /
+    float8_e5m2, quantize() is a single native cast. Otherwise, or with any
+    other RoundingStrategy (floor, stochastic, ...), round_and_encode() rounds
+    the significands as integers and assembles the bits, all plain tensor
+    ops. Both paths produce identical codes for nearest rounding.
+    """
+
+    def __init__(self, observer, rounding=None, fmt="e4m3", native=None):
+        if fmt not in ("e4m3", "e5m2"):
+            raise ValueError(f"Unknown FP8 format {fmt!r}, use 'e4m3' or 'e5m2'.")
+        super().__init__(8)
+
+        self.observer = observer
+        self.rounding = rounding if rounding is not None else NearestRounding()
+        self.format = FORMATS[fmt]
+        self.scale = None
+
+        self.qmin = -self.format.max_value
+        self.qmax = self.format.max_value
+
+        dtype = native_dtype(self.format)
+        if native is None:
+            native = type(self.rounding) is NearestRounding
+        self.dtype = dtype if native else None
+
+    def _compute_scale(self):
+        min_val, max_val = self.observer.get_range()
+        max_abs = torch.maximum(min_val.abs(), max_val.abs())
+        self.scale = torch.clamp(max_abs / self.format.max_value, min=1e-8)
+
+    def quantize(self, x):
+        self.observer.observe(x)
+        self._compute_scale()
+
+        y = self.clamp(x.detach().float() / self.scale)
+        if self.dtype is not None:
+            return y.to(self.dtype).view(torch.uint8)
+        return round_and_encode(y, self.format, self.rounding)
+
+    def decode(self, qx):
+        """
+        codes -> values on the FP8 grid, before scaling
+        """
+        if self.dtype is not None:
+            return qx.view(self.dtype).float()
+        return decode(qx, self.format)
+
+    def dequantize(self, qx):
+        return self.decode(qx) * self.scale
@@ -0,0 +1,128 @@
+import torch
+
+from ..rounding.nearest import NearestRounding
+from .minifloat import FORMATS, decode, round_and_encode
+from .non_uniform import power_of_two_exponent
+from .packing import pack_int4, pack_int6, unpack_int4, unpack_int6
+from .quantizer import BaseQuantizer
+
+
+# element format, and the exponent of its largest normal value
+MX_FORMATS = {
+    "mxfp8_e4m3": (FORMATS["e4m3"], 8),
+    "mxfp8_e5m2": (FORMATS["e5m2"], 15),
+    "mxfp6_e3m2": (FORMATS["e3m2"], 4),
+    "mxfp6_e2m3": (FORMATS["e2m3"], 2),
+    "mxfp4": (FORMATS["e2m1"], 2),
+    # two's complement with an implicit 2^-6: values in [-2, 2 - 2^-6]
+    "mxint8": (None, 0),
+}
+
+SCALE_BIAS = 127  # E8M0 shared scale, 2^(code - 127)
+
+
+class MXQuantizer(BaseQuantizer):
+    """
+    Docstring for MXQuantizer (OCP microscaling formats)
+
+    One scale per tensor is set by the tensor's largest value; one scale per
+    block of 32 consecutive elements is set by the block's largest value, so
+    an outlier only costs its own 31 neighbours. MX keeps that per-block scale
+    cheap by making it a bare power of two, 8 bits (E8M0) per 32 elements:
+
+    k      = floor(log2(max_abs(block))) - emax_elem      (power_of_two_exponent)
+    codes  = element_format(block / 2^k)
+    x'     = decode(codes) * 2^k
+
+    emax_elem is the exponent of the element format's largest normal value,
+    so the block maximum lands in the element format's top binade. The
+    elements are FP8 (E4M3 / E5M2), FP6 (E3M2 / E2M3), FP4 (E2M1), or INT8
+    with an implicit 2^-6.
+
+    All blocks are handled at once: one amax and one frexp over [blocks, 1]
+    give every shared exponent. Dividing by 2^k is exact, and is done as one
+    multiply by exp2(-k), [blocks, 1], broadcast over the block; the element
+    format then needs just one more frexp (round_and_encode).
+    Element codes are packed densely, two FP4 codes per byte, four FP6 codes
+    per three bytes, so quantize() returns [..., blocks, bytes per block]
+    and the E8M0 exponents are kept in `shared_exponent`, [..., blocks, 1].
+    """
+
+    cache_params = ("shared_exponent",)
+
+    def __init__(self, fmt="mxfp8_e4m3", rounding=None, block_size=32):
+        if fmt not in MX_FORMATS:
+            raise ValueError(
+                f"Unknown MX format {fmt!r}, use one of {sorted(MX_FORMATS)}."
+            )
+        self.element, self.emax = MX_FORMATS[fmt]
+        if self.element is None:
+            bits = 8
+        else:
+            bits = 1 + self.element.exp_bits + self.element.man_bits
+        super().__init__(bits)
+
+        self.format = fmt
+        self.rounding = rounding if rounding is not None else NearestRounding()
+        self.block_size = block_size
+        self.shared_exponent = None
+
+        if self.element is None:
+            self.qmin, self.qmax = -128, 127
+        else:
+            self.qmin, self.qmax = -self.element.max_value, self.element.max_value
+
+    def _blocks(self, x):
+        if x.shape[-1] % self.block_size != 0:
+            raise ValueError(
+                f"Last dimension ({x.shape[-1]}) must be divisible by "
+                f"block_size ({self.block_size})."
+            )
+        return x.reshape(*x.shape[:-1], -1, self.block_size)
+
+    def _pack(self, codes):
+        if self.bits == 4:
+            return pack_int4(codes)
+        if self.bits == 6:
+            return pack_int6(codes)
+        return codes
+
+    def _unpack(self, packed):
+        if self.bits == 4:
+            return unpack_int4(packed)
+        if self.bits == 6:
+            return unpack_int6(packed)
+        return packed
+
+    def quantize(self, x):
+        """
+        x [..., D] -> packed codes [..., D / block_size, bytes per block]
+        """
+        blocks = self._blocks(x.detach().float())
+        max_abs = blocks.abs().amax(dim=-1, keepdim=True)
+
+        k = power_of_two_exponent(max_abs, -SCALE_BIAS, SCALE_BIAS) - self.emax
+        k = torch.clamp(k, -SCALE_BIAS, SCALE_BIAS)
+        self.shared_exponent = (k + SCALE_BIAS).to(torch.uint8)
+
+        y = blocks * torch.exp2(-k.float())
+        if self.element is None:
+            codes = self.clamp(self.rounding.round(y * 64))
+            codes = codes.to(torch.int8).view(torch.uint8)
+        else:
+            codes = round_and_encode(y, self.element, self.rounding)
+        return self._pack(codes)
+
+    def decode(self, qx):
+        """
+        packed codes -> element values [..., blocks, block_size], before the
+        shared scale
+        """
+        codes = self._unpack(qx)
+        if self.element is None:
+            return codes.view(torch.int8).float() / 64
+        return decode(codes, self.element)
+
+    def dequantize(self, qx):
+        scale = torch.exp2(self.shared_exponent.float() - SCALE_BIAS)
+        return (self.decode(qx) * scale).flatten(-2)
@@ -1,9 +1,30 @@
-import torch
-
 from .quantizer import BaseQuantizer
+from ..backend import get_backend
+
+
+def power_of_two_exponent(max_abs, emin, emax, rounding=None):
+    """
+    The exponent k of the power of two 2^k that stands for max_abs, clipped
+    to [emin, emax].
+
+    With a rounding strategy, k = round(log2(max_abs)), the nearest power of
+    two (LogarithmicQuantizer). Without one, k = floor(log2(max_abs)) read
+    exactly off the float's exponent field: frexp(m) = f * 2^e with f in
+    [0.5, 1), so floor(log2(m)) = e - 1 (the shared scale of MX formats).
+    """
+    xp = get_backend(max_abs)
+
+    if rounding is None:
+        _, exp = xp.frexp(max_abs)
+        k = exp - 1
+    else:
+        k = rounding.round(xp.log2(xp.clip(max_abs, 1e-8)))
+    return xp.clip(k, emin, emax)
 
 
 class LogarithmicQuantizer(BaseQuantizer):
+    cache_params = ("exp_max", "exp_min")
+
     def __init__(self, bits, observer, rounding):
         super().__init__(bits)
         self.observer = observer
@@ -14,30 +35,31 @@ class LogarithmicQuantizer(BaseQuantizer):
 
     def _compute_scale(self):
         min_val, max_val = self.observer.get_range()
+        xp = get_backend(max_val)
 
-        max_abs = torch.max(min_val.abs(), max_val.abs())
-        max_abs = torch.clamp(max_abs, min=1e-8)
-
-        max_exp = torch.log2(max_abs)
-        self.exp_max = torch.clamp(self.rounding.round(max_exp), self.emin, self.emax)
+        max_abs = xp.maximum(xp.abs(min_val), xp.abs(max_val))
+        self.exp_max = power_of_two_exponent(
+            max_abs, self.emin, self.emax, self.rounding
+        )
 
         self.exp_min = self.emin
 
     def quantize(self, x):
+        xp = get_backend(x)
         self.observer.observe(x)
         self._compute_scale()
 
-        qx = torch.zeros_like(x)
+        qx = xp.zeros_like(x)
         non_zero = x != 0  # (x != 0).float()
 
-        sign_x = torch.sign(x[non_zero])
-        abs_x = x[non_zero].abs()
+        sign_x = xp.sign(x[non_zero])
+        abs_x = xp.abs(x[non_zero])
 
-        log_x = torch.log2(abs_x)
+        log_x = xp.log2(abs_x)
         k = self.rounding.round(log_x)
-        k = torch.clamp(k, self.exp_min, self.exp_max)
+        k = xp.clip(k, self.exp_min, self.exp_max)
 
-        qx[non_zero] = sign_x * torch.pow(2.0, k)
+        qx[non_zero] = sign_x * xp.pow(2.0, k)
 
         return qx
 
@@ -0,0 +1,87 @@
+import torch
+
+_BIT_WEIGHTS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def pack_bits(mask):
+    """
+    Packs a boolean tensor into uint8, 8 elements per byte (little-endian bit order).
+
+    mask.numel() = n  ->  ceil(n / 8) bytes, 32x smaller than float32 and 8x
+    smaller than torch.bool, which already spends a whole byte per element.
+    """
+    flat = mask.flatten().to(torch.uint8)
+    pad = (-flat.numel()) % 8
+    if pad:
+        flat = torch.cat([flat, flat.new_zeros(pad)])
+
+    weights = torch.tensor(_BIT_WEIGHTS, dtype=torch.uint8, device=flat.device)
+    return (flat.view(-1, 8) * weights).sum(dim=1, dtype=torch.uint8)
+
+
+def unpack_bits(packed, numel):
+    """
+    Inverse of pack_bits: the first `numel` bits as a flat boolean tensor.
+    """
+    shifts = torch.arange(8, dtype=torch.uint8, device=packed.device)
+    bits = (packed.unsqueeze(1) >> shifts) & 1
+    return bits.flatten()[:numel].bool()
+
+
+def pack_int4(codes):
+    """
+    Packs unsigned 4-bit codes (values 0..15) two per byte along the last dim.
+
+    byte = codes[..., 2i] | (codes[..., 2i + 1] << 4)
+
+    The last dim must be even.
+    """
+    if codes.shape[-1] % 2 != 0:
+        raise ValueError("pack_int4 needs an even last dimension.")
+    codes = codes.to(torch.uint8)
+    return codes[..., 0::2] | (codes[..., 1::2] << 4)
+
+
+def unpack_int4(packed):
+    """
+    Inverse of pack_int4, returns uint8 codes with a last dim twice as long.
+    """
+    low = packed & 0x0F
+    high = packed >> 4
+    return torch.stack([low, high], dim=-1).flatten(-2)
+
+
+def pack_int6(codes):
+    """
+    Packs unsigned 6-bit codes (values 0..63) four per three bytes along the
+    last dim, little-endian:
+
+    bits = c0 | c1 << 6 | c2 << 12 | c3 << 18   ->   3 bytes
+
+    The last dim must be a multiple of 4.
+    """
+    if codes.shape[-1] % 4 != 0:
+        raise ValueError("pack_int6 needs a last dimension divisible by 4.")
+    codes = codes.to(torch.uint8)
+    c0, c1, c2, c3 = (codes[..., i::4] for i in range(4))
+    packed = torch.stack(
+        [c0 | (c1 << 6), (c1 >> 2) | (c2 << 4), (c2 >> 4) | (c3 << 2)], dim=-1
+    )
+    return packed.flatten(-2)
+
+
+def unpack_int6(packed):
+    """
+    Inverse of pack_int6, returns uint8 codes with a last dim 4/3 as long.
+    """
+    b0, b1, b2 = (packed[..., i::3] for i in range(3))
+    codes = torch.stack(
+        [
+            b0 & 0x3F,
+            (b0 >> 6) | ((b1 & 0x0F) << 2),
+            (b1 >> 4) | ((b2 & 0x03) << 4),
+            b2 >> 2,
+        ],
+        dim=-1,
+    )
+    return codes.flatten(-2)
@@ -0,0 +1,236 @@
+import torch
+
+from .quantizer import BaseQuantizer
+from .vector import VectorQuantizer, squared_distances
+
+
+class ProductQuantizer(BaseQuantizer):
+    """
+    Docstring for ProductQuantizer (PQ)
+
+    A single VectorQuantizer over D-dimensional vectors would need an enormous
+    codebook to be accurate. PQ splits every vector into M sub-vectors of
+    D / M values and quantizes each subspace with its own small codebook:
+
+    x = [x_1 | x_2 | ... | x_M]  ->  codes = [q_1(x_1), ..., q_M(x_M)]
+
+    With 2^bits codewords per subspace that is M * bits bits per vector, and
+    effectively (2^bits)^M reconstructions.
+
+    Search never has to decode. For a query y, the squared distance splits
+    over the subspaces:
+
+    ||y - x'||^2 = sum_m ||y_m - c_m[code_m]||^2
+
+    so we compute one table per query, T[m, k] = ||y_m - c_m[k]||^2 (or the
+    inner product y_m . c_m[k]), M * 2^bits numbers, and the distance to every
+    database vector is M table lookups summed (asymmetric distance
+    computation, ADC). scores() does that with one gather over chunks of the
+    database; search() keeps a running top-k.
+    """
+
+    cache_params = ()
+
+    def __init__(
+        self,
+        num_subspaces,
+        bits=8,
+        iterations=50,
+        batch_size=4096,
+        sample_size=None,
+        chunk_size=65536,
+        num_threads=1,
+        seed=None,
+    ):
+        super().__init__(bits)
+        self.num_subspaces = num_subspaces
+        self.num_codes = 1 << bits
+        self.chunk_size = chunk_size
+        self.quantizers = [
+            VectorQuantizer(
+                bits,
+                dim=1,  # set by fit
+                iterations=iterations,
+                batch_size=batch_size,
+                sample_size=sample_size,
+                chunk_size=chunk_size,
+                num_threads=num_threads,
+                seed=None if seed is None else seed + m,
+            )
+            for m in range(num_subspaces)
+        ]
+        self.dim = None
+
+    @property
+    def codebooks(self):
+        """
+        [M, 2^bits, D / M]
+        """
+        return torch.stack([q.codebook for q in self.quantizers])
+
+    def _split(self, x):
+        x = x.detach().reshape(-1, x.shape[-1]).float()
+        if x.shape[1] % self.num_subspaces != 0:
+            raise ValueError(
+                f"Vector size ({x.shape[1]}) must be divisible by "
+                f"num_subspaces ({self.num_subspaces})."
+            )
+        if self.dim is not None and x.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of size {self.dim}.")
+        return x.chunk(self.num_subspaces, dim=1)
+
+    def fit(self, x):
+        parts = self._split(x)
+        self.dim = x.shape[-1]
+        for q, part in zip(self.quantizers, parts):
+            q.dim = part.shape[1]
+            q.fit(part)
+        return self
+
+    def quantize(self, x):
+        """
+        x [..., D] -> codes [..., M]
+        """
+        if self.dim is None:
+            self.fit(x)
+        parts = self._split(x)
+        codes = torch.cat([q.quantize(p) for q, p in zip(self.quantizers, parts)], 1)
+        return codes.reshape(*x.shape[:-1], self.num_subspaces)
+
+    def dequantize(self, qx):
+        codes = qx.reshape(-1, self.num_subspaces)
+        parts = [
+            q.dequantize(codes[:, m : m + 1]) for m, q in enumerate(self.quantizers)
+        ]
+        return torch.cat(parts, dim=1).reshape(*qx.shape[:-1], self.dim)
+
+    def _prepare_queries(self, queries):
+        return queries.reshape(-1, self.dim).float()
+
+    def distance_tables(self, queries, metric="l2"):
+        """
+        Per-query lookup tables, [Q, M, 2^bits].
+
+        metric="l2": T[q, m, k] = ||y_m - c_m[k]||^2
+        metric="ip": T[q, m, k] = y_m . c_m[k]
+        """
+        queries = self._prepare_queries(queries)
+        parts = queries.chunk(self.num_subspaces, dim=1)
+        tables = []
+        for q, part in zip(self.quantizers, parts):
+            if metric == "l2":
+                tables.append(squared_distances(part, q.codebook))
+            elif metric == "ip":
+                tables.append(part @ q.codebook.t())
+            else:
+                raise ValueError(f"Unknown metric {metric!r}, use 'l2' or 'ip'.")
+        return torch.stack(tables, dim=1)
+
+    def _chunk_scores(self, flat_tables, codes, offsets):
+        # [Q, M * K] gathered at one [C] column of codes per subspace and
+        # accumulated, so only [Q, C] blocks exist (never [Q, C, M])
+        index = codes.long() + offsets
+        out = flat_tables[:, index[:, 0]]
+        for m in range(1, self.num_subspaces):
+            out += flat_tables[:, index[:, m]]
+        return out
+
+    def scores(self, queries, codes, metric="l2"):
+        """
+        ADC score of every (query, database vector) pair, [Q, N], without
+        decoding the database. L2 scores are squared distances (lower is closer),
+        "ip" scores are inner products (higher is closer).
+        """
+        tables = self.distance_tables(queries, metric)
+        flat_tables = tables.reshape(tables.shape[0], -1)
+        offsets = torch.arange(self.num_subspaces, device=codes.device) * self.num_codes
+        codes = codes.reshape(-1, self.num_subspaces)
+
+        return torch.cat(
+            [
+                self._chunk_scores(flat_tables, codes[s : s + self.chunk_size], offsets)
+                for s in range(0, codes.shape[0], self.chunk_size)
+            ],
+            dim=1,
+        )
+
+    def search(self, queries, codes, k, metric="l2"):
+        """
+        The k best database entries per query, chunk by chunk, so only a
+        [Q, chunk_size] block of scores exists at once.
+        returns (scores [Q, k], indices [Q, k])
+        """
+        tables = self.distance_tables(queries, metric)
+        flat_tables = tables.reshape(tables.shape[0], -1)
+        offsets = torch.arange(self.num_subspaces, device=codes.device) * self.num_codes
+        codes = codes.reshape(-1, self.num_subspaces)
+        largest = metric == "ip"
+
+        best_scores = best_index = None
+        for start in range(0, codes.shape[0], self.chunk_size):
+            chunk = self._chunk_scores(
+                flat_tables, codes[start : start + self.chunk_size], offsets
+            )
+            index = torch.arange(start, start + chunk.shape[1], device=codes.device)
+            index = index.expand(chunk.shape[0], -1)
+            if best_scores is not None:
+                chunk = torch.cat([best_scores, chunk], dim=1)
+                index = torch.cat([best_index, index], dim=1)
+
+            top = chunk.topk(min(k, chunk.shape[1]), dim=1, largest=largest)
+            best_scores = top.values
+            best_index = index.gather(1, top.indices)
+        return best_scores, best_index
+
+
+class OptimizedProductQuantizer(ProductQuantizer):
+    """
+    Docstring for OptimizedProductQuantizer (OPQ)
+
+    PQ quantizes each subspace independently, so it works best when the
+    subspaces are uncorrelated and carry similar variance. OPQ first rotates
+    the data with a learned orthogonal matrix R, then runs PQ on x R.
+
+    R is found by alternating (non-parametric OPQ):
+
+    1. fit PQ on x R, reconstruct Y = dequantize(quantize(x R))
+    2. the rotation that best maps x onto Y is the orthogonal Procrustes
+       solution: U S V^T = svd(x^T Y),  R = U V^T
+
+    Rotations preserve distances and inner products, so queries are simply
+    rotated by the same R before building the lookup tables.
+    """
+
+    def __init__(self, num_subspaces, bits=8, opq_iterations=10, **kwargs):
+        super().__init__(num_subspaces, bits, **kwargs)
+        self.opq_iterations = opq_iterations
+        self.rotation = None
+
+    def fit(self, x):
+        x = x.detach().reshape(-1, x.shape[-1]).float()
+        rotation = torch.eye(x.shape[1], device=x.device)
+
+        for _ in range(self.opq_iterations):
+            self.dim = None
+            rotated = x @ rotation
+            super().fit(rotated)
+            target = super().dequantize(super().quantize(rotated))
+
+            u, _, vh = torch.linalg.svd(x.t() @ target)
+            rotation = u @ vh
+
+        self.dim = None
+        super().fit(x @ rotation)
+        self.rotation = rotation
+        return self
+
+    def quantize(self, x):
+        if self.rotation is None:
+            self.fit(x)
+        return super().quantize(x.detach().float() @ self.rotation)
+
+    def dequantize(self, qx):
+        return super().dequantize(qx) @ self.rotation.t()
+
+    def _prepare_queries(self, queries):
+        return super()._prepare_queries(queries) @ self.rotation
@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
 
+from ..backend import get_backend
+from ..cache import cache_methods
+from ..profiling import instrument_methods
+
 
 class BaseQuantizer(ABC):
     """
@@ -24,6 +28,47 @@ class BaseQuantizer(ABC):
         ) - 1  # hardware friendly way to determine the max value given the bits-value
         # say its 8 bits, its (1 << 8) - 1 = 256 - 1 = 255
 
+    # opt-in ParamCache (see inwhale/cache.py), and what a cache hit restores.
+    # Only these parameters come back: a hit skips observe(), so the observer
+    # keeps whatever it saw last and its get_range() may describe another
+    # tensor. Read the quantizer's parameters, not its observer, after a hit.
+    cache = None
+    cache_params = ("scale", "zero_point")
+    # codes are integers in [qmin, qmax], so a cache can store them as
+    # int8/uint8 without scanning them
+    integer_codes = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cache_methods(cls, ("quantize",))
+        instrument_methods(
+            cls,
+            {
+                "quantize": "quantize",
+                "dequantize": "dequantize",
+                "_compute_scale": "compute_scale",
+                "_compute_params": "compute_scale",
+                "clamp": "clamp",
+            },
+        )
+
+    def _cache_state(self):
+        return {
+            name: getattr(self, name)
+            for name in self.cache_params
+            if hasattr(self, name)
+        }
+
+    def _restore_cache_state(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def clamp(self, qx):
+        """
+        Saturates codes to the representable range [qmin, qmax].
+        """
+        return get_backend(qx).clip(qx, self.qmin, self.qmax)
+
     @classmethod
     @abstractmethod
     def quantize(self, x):
@@ -33,3 +78,7 @@ class BaseQuantizer(ABC):
     @abstractmethod
     def dequantize(self, x):
         pass
+
+
+# defined here rather than in a subclass, so __init_subclass__ never sees it
+instrument_methods(BaseQuantizer, {"clamp": "clamp"})
@@ -0,0 +1,175 @@
+import torch
+
+from .quantizer import BaseQuantizer
+from .vector import VectorQuantizer, squared_distances
+
+
+def _storage_dtype(codes):
+    # narrowest dtype that holds the codes exactly
+    if not codes.is_floating_point():
+        return codes.dtype
+    if codes.numel() and bool(torch.all(codes == torch.round(codes))):
+        lo, hi = float(codes.min()), float(codes.max())
+        for dtype in (torch.uint8, torch.int8, torch.int16):
+            info = torch.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return dtype
+    return codes.dtype
+
+
+class ResidualCodes:
+    """
+    The codes of all stages in ONE uint8 buffer.
+
+    Every stage's codes are stored in the narrowest dtype that holds them
+    exactly (uint8 for 8-bit uniform or codebook codes, raw float bytes for
+    e.g. logarithmic codes) at an offset aligned to that dtype, so reading a
+    stage back is a view of the buffer, not a copy.
+    """
+
+    def __init__(self, stage_codes):
+        chunks, self.layout = [], []
+        offset = 0
+        for codes in stage_codes:
+            stored = _storage_dtype(codes)
+            raw = codes.detach().to(stored).contiguous().flatten().view(torch.uint8)
+
+            itemsize = torch.empty((), dtype=stored).element_size()
+            pad = (-offset) % itemsize
+            if pad:
+                chunks.append(torch.zeros(pad, dtype=torch.uint8, device=raw.device))
+                offset += pad
+
+            self.layout.append((offset, tuple(codes.shape), codes.dtype, stored))
+            chunks.append(raw)
+            offset += raw.numel()
+
+        self.buffer = torch.cat(chunks) if chunks else torch.zeros(0, dtype=torch.uint8)
+
+    def __len__(self):
+        return len(self.layout)
+
+    def __getitem__(self, stage):
+        offset, shape, dtype, stored = self.layout[stage]
+        numel = 1
+        for d in shape:
+            numel *= d
+        nbytes = numel * torch.empty((), dtype=stored).element_size()
+        codes = self.buffer[offset : offset + nbytes].view(stored).reshape(shape)
+        return codes.to(dtype)
+
+    @property
+    def nbytes(self):
+        return self.buffer.numel()
+
+
+class ResidualQuantizer(BaseQuantizer):
+    """
+    Docstring for ResidualQuantizer
+
+    One quantizer leaves an error, r_1 = x - x'_1. Quantizing that error with a
+    second quantizer, and its error with a third, and so on
+
+    r_0 = x
+    c_s = stage_s.quantize(r_{s-1}),   r_s = r_{s-1} - stage_s.dequantize(c_s)
+    x'  = sum_s stage_s.dequantize(c_s)
+
+    buys precision a few bits at a time, with any mix of existing quantizers
+    (uniform, LogarithmicQuantizer, VectorQuantizer, ...). Each stage's
+    observer sees the residual it has to quantize, and a VectorQuantizer
+    stage learns its codebook on that residual the first time through.
+
+    Each stage encodes the whole tensor in one vectorized call, and decoding
+    is one dequantize (a gather for codebook stages) per stage, summed. The
+    codes of all stages share one buffer (ResidualCodes).
+
+    Greedy stage-by-stage encoding is not optimal when the stages are
+    codebooks: a slightly worse first codeword can leave a residual the next
+    codebook fits much better. With beam_width > 1 and VectorQuantizer stages
+    of equal dim, quantize() keeps the beam_width best partial code paths per
+    vector, expanding all of them against the next codebook in one batched
+    distance computation ([vectors, beam, K]), which approaches additive
+    quantization's joint encoding.
+    """
+
+    cache_params = ()
+
+    def __init__(self, stages, beam_width=1, chunk_size=16384):
+        if not stages:
+            raise ValueError("ResidualQuantizer needs at least one stage.")
+        super().__init__(sum(stage.bits for stage in stages))
+        self.stages = list(stages)
+        self.beam_width = beam_width
+        self.chunk_size = chunk_size
+
+    def _greedy(self, x):
+        codes = []
+        residual = x
+        for stage in self.stages:
+            c = stage.quantize(residual)
+            residual = residual - stage.dequantize(c)
+            codes.append(c)
+        return codes
+
+    def _beam(self, x):
+        dim = getattr(self.stages[0], "dim", None)
+        if not all(
+            isinstance(s, VectorQuantizer) and s.dim == dim for s in self.stages
+        ):
+            raise ValueError("Beam search needs VectorQuantizer stages of equal dim.")
+        if any(s.codebook is None for s in self.stages):
+            # learn the codebooks on greedy residuals first
+            self._greedy(x)
+
+        vectors = x.detach().reshape(-1, dim).float()
+        paths = torch.empty(
+            vectors.shape[0], len(self.stages), dtype=torch.long, device=x.device
+        )
+        for start in range(0, vectors.shape[0], self.chunk_size):
+            residual = vectors[start : start + self.chunk_size].unsqueeze(1)
+            chunk_paths = residual.new_empty(residual.shape[0], 1, 0, dtype=torch.long)
+
+            for stage in self.stages:
+                codebook = stage.codebook
+                n, beam, _ = residual.shape
+                k = codebook.shape[0]
+
+                # ||r - c||^2 for every (vector, beam entry, codeword)
+                dist = squared_distances(residual.reshape(-1, dim), codebook)
+                top = dist.reshape(n, beam * k).topk(
+                    min(self.beam_width, beam * k), dim=1, largest=False
+                )
+                parent, code = top.indices // k, top.indices % k
+
+                residual = residual.gather(
+                    1, parent.unsqueeze(-1).expand(-1, -1, dim)
+                ) - codebook[code]
+                chunk_paths = torch.cat(
+                    [
+                        chunk_paths.gather(
+                            1, parent.unsqueeze(-1).expand(-1, -1, chunk_paths.shape[2])
+                        ),
+                        code.unsqueeze(-1),
+                    ],
+                    dim=2,
+                )
+
+            # topk sorts ascending, entry 0 has the smallest final residual
+            paths[start : start + self.chunk_size] = chunk_paths[:, 0]
+
+        shape = (*x.shape[:-1], -1)
+        return [
+            paths[:, s].to(stage.dtype).reshape(shape)
+            for s, stage in enumerate(self.stages)
+        ]
+
+    def quantize(self, x):
+        if self.beam_width > 1:
+            return ResidualCodes(self._beam(x))
+        return ResidualCodes(self._greedy(x))
+
+    def dequantize(self, qx):
+        out = self.stages[0].dequantize(qx[0])
+        for s in range(1, len(self.stages)):
+            out = out + self.stages[s].dequantize(qx[s])
+        return out
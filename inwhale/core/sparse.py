@@ -0,0 +1,119 @@
+"""
+Sparse (bitmap + values) storage for codes that are mostly zero.
+
+DeadZoneSymmetricQuantizer zeroes every |x| < threshold, and on pruned weights
+or with a large threshold_ratio most of its codes are 0. A dense float tensor
+spends 4 bytes on every one of them. SparseCodes keeps
+
+bitmap  1 bit per element, set where the code is non-zero (pack_bits)
+values  the non-zero codes in row-major order, int8 for bits <= 8
+
+so n codes with nnz non-zeros take n / 8 + nnz bytes instead of 4 * n.
+
+Everything after that only touches the nnz stored values: dequantization
+computes them and scatters them into zeros, and sparse_mm builds a CSR matrix
+straight from them for a sparse x dense matmul.
+
+torch is imported on first use, so inwhale.core.uniform can still be imported
+without it.
+"""
+
+
+class SparseCodes:
+    def __init__(self, shape, bitmap, values, dtype):
+        self.shape = tuple(shape)
+        self.bitmap = bitmap
+        self.values = values
+        self.dtype = dtype
+
+    @classmethod
+    def from_dense(cls, codes, bits):
+        import torch
+
+        from .packing import pack_bits
+
+        nonzero = codes != 0
+        values = codes[nonzero].to(torch.int8 if bits <= 8 else torch.int32)
+        return cls(codes.shape, pack_bits(nonzero), values, codes.dtype)
+
+    @property
+    def numel(self):
+        n = 1
+        for d in self.shape:
+            n *= d
+        return n
+
+    @property
+    def nnz(self):
+        return self.values.numel()
+
+    @property
+    def sparsity(self):
+        return 1.0 - self.nnz / max(self.numel, 1)
+
+    @property
+    def nbytes(self):
+        return (
+            self.bitmap.numel() * self.bitmap.element_size()
+            + self.values.numel() * self.values.element_size()
+        )
+
+    def coordinates(self):
+        """
+        Coordinates of the non-zeros, one index tensor per dimension.
+        """
+        import torch
+
+        from .packing import unpack_bits
+
+        flat = unpack_bits(self.bitmap, self.numel).nonzero().squeeze(1)
+        return torch.unravel_index(flat, self.shape)
+
+    def to_dense(self):
+        import torch
+
+        codes = torch.zeros(self.shape, dtype=self.dtype, device=self.values.device)
+        codes[self.coordinates()] = self.values.to(self.dtype)
+        return codes
+
+
+def _nonzero_values(codes, scale, threshold, coords):
+    # DeadZone dequantization, sign(q) * (|q| * scale + threshold), for q != 0
+    q = codes.values.float()
+    if scale.dim():
+        scale = scale.expand(codes.shape)[coords]
+        threshold = threshold.expand(codes.shape)[coords]
+    return q.sign() * (q.abs() * scale + threshold)
+
+
+def sparse_dequantize(codes, scale, threshold):
+    """
+    Dense dequantized tensor, computing only the nnz non-zero entries.
+    """
+    import torch
+
+    coords = codes.coordinates()
+    dx = torch.zeros(codes.shape, dtype=scale.dtype, device=codes.values.device)
+    dx[coords] = _nonzero_values(codes, scale, threshold, coords).to(dx.dtype)
+    return dx
+
+
+def sparse_mm(codes, scale, threshold, dense):
+    """
+    dequantize(codes) @ dense, without materializing the dense weight.
+
+    codes: SparseCodes of a 2-D [out, in] tensor, dense: [in, n] -> [out, n]
+    """
+    import torch
+
+    if len(codes.shape) != 2:
+        raise ValueError("sparse_mm needs 2-D codes.")
+    coords = codes.coordinates()
+    values = _nonzero_values(codes, scale, threshold, coords).to(dense.dtype)
+
+    # coordinates come out row-major, which is exactly CSR order
+    rows = torch.bincount(coords[0], minlength=codes.shape[0])
+    crow = torch.zeros(codes.shape[0] + 1, dtype=torch.int64, device=dense.device)
+    crow[1:] = torch.cumsum(rows, 0)
+    weight = torch.sparse_csr_tensor(crow, coords[1], values, size=codes.shape)
+    return weight @ dense
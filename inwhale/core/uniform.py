@@ -1,5 +1,6 @@
-import torch
 from .quantizer import BaseQuantizer
+from ..backend import get_backend, is_torch
+from .sparse import SparseCodes, sparse_dequantize, sparse_mm
 
 
 class SymmetricUniformQuantizer(BaseQuantizer):
@@ -36,6 +37,8 @@ class SymmetricUniformQuantizer(BaseQuantizer):
     There can be multiple strategies for rounding, and they can affect accumulated wrror, training stability, bias towards zero, etc.
     """
 
+    integer_codes = True
+
     def __init__(self, bits, observer, rounding):
         super().__init__(bits)
 
@@ -48,20 +51,22 @@ class SymmetricUniformQuantizer(BaseQuantizer):
 
     def _compute_scale(self):
         min_val, max_val = self.observer.get_range()
+        xp = get_backend(max_val)
 
-        max_abs = torch.max(min_val.abs(), max_val.abs())
+        max_abs = xp.maximum(xp.abs(min_val), xp.abs(max_val))
 
         self.scale = max_abs / self.qmax
-        self.scale = torch.clamp(self.scale, min=1e-8)
+        self.scale = xp.clip(self.scale, 1e-8)
 
     def quantize(self, x):
+        xp = get_backend(x)
         self.observer.observe(x)
 
         if self.bits == 1:
             min_val, max_val = self.observer.get_range()
-            max_abs = torch.max(min_val.abs(), max_val.abs())
-            self.scale = torch.clamp(max_abs, min=1e-8)
-            qx = torch.sign(x)
+            max_abs = xp.maximum(xp.abs(min_val), xp.abs(max_val))
+            self.scale = xp.clip(max_abs, 1e-8)
+            qx = xp.sign(x)
             qx[qx == 0] = 1
             return qx
 
@@ -69,7 +74,7 @@ class SymmetricUniformQuantizer(BaseQuantizer):
 
         qx = x / self.scale
         qx = self.rounding.round(qx)
-        qx = torch.clamp(qx, self.qmin, self.qmax)
+        qx = self.clamp(qx)
         return qx
 
     def dequantize(self, qx):
@@ -127,6 +132,8 @@ class AsymmetricUniformQuantizer(BaseQuantizer):
     from here, we can see that symmetric quantization is just a special case of asymmetric quantization where the ruler is already centered.
     """
 
+    integer_codes = True
+
     def __init__(self, bits, observer, rounding, signed=False):
         super().__init__(bits)
 
@@ -144,27 +151,37 @@ class AsymmetricUniformQuantizer(BaseQuantizer):
 
     def _compute_params(self):
         min_val, max_val = self.observer.get_range()
+        xp = get_backend(max_val)
 
-        if max_val == min_val:
+        if xp.all(max_val == min_val):
             self.scale = 1.0
             self.zero_point = self.qmin
             return
 
         self.scale = (max_val - min_val) / (self.qmax - self.qmin)
-        self.scale = torch.clamp(self.scale, min=1e-8)
+        self.scale = xp.clip(self.scale, 1e-8)
 
         zero_point_real = self.qmin - min_val / self.scale
-        self.zero_point = torch.clamp(
+        self.zero_point = xp.clip(
             self.rounding.round(zero_point_real), self.qmin, self.qmax
         )
 
+        # with per-channel ranges a few channels can still be constant,
+        # give those the same scale=1, zero_point=qmin treatment as above
+        constant = max_val == min_val
+        if xp.any(constant):
+            self.scale = xp.where(constant, xp.ones_like(self.scale), self.scale)
+            self.zero_point = xp.where(
+                constant, xp.full_like(self.zero_point, self.qmin), self.zero_point
+            )
+
     def quantize(self, x):
         self.observer.observe(x)
         self._compute_params()
 
         qx = x / self.scale + self.zero_point
         qx = self.rounding.round(qx)
-        qx = torch.clamp(qx, self.qmin, self.qmax)
+        qx = self.clamp(qx)
         return qx
 
     def dequantize(self, qx):
@@ -172,8 +189,37 @@ class AsymmetricUniformQuantizer(BaseQuantizer):
 
 
 class DeadZoneSymmetricQuantizer(BaseQuantizer):
-    def __init__(self, bits, observer, rounding, threshold_ratio=0.5):
+    """
+    Docstring for DeadZoneSymmetricQuantizer
+
+    Everything with |x| < threshold becomes 0, the rest is shifted by the
+    threshold and quantized symmetrically:
+
+    q  = sign(x) * round((|x| - threshold) / scale)
+    x' = sign(q) * (|q| * scale + threshold)
+
+    With a large threshold_ratio (or pruned weights) most codes are 0. With
+    sparse=True, quantize() returns SparseCodes (bitmap + int8 non-zeros, see
+    core/sparse.py) whenever at least `min_sparsity` of the codes are 0 (torch
+    tensors only). dequantize() and matmul() accept both forms, and on
+    SparseCodes only the non-zeros are decoded.
+    """
+
+    cache_params = ("scale", "threshold")
+    integer_codes = True
+
+    def __init__(
+        self,
+        bits,
+        observer,
+        rounding,
+        threshold_ratio=0.5,
+        sparse=False,
+        min_sparsity=0.5,
+    ):
         super().__init__(bits)
+        self.sparse = sparse
+        self.min_sparsity = min_sparsity
 
         self.observer = observer
         self.rounding = rounding
@@ -186,57 +232,82 @@ class DeadZoneSymmetricQuantizer(BaseQuantizer):
 
     def _compute_params(self):
         min_val, max_val = self.observer.get_range()
+        xp = get_backend(max_val)
 
-        if max_val == min_val:
-            if isinstance(max_val, torch.Tensor):
-                self.scale = torch.ones_like(max_val)
-            else:
-                self.scale = torch.tensor(1.0)
+        if xp.all(max_val == min_val):
+            self.scale = xp.ones_like(max_val)
             self.threshold = self.threshold_ratio * self.scale
             return
 
-        max_abs = torch.max(min_val.abs(), max_val.abs())
+        max_abs = xp.maximum(xp.abs(min_val), xp.abs(max_val))
 
         self.scale = max_abs / self.qmax
-        self.scale = torch.clamp(self.scale, min=1e-8)
+        self.scale = xp.clip(self.scale, 1e-8)
+
+        # with per-channel ranges a few channels can still be constant,
+        # give those the same scale=1 treatment as above
+        constant = max_val == min_val
+        if xp.any(constant):
+            self.scale = xp.where(constant, xp.ones_like(self.scale), self.scale)
 
         self.threshold = self.threshold_ratio * self.scale
 
     def quantize(self, x):
+        xp = get_backend(x)
         self.observer.observe(x)
 
         if self.bits == 1:
             min_val, max_val = self.observer.get_range()
-            max_abs = torch.max(min_val.abs(), max_val.abs())
-            self.scale = torch.clamp(max_abs, min=1e-8)
+            max_abs = xp.maximum(xp.abs(min_val), xp.abs(max_val))
+            self.scale = xp.clip(max_abs, 1e-8)
             self.threshold = self.threshold_ratio * self.scale
 
-            qx = torch.sign(x)
-            qx[qx.abs() < self.threshold] = 0
-            return qx
+            qx = xp.sign(x)
+            qx[xp.abs(qx) < self.threshold] = 0
+            return self._maybe_sparse(qx)
 
         self._compute_params()
 
-        mask = x.abs() < self.threshold
+        mask = xp.abs(x) < self.threshold
 
-        sign = torch.sign(x)
-        abs_x = x.abs()
+        sign = xp.sign(x)
+        abs_x = xp.abs(x)
 
         # we shift by threshold, then quantize
         qx = sign * self.rounding.round((abs_x - self.threshold) / self.scale)
 
-        qx = torch.where(mask, torch.zeros_like(qx), qx)
-        qx = torch.clamp(qx, self.qmin, self.qmax)
+        qx = xp.where(mask, xp.zeros_like(qx), qx)
+        qx = self.clamp(qx)
 
-        return qx
+        return self._maybe_sparse(qx)
+
+    def _maybe_sparse(self, qx):
+        if not self.sparse or not is_torch(qx) or qx.numel() == 0:
+            return qx
+        zeros = int((qx == 0).sum())
+        if zeros < self.min_sparsity * qx.numel():
+            return qx
+        return SparseCodes.from_dense(qx, self.bits)
+
+    def matmul(self, qx, dense):
+        """
+        dequantize(qx) @ dense, as a sparse x dense matmul for SparseCodes.
+        """
+        if isinstance(qx, SparseCodes):
+            return sparse_mm(qx, self.scale, self.threshold, dense)
+        return self.dequantize(qx) @ dense
 
     def dequantize(self, qx):
-        sign = torch.sign(qx)
-        abs_qx = qx.abs()
+        if isinstance(qx, SparseCodes):
+            return sparse_dequantize(qx, self.scale, self.threshold)
+
+        xp = get_backend(qx)
+        sign = xp.sign(qx)
+        abs_qx = xp.abs(qx)
 
         dx = sign * (
             abs_qx * self.scale
-            + torch.where(qx != 0, self.threshold, torch.zeros_like(self.threshold))
+            + xp.where(qx != 0, self.threshold, xp.zeros_like(self.threshold))
         )
 
         return dx
@@ -258,6 +329,9 @@ class MidTreadUniformQuantizer(BaseQuantizer):
     max : maximum value of input range
     scale : quantization step size
     """
+
+    integer_codes = True
+
     def __init__(self, bits, observer, rounding): # initialize mid-tread quantizer
         super().__init__(bits)
         self.observer = observer
@@ -269,8 +343,9 @@ class MidTreadUniformQuantizer(BaseQuantizer):
 
     def _compute_scale(self):
         min_val, max_val = self.observer.get_range()
-        max_abs = torch.max(min_val.abs(), max_val.abs())
-        self.scale = torch.clamp(max_abs / self.qmax, min=1e-8)
+        xp = get_backend(max_val)
+        max_abs = xp.maximum(xp.abs(min_val), xp.abs(max_val))
+        self.scale = xp.clip(max_abs / self.qmax, 1e-8)
     
     def quantize(self, x):
         """
@@ -283,7 +358,7 @@ class MidTreadUniformQuantizer(BaseQuantizer):
 
         qx = x / self.scale
         qx = self.rounding.round(qx)
-        qx = torch.clamp(qx, self.qmin, self.qmax)
+        qx = self.clamp(qx)
         return qx
     
     def dequantize(self, qx):
@@ -303,6 +378,8 @@ class MidRiseUniformQuantizer(BaseQuantizer):
     x' = q*scale
     """
 
+    integer_codes = True
+
     def __init__(self, bits, observer, rounding):
         super().__init__(bits)
         self.observer = observer
@@ -314,8 +391,9 @@ class MidRiseUniformQuantizer(BaseQuantizer):
 
     def _compute_scale(self):
         min_val, max_val = self.observer.get_range()
-        max_abs = torch.max(min_val.abs(), max_val.abs())
-        self.scale = torch.clamp(max_abs / self.qmax, min=1e-8)
+        xp = get_backend(max_val)
+        max_abs = xp.maximum(xp.abs(min_val), xp.abs(max_val))
+        self.scale = xp.clip(max_abs / self.qmax, 1e-8)
 
     def quantize(self, x):
         self.observer.observe(x)
@@ -323,7 +401,7 @@ class MidRiseUniformQuantizer(BaseQuantizer):
 
         qx = x / self.scale - 0.5
         qx = self.rounding.round(qx)
-        qx = torch.clamp(qx, self.qmin, self.qmax)
+        qx = self.clamp(qx)
         return qx
     
     def dequantize(self, qx):
@@ -0,0 +1,194 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from .quantizer import BaseQuantizer
+
+
+def code_dtype(num_codes):
+    """
+    Smallest unsigned dtype that can index `num_codes` codewords.
+    """
+    if num_codes <= 1 << 8:
+        return torch.uint8
+    if num_codes <= 1 << 16:
+        return torch.uint16
+    raise ValueError("At most 2^16 codewords are supported.")
+
+
+def squared_distances(x, centers, center_norms=None):
+    """
+    ||x - c||^2 for every pair, [n, d] x [k, d] -> [n, k], as
+
+    ||x||^2 - 2 x.c + ||c||^2
+
+    so the heavy part is one matmul instead of an [n, k, d] difference tensor.
+    """
+    if center_norms is None:
+        center_norms = (centers * centers).sum(dim=1)
+    x_norms = (x * x).sum(dim=1, keepdim=True)
+    return (x_norms - 2.0 * (x @ centers.t()) + center_norms).clamp(min=0)
+
+
+def nearest(x, centers, chunk_size=65536, num_threads=1):
+    """
+    Index of the nearest center for every row of x, [n] int64.
+
+    Only a [chunk_size, k] block of distances exists at any time, so memory
+    stays bounded for any n. ||x||^2 is the same for every center of a row, so
+    the argmin only needs ||c||^2 - 2 x.c. With num_threads > 1 the chunks are
+    spread over a thread pool (torch releases the GIL inside the matmul).
+    """
+    center_norms = (centers * centers).sum(dim=1)
+    out = torch.empty(x.shape[0], dtype=torch.long, device=x.device)
+
+    def assign(start):
+        chunk = x[start : start + chunk_size]
+        scores = center_norms - 2.0 * (chunk @ centers.t())
+        out[start : start + chunk_size] = scores.argmin(dim=1)
+
+    starts = range(0, x.shape[0], chunk_size)
+    if num_threads > 1 and len(starts) > 1:
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            list(pool.map(assign, starts))
+    else:
+        for start in starts:
+            assign(start)
+    return out
+
+
+def kmeans_plus_plus(x, k, generator=None):
+    """
+    k-means++ seeding: each new center is drawn with probability proportional
+    to its squared distance from the centers chosen so far.
+    """
+    n = x.shape[0]
+    first = torch.randint(n, (1,), generator=generator, device=x.device)
+    centers = [x[first]]
+    closest = squared_distances(x, centers[0]).squeeze(1)
+
+    for _ in range(1, k):
+        total = closest.sum()
+        if total <= 0:
+            # fewer distinct points than centers, duplicates are harmless
+            index = torch.randint(n, (1,), generator=generator, device=x.device)
+        else:
+            index = torch.multinomial(closest / total, 1, generator=generator)
+        centers.append(x[index])
+        closest = torch.minimum(closest, squared_distances(x, x[index]).squeeze(1))
+    return torch.cat(centers)
+
+
+class VectorQuantizer(BaseQuantizer):
+    """
+    Docstring for VectorQuantizer
+
+    Scalar quantizers round every value on its own. A vector quantizer rounds
+    `dim` values at once to the nearest of 2^bits codewords (the codebook):
+
+    x.shape = [..., D]  ->  vectors [N, dim] with N = numel / dim
+    code[i] = argmin_j ||v_i - c_j||^2
+    x'      = codebook[code]
+
+    so it spends bits / dim bits per value and captures correlations between
+    neighbouring values that a scalar quantizer cannot.
+
+    The codebook is learned with k-means, made to scale to tens of millions of
+    vectors:
+
+    1. k-means++ seeding on a random sample of `sample_size` vectors
+    2. mini-batch k-means: each of `iterations` steps draws `batch_size`
+       vectors, assigns them, and moves every center to the running mean of
+       all vectors it has been assigned so far
+
+       c_j <- (n_j * c_j + sum of new vectors) / (n_j + new count)
+
+    3. assignment of all vectors in chunks of `chunk_size` (see nearest), so the
+       [N, K] distance matrix is never built.
+
+    Like an observer, the codebook is learned on the first quantize() (or by
+    calling fit) and reused afterwards. Codes are uint8 for bits <= 8, uint16
+    up to 16 bits.
+    """
+
+    cache_params = ("codebook",)
+
+    def __init__(
+        self,
+        bits,
+        dim,
+        iterations=100,
+        batch_size=4096,
+        sample_size=None,
+        chunk_size=65536,
+        num_threads=1,
+        seed=None,
+    ):
+        super().__init__(bits)
+        self.dim = dim
+        self.num_codes = 1 << bits
+        self.dtype = code_dtype(self.num_codes)
+
+        self.iterations = iterations
+        self.batch_size = batch_size
+        self.sample_size = sample_size or 64 * self.num_codes
+        self.chunk_size = chunk_size
+        self.num_threads = num_threads
+        self.generator = None
+        if seed is not None:
+            self.generator = torch.Generator()
+            self.generator.manual_seed(seed)
+
+        self.codebook = None
+
+    def _vectors(self, x):
+        if x.shape[-1] % self.dim != 0:
+            raise ValueError(
+                f"Last dimension ({x.shape[-1]}) must be divisible by dim ({self.dim})."
+            )
+        return x.detach().reshape(-1, self.dim).float()
+
+    def _sample(self, vectors, size):
+        n = vectors.shape[0]
+        if size >= n:
+            return vectors
+        index = torch.randint(n, (size,), generator=self.generator)
+        return vectors[index.to(vectors.device)]
+
+    def fit(self, x):
+        vectors = self._vectors(x)
+        if vectors.shape[0] == 0:
+            raise ValueError("Cannot fit a codebook on an empty tensor.")
+
+        sample = self._sample(vectors, self.sample_size)
+        centers = kmeans_plus_plus(sample, self.num_codes, self.generator)
+        counts = torch.zeros(self.num_codes, device=vectors.device)
+
+        for _ in range(self.iterations):
+            batch = self._sample(vectors, self.batch_size)
+            assigned = nearest(batch, centers, self.chunk_size)
+
+            batch_counts = torch.bincount(assigned, minlength=self.num_codes).float()
+            sums = torch.zeros_like(centers).index_add_(0, assigned, batch)
+
+            total = counts + batch_counts
+            moved = batch_counts > 0
+            centers[moved] = (
+                centers[moved] * counts[moved, None] + sums[moved]
+            ) / total[moved, None]
+            counts = total
+
+        self.codebook = centers
+        return self
+
+    def quantize(self, x):
+        if self.codebook is None:
+            self.fit(x)
+
+        vectors = self._vectors(x).to(self.codebook.device)
+        codes = nearest(vectors, self.codebook, self.chunk_size, self.num_threads)
+        return codes.to(self.dtype).reshape(*x.shape[:-1], -1)
+
+    def dequantize(self, qx):
+        vectors = self.codebook[qx.long()]
+        return vectors.reshape(*qx.shape[:-1], -1)
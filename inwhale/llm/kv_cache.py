@@ -0,0 +1,230 @@
+import math
+
+import torch
+
+from ..core.packing import pack_int4, unpack_int4
+from ..ptq.dynamic import quantize_per_token
+from ..rounding.nearest import NearestRounding
+
+
+class PagedKVCache:
+    """
+    Docstring for PagedKVCache
+
+    During generation every layer keeps the keys and values of all past tokens.
+    For long contexts this KV cache, not the weights, fills the memory.
+
+    Two ideas make it smaller and easier to manage:
+
+    1. Quantization. Each new key/value vector is split into groups of
+       `group_size` channels, and every (token, head, group) gets its own
+       symmetric scale, the SymmetricUniformQuantizer math done by
+       quantize_per_token:
+
+       scale = max|group| / qmax,   codes = clamp(round(x / scale), qmin, qmax)
+
+       int8 codes take 1 byte per element, int4 codes are offset to 0..15 and
+       packed two per byte. Because the scales are per token, appending a token
+       never touches (or re-quantizes) the tokens already stored.
+
+    2. Paging. Memory is preallocated as a pool of fixed-size pages of
+       `page_size` tokens:
+
+       codes  [num_pages, page_size, num_heads, head_dim (or head_dim / 2)]
+       scales [num_pages, page_size, num_heads, head_dim / group_size]
+
+       Each sequence owns a list of page indices (its block table), and takes
+       a free page whenever its last one is full. Sequences of any length share
+       one pool without fragmentation or copying.
+
+    read() and attention() gather only the pages of the requested sequence and
+    dequantize just those.
+    """
+
+    def __init__(
+        self,
+        num_pages,
+        page_size,
+        num_heads,
+        head_dim,
+        bits=8,
+        group_size=None,
+        rounding=None,
+        scale_dtype=torch.float16,
+        device=None,
+    ):
+        if bits not in (4, 8):
+            raise ValueError(f"bits must be 4 or 8, got {bits}.")
+        group_size = group_size or head_dim
+        if head_dim % group_size != 0:
+            raise ValueError("head_dim must be divisible by group_size.")
+
+        self.num_pages = num_pages
+        self.page_size = page_size
+        self.num_heads = num_heads
+        self.head_dim = head_dim
+        self.bits = bits
+        self.group_size = group_size
+        self.rounding = rounding if rounding is not None else NearestRounding()
+
+        code_dim = head_dim if bits == 8 else head_dim // 2
+        code_dtype = torch.int8 if bits == 8 else torch.uint8
+        groups = head_dim // group_size
+
+        pool = (num_pages, page_size, num_heads)
+        self.key_codes = torch.zeros(
+            *pool, code_dim, dtype=code_dtype, device=device
+        )
+        self.value_codes = torch.zeros_like(self.key_codes)
+        self.key_scales = torch.zeros(
+            *pool, groups, dtype=scale_dtype, device=device
+        )
+        self.value_scales = torch.zeros_like(self.key_scales)
+
+        self.free_pages = list(range(num_pages - 1, -1, -1))
+        self.block_tables = {}
+        self.lengths = {}
+
+    def add_sequence(self, seq_id):
+        if seq_id in self.block_tables:
+            raise ValueError(f"Sequence {seq_id!r} already exists.")
+        self.block_tables[seq_id] = []
+        self.lengths[seq_id] = 0
+
+    def free(self, seq_id):
+        """
+        Returns all pages of the sequence to the pool.
+        """
+        self.free_pages.extend(reversed(self.block_tables.pop(seq_id)))
+        del self.lengths[seq_id]
+
+    def length(self, seq_id):
+        return self.lengths[seq_id]
+
+    def _quantize(self, x):
+        """
+        x: [tokens, heads, head_dim] -> codes, scales [tokens, heads, groups]
+        """
+        tokens = x.shape[0]
+        groups = x.float().reshape(-1, self.group_size)
+        codes, scale = quantize_per_token(groups, self.bits, self.rounding)
+
+        codes = codes.reshape(tokens, self.num_heads, self.head_dim)
+        scale = scale.reshape(tokens, self.num_heads, -1)
+        if self.bits == 4:
+            codes = pack_int4(codes + 8)
+        return codes.to(self.key_codes.dtype), scale.to(self.key_scales.dtype)
+
+    def _dequantize(self, codes, scales):
+        """
+        codes [tokens, heads, code_dim], scales [tokens, heads, groups]
+        -> [tokens, heads, head_dim]
+        """
+        if self.bits == 4:
+            codes = unpack_int4(codes).float() - 8
+        else:
+            codes = codes.float()
+
+        shape = codes.shape
+        codes = codes.reshape(*shape[:-1], -1, self.group_size)
+        return (codes * scales.float().unsqueeze(-1)).reshape(shape)
+
+    def _slots(self, seq_id, count):
+        """
+        Page index and in-page slot for the next `count` tokens, taking new
+        pages as needed.
+        """
+        table = self.block_tables[seq_id]
+        start = self.lengths[seq_id]
+        needed = math.ceil((start + count) / self.page_size) - len(table)
+        if needed > len(self.free_pages):
+            raise RuntimeError("KV cache is out of pages.")
+        for _ in range(needed):
+            table.append(self.free_pages.pop())
+
+        positions = torch.arange(start, start + count, device=self.key_codes.device)
+        pages = torch.tensor(table, device=self.key_codes.device)
+        return pages[positions // self.page_size], positions % self.page_size
+
+    def _check(self, name, x):
+        expected = (self.num_heads, self.head_dim)
+        if x.dim() != 3 or (x.shape[0], x.shape[2]) != expected:
+            raise ValueError(
+                f"{name} must be [num_heads={self.num_heads}, new_tokens, "
+                f"head_dim={self.head_dim}], got {list(x.shape)}."
+            )
+
+    def append(self, seq_id, key, value):
+        """
+        key, value: [num_heads, new_tokens, head_dim]
+        Quantizes only the new tokens and writes them into the sequence's pages.
+
+        Shapes are checked and both tensors quantized before any page is
+        taken; if writing fails anyway, the pages taken for it go back to
+        the pool and the sequence is left as it was.
+        """
+        self._check("key", key)
+        self._check("value", value)
+        if key.shape != value.shape:
+            raise ValueError(
+                f"key and value shapes differ: {list(key.shape)} vs "
+                f"{list(value.shape)}."
+            )
+
+        count = key.shape[1]
+        key_codes, key_scales = self._quantize(key.transpose(0, 1))
+        value_codes, value_scales = self._quantize(value.transpose(0, 1))
+
+        table = self.block_tables[seq_id]
+        owned = len(table)
+        try:
+            pages, slots = self._slots(seq_id, count)
+            self.key_codes[pages, slots] = key_codes
+            self.key_scales[pages, slots] = key_scales
+            self.value_codes[pages, slots] = value_codes
+            self.value_scales[pages, slots] = value_scales
+        except BaseException:
+            self.free_pages.extend(reversed(table[owned:]))
+            del table[owned:]
+            raise
+
+        self.lengths[seq_id] += count
+
+    def read(self, seq_id):
+        """
+        Dequantized keys and values of one sequence, [num_heads, length, head_dim].
+        Only the sequence's own pages are touched.
+        """
+        length = self.lengths[seq_id]
+        pages = torch.tensor(self.block_tables[seq_id], device=self.key_codes.device)
+
+        def gather(codes, scales):
+            codes = codes[pages].flatten(0, 1)[:length]
+            scales = scales[pages].flatten(0, 1)[:length]
+            return self._dequantize(codes, scales).transpose(0, 1)
+
+        key = gather(self.key_codes, self.key_scales)
+        value = gather(self.value_codes, self.value_scales)
+        return key, value
+
+    def attention(self, seq_id, query, causal=False):
+        """
+        Reference scaled dot-product attention over the cached tokens.
+
+        query: [num_heads, q_tokens, head_dim], the LAST q_tokens positions of the
+        sequence when causal=True
+        returns [num_heads, q_tokens, head_dim]
+        """
+        key, value = self.read(seq_id)
+        key = key.to(query.dtype)
+        value = value.to(query.dtype)
+
+        scores = query @ key.transpose(-1, -2) / math.sqrt(self.head_dim)
+        if causal:
+            q_tokens, length = query.shape[1], key.shape[1]
+            q_pos = torch.arange(length - q_tokens, length, device=query.device)
+            k_pos = torch.arange(length, device=query.device)
+            mask = k_pos.unsqueeze(0) > q_pos.unsqueeze(1)
+            scores = scores.masked_fill(mask, float("-inf"))
+
+        return torch.softmax(scores, dim=-1) @ value
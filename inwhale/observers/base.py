@@ -1,7 +1,25 @@
 from abc import ABC, abstractmethod
 
+from ..cache import cache_methods
+from ..profiling import instrument_methods
+
 
 class Observer(ABC):
+    # opt-in ParamCache (see inwhale/cache.py)
+    cache = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cache_methods(cls, ("observe",))
+        instrument_methods(cls, {"observe": "observe", "get_range": "get_range"})
+
+    def _cache_state(self):
+        # attributes are replaced, never updated in place, so a shallow copy is a
+        # consistent snapshot
+        return {name: value for name, value in vars(self).items() if name != "cache"}
+
+    def _restore_cache_state(self, state):
+        vars(self).update(state)
 
     @abstractmethod
     def observe(self, x):
@@ -0,0 +1,140 @@
+from ..backend import get_backend
+from .base import Observer
+
+
+def kl_divergences(hist, num_quant_bins):
+    """
+    KL(P || Q) for EVERY candidate clipping bin count i in [num_quant_bins, len(hist)].
+
+    For one candidate i (TensorRT entropy calibration):
+
+    P = hist[:i], with everything above bin i (the clipped mass) added to P[i - 1]
+    Q = hist[:i] merged into num_quant_bins groups, then expanded back, each group's
+        mass spread evenly over its non-empty bins
+
+    Bin j of candidate i falls into group g = floor(j * num_quant_bins / i), so the
+    group boundaries are
+
+    start_g = ceil(g * i / num_quant_bins),   end_g = ceil((g + 1) * i / num_quant_bins)
+
+    With C = cumsum(hist), a group's mass is C[end_g] - C[start_g], and the same
+    trick on (hist > 0) counts its non-empty bins. That turns the usual Python loop
+    over thousands of candidates into a handful of [num_candidates, num_bins] ops.
+
+    returns (candidates [N], divergences [N])
+    """
+    xp = get_backend(hist)
+    hist = xp.float64(hist)
+    num_bins = xp.numel(hist)
+
+    candidates = xp.arange(num_quant_bins, num_bins + 1, like=hist)
+    i = candidates[:, None]  # [N, 1]
+    j = xp.arange(0, num_bins, like=hist)[None, :]  # [1, B]
+    valid = j < i
+
+    zero = xp.zeros((1,), like=hist)
+    mass = xp.concat([zero, xp.cumsum(hist)])
+    filled = xp.concat([zero, xp.cumsum(xp.float64(hist > 0))])
+
+    group = xp.floor_divide(j * num_quant_bins, i)
+    start = xp.floor_divide(group * i + num_quant_bins - 1, num_quant_bins)
+    end = xp.floor_divide((group + 1) * i + num_quant_bins - 1, num_quant_bins)
+    start = xp.clip(start, None, num_bins)
+    end = xp.clip(end, None, num_bins)
+
+    group_mass = mass[end] - mass[start]
+    group_filled = xp.clip(filled[end] - filled[start], 1)
+
+    in_range = hist[None, :] * valid
+    q = xp.where(in_range > 0, group_mass / group_filled, xp.zeros_like(in_range))
+
+    # the clipped mass goes into the last kept bin, P[i - 1]
+    rows = xp.arange(0, len(candidates), like=hist)
+    p = in_range
+    p[rows, candidates - 1] += mass[-1] - mass[candidates]
+
+    p = p / xp.clip(xp.sum(p, dim=1), 1e-12)[:, None]
+    q = q / xp.clip(xp.sum(q, dim=1), 1e-12)[:, None]
+
+    # a bin that only holds clipped mass has q == 0, smooth it instead of +inf;
+    # empty bins are masked BEFORE the log, so log(0) is never evaluated
+    ratio = p / xp.clip(q, 1e-12)
+    terms = p * xp.log(xp.where(p > 0, ratio, xp.ones_like(ratio)))
+
+    return candidates, xp.sum(terms, dim=1)
+
+
+class KLDivergenceObserver(Observer):
+    """
+    Docstring for KLDivergenceObserver (entropy calibration)
+
+    MinMaxObserver keeps the full range, so a single outlier can waste most levels.
+    PercentileObserver clips at a fixed quantile, whatever the distribution looks like.
+
+    The KL observer chooses the clipping threshold T that loses the least
+    INFORMATION: it compares the distribution of |x| before and after quantizing
+    the range [0, T] into 2^(bits - 1) levels, and picks the T where the two
+    histograms are closest in KL divergence.
+
+    1. observe() accumulates a histogram of |x| with `num_bins` fixed bins over
+       [0, abs_max]. If a later batch has a larger |x|, the existing histogram is
+       re-binned onto the wider range first.
+    2. get_range() evaluates KL divergence for every candidate bin count at once
+       (see kl_divergences) and returns (-T, T) with T = best_i * bin_width.
+
+    The symmetric range plugs into any quantizer through get_range().
+    """
+
+    def __init__(self, bits=8, num_bins=2048):
+        super().__init__()
+        if num_bins < (1 << (bits - 1)):
+            raise ValueError("num_bins must be at least 2^(bits - 1).")
+
+        self.bits = bits
+        self.num_bins = num_bins
+        self.hist = None
+        self.abs_max = None
+        self.threshold = None
+
+    def _rebin(self, new_max):
+        old_width = self.abs_max / self.num_bins
+        new_width = new_max / self.num_bins
+
+        xp = get_backend(self.hist)
+        bins = xp.arange(0, self.num_bins, like=self.hist)
+        centers = (bins + 0.5) * old_width
+        index = xp.int64(xp.floor(centers / new_width))
+        index = xp.clip(index, None, self.num_bins - 1)
+
+        self.hist = xp.index_add(xp.zeros_like(self.hist), index, self.hist)
+        self.abs_max = new_max
+
+    def observe(self, x):
+        xp = get_backend(x)
+        x = xp.float32(xp.abs(xp.detach(x).flatten()))
+        batch_max = max(float(x.max()), 1e-8)
+
+        if self.hist is None:
+            self.abs_max = batch_max
+            self.hist = xp.zeros((self.num_bins,), like=x)
+        elif batch_max > self.abs_max:
+            self._rebin(batch_max)
+
+        self.hist = self.hist + xp.histc(x, self.num_bins, 0.0, self.abs_max)
+        self.threshold = None
+
+    def _compute_threshold(self):
+        xp = get_backend(self.hist)
+        candidates, divergences = kl_divergences(self.hist, 1 << (self.bits - 1))
+        best = candidates[xp.argmin(divergences)]
+
+        bin_width = self.abs_max / self.num_bins
+        threshold = float(best) * bin_width
+        self.threshold = xp.tensor(threshold, like=self.hist)
+
+    def get_range(self):
+        if self.hist is None:
+            raise RuntimeError("No data observed yet.")
+        if self.threshold is None:
+            self._compute_threshold()
+        return -self.threshold, self.threshold
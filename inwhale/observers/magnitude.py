@@ -0,0 +1,59 @@
+from ..backend import get_backend
+from .base import Observer
+
+
+class ChannelMagnitudeObserver(Observer):
+    """
+    Docstring for ChannelMagnitudeObserver
+
+    Per-channel activation statistics, modeled on MinMaxObserver.
+
+    MinMaxObserver answers "what is the smallest and largest value I have ever seen?".
+    Activation-aware methods (AWQ, SmoothQuant) need a slightly different question,
+    asked separately for every input channel of a layer:
+
+    "how large are the activations flowing through this channel?"
+
+    The channel dimension is the last one by default (hidden dim of [batch, tokens, hidden]).
+    All other dimensions are flattened into rows, and we keep two running statistics:
+
+    abs_max[c]  = max |x[:, c]|          (used by SmoothQuant)
+    mean_abs[c] = sum |x[:, c]| / rows   (used by AWQ)
+
+    get_range() keeps the Observer contract and returns the symmetric per-channel
+    range (-abs_max, abs_max).
+    """
+
+    def __init__(self, channel_dim=-1):
+        super().__init__()
+        self.channel_dim = channel_dim
+        self.abs_max = None
+        self.abs_sum = None
+        self.count = 0
+
+    def observe(self, x):
+        xp = get_backend(x)
+        x = xp.moveaxis(xp.detach(x), self.channel_dim, -1)
+        abs_x = xp.float32(xp.abs(x.reshape(-1, x.shape[-1])))
+
+        batch_max = xp.amax(abs_x, dim=0)
+        batch_sum = xp.sum(abs_x, dim=0)
+
+        if self.abs_max is None:
+            self.abs_max = batch_max
+            self.abs_sum = batch_sum
+        else:
+            self.abs_max = xp.maximum(self.abs_max, batch_max)
+            self.abs_sum = self.abs_sum + batch_sum
+        self.count += abs_x.shape[0]
+
+    @property
+    def mean_abs(self):
+        if self.abs_sum is None:
+            raise RuntimeError("No data observed yet.")
+        return self.abs_sum / self.count
+
+    def get_range(self):
+        if self.abs_max is None:
+            raise RuntimeError("No data observed yet.")
+        return -self.abs_max, self.abs_max
@@ -1,5 +1,5 @@
-import torch
 from .base import Observer
+from ..backend import get_backend
 
 
 class MinMaxObserver(Observer):
@@ -16,8 +16,55 @@ class MinMaxObserver(Observer):
             self.min_val = min_x
             self.max_val = max_x
         else:
-            self.min_val = torch.min(self.min_val, min_x)
-            self.max_val = torch.max(self.max_val, max_x)
+            xp = get_backend(x)
+            self.min_val = xp.minimum(self.min_val, min_x)
+            self.max_val = xp.maximum(self.max_val, max_x)
+
+    def get_range(self):
+        if self.min_val is None:
+            raise RuntimeError("No data observed yet.")
+        return self.min_val, self.max_val
+
+
+class PerChannelMinMaxObserver(Observer):
+    """
+    Same idea as MinMaxObserver, but keeps one (min, max) pair per channel.
+
+    `dim` is the channel dimension. Every other dimension is reduced, and the
+    result keeps its singleton dimensions so it broadcasts straight back
+    against the input:
+
+    x.shape = [out, in], dim=0 -> min_val.shape = [out, 1]
+
+    which means the existing quantizers (scale = max_abs / qmax, etc.) become
+    per-channel quantizers without any change to their math.
+    """
+
+    def __init__(self, dim=0):
+        super().__init__()
+        self.dim = dim
+        self.min_val = None
+        self.max_val = None
+
+    def observe(self, x):
+        xp = get_backend(x)
+        x = xp.detach(x)
+        channel_dim = self.dim % x.ndim
+        dims = [d for d in range(x.ndim) if d != channel_dim]
+
+        if dims:
+            min_x = xp.amin(x, dim=dims, keepdim=True)
+            max_x = xp.amax(x, dim=dims, keepdim=True)
+        else:
+            min_x = x
+            max_x = x
+
+        if self.min_val is None or self.max_val is None:
+            self.min_val = min_x
+            self.max_val = max_x
+        else:
+            self.min_val = xp.minimum(self.min_val, min_x)
+            self.max_val = xp.maximum(self.max_val, max_x)
 
     def get_range(self):
         if self.min_val is None:
@@ -1,5 +1,5 @@
-import torch
 from .base import Observer
+from ..backend import get_backend
 
 
 class MSEObserver(Observer):
@@ -11,18 +11,19 @@ class MSEObserver(Observer):
         self.max_val = None
 
     def observe(self, x):
-        x = x.detach().flatten()
+        xp = get_backend(x)
+        x = xp.detach(x).flatten()
 
         qmax = 2 ** (self.bits - 1) - 1
-        abs_max = x.abs().max()
+        abs_max = xp.abs(x).max()
 
         if abs_max == 0:
-            self.min_val = torch.tensor(0.0, device=x.device)
-            self.max_val = torch.tensor(1e-6, device=x.device)
+            self.min_val = xp.tensor(0.0, like=x)
+            self.max_val = xp.tensor(1e-6, like=x)
             return
 
-        candidate_maxes = torch.linspace(
-            0.1 * abs_max, abs_max, self.num_candidates, device=x.device
+        candidate_maxes = xp.linspace(
+            0.1 * abs_max, abs_max, self.num_candidates, like=x
         )
 
         best_mse = float("inf")
@@ -34,10 +35,10 @@ class MSEObserver(Observer):
 
             scale = clip_max / qmax
 
-            x_q = torch.clamp(torch.round(x / scale), -qmax, qmax)
+            x_q = xp.clip(xp.round(x / scale), -qmax, qmax)
             x_dq = x_q * scale
 
-            mse = torch.mean((x - x_dq) ** 2)
+            mse = xp.mean((x - x_dq) ** 2)
 
             if mse < best_mse:
                 best_mse = mse
@@ -0,0 +1,367 @@
+"""
+Instrumentation hooks for quantizers, observers and rounding strategies.
+
+Every subclass of BaseQuantizer, Observer and RoundingStrategy has its stage
+methods (quantize, dequantize, _compute_scale/_compute_params, clamp, observe,
+get_range, round) wrapped by `instrument` when the class is defined.
+
+While no hook is registered the wrappers are not even installed: every
+class keeps its plain methods, so profiling costs nothing when it is off.
+Registering the first hook swaps the wrappers in, removing the last one
+swaps the plain methods back. (A bound method fetched before that, e.g.
+f = q.quantize, keeps whichever version it was fetched as.) Hooks are
+process-wide; the stack of running quantizer names is per thread.
+
+When hooks are registered, each stage call is reported to every hook:
+
+token = hook.start(stage, name, obj, args)
+result = <the real call>
+hook.stop(token, result)
+
+`name` groups the calls: it is `obj.name` if the object has one, otherwise
+the name of the quantizer currently running (so a quantizer's observer and
+rounding calls are counted under it), otherwise the class name.
+
+Profiler is the built-in hook, use it as a context manager:
+
+q.name = "layer1.weight"
+with Profiler(record_sqnr=True) as prof:
+    q.quantize(w)
+print(prof.to_json())
+"""
+
+import functools
+import json
+import math
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from .backend import get_backend, is_torch
+
+_hooks = ()
+_local = threading.local()
+
+# cls -> {attr: (plain method, instrumented method)}
+_stages = weakref.WeakKeyDictionary()
+
+
+def _install(instrumented):
+    for cls, methods in list(_stages.items()):
+        for attr, (func, wrapper) in methods.items():
+            setattr(cls, attr, wrapper if instrumented else func)
+
+
+def _names():
+    names = getattr(_local, "names", None)
+    if names is None:
+        names = _local.names = []
+    return names
+
+
+class HookHandle:
+    def __init__(self, hook):
+        self.hook = hook
+
+    def remove(self):
+        global _hooks
+        _hooks = tuple(h for h in _hooks if h is not self.hook)
+        if not _hooks:
+            _install(False)
+
+
+def register_hook(hook):
+    """
+    Registers a hook (an object with start() and stop(), see module docstring).
+    returns a handle whose remove() unregisters it
+    """
+    global _hooks
+    if not _hooks:
+        _install(True)
+    _hooks = _hooks + (hook,)
+    return HookHandle(hook)
+
+
+@contextmanager
+def suspended():
+    """
+    Temporarily disables all hooks, e.g. for extra work done BY a hook.
+    """
+    global _hooks
+    saved = _hooks
+    _hooks = ()
+    try:
+        yield
+    finally:
+        _hooks = saved
+
+
+def _name_of(obj):
+    name = getattr(obj, "name", None)
+    if name is not None:
+        return name
+    names = _names()
+    if names:
+        return names[-1]
+    return type(obj).__name__
+
+
+def _run(stage, func, obj, args, kwargs):
+    hooks = _hooks
+    name = _name_of(obj)
+    names = _names()
+
+    names.append(name)
+    tokens = [hook.start(stage, name, obj, args) for hook in hooks]
+    result = None
+    try:
+        result = func(obj, *args, **kwargs)
+        return result
+    finally:
+        names.pop()
+        for hook, token in zip(hooks, tokens):
+            hook.stop(token, result)
+
+
+def instrument(stage, func):
+    """
+    Wraps a stage method so registered hooks see it.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not _hooks:
+            return func(self, *args, **kwargs)
+        return _run(stage, func, self, args, kwargs)
+
+    return wrapper
+
+
+def instrument_methods(cls, stages):
+    """
+    Registers the methods named in `stages` ({method name: stage}) that `cls`
+    itself defines; their wrappers are installed while any hook is registered.
+    Called from __init_subclass__ of the instrumented base classes.
+    """
+    methods = _stages.setdefault(cls, {})
+    for attr, stage in stages.items():
+        func = cls.__dict__.get(attr)
+        if not callable(func) or attr in methods:
+            continue
+        methods[attr] = (func, instrument(stage, func))
+        if _hooks:
+            setattr(cls, attr, methods[attr][1])
+
+
+def _is_tensor(x):
+    # torch tensors and NumPy arrays
+    return hasattr(x, "shape") and hasattr(x, "dtype")
+
+
+def _nbytes(x):
+    if is_torch(x):
+        return x.numel() * x.element_size()
+    return x.nbytes
+
+
+def _synchronize(x):
+    if is_torch(x) and x.device.type == "cuda":
+        import torch
+
+        torch.cuda.synchronize(x.device)
+
+
+def sqnr(x, dx):
+    """
+    Signal-to-quantization-noise ratio in dB: 10 * log10(sum x^2 / sum (x - dx)^2)
+    """
+    xp = get_backend(x)
+    x, dx = xp.float64(x), xp.float64(dx)
+    signal = float((x**2).sum())
+    noise = float(((x - dx) ** 2).sum())
+    if noise == 0.0:
+        return math.inf
+    if signal == 0.0:
+        return -math.inf
+    return 10.0 * math.log10(signal / noise)
+
+
+class StageStats:
+    __slots__ = (
+        "calls",
+        "total_time",
+        "min_time",
+        "max_time",
+        "bytes_in",
+        "bytes_out",
+        "clipped",
+        "elements",
+        "sqnr_sum",
+        "sqnr_count",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.min_time = math.inf
+        self.max_time = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.clipped = 0
+        self.elements = 0
+        self.sqnr_sum = 0.0
+        self.sqnr_count = 0
+
+    def to_dict(self):
+        out = {
+            "calls": self.calls,
+            "total_time": self.total_time,
+            "mean_time": self.total_time / self.calls if self.calls else 0.0,
+            "min_time": self.min_time if self.calls else 0.0,
+            "max_time": self.max_time,
+        }
+        if self.bytes_in or self.bytes_out:
+            out["bytes_in"] = self.bytes_in
+            out["bytes_out"] = self.bytes_out
+        if self.elements:
+            out["clipped"] = self.clipped
+            out["clip_rate"] = self.clipped / self.elements
+        if self.sqnr_count:
+            out["sqnr_db"] = self.sqnr_sum / self.sqnr_count
+        return out
+
+
+class Profiler:
+    """
+    Docstring for Profiler
+
+    Aggregates per-stage statistics for every named quantizer:
+
+    - wall time of each stage (always)
+    - torch.profiler.record_function ranges "inwhale/<name>/<stage>" (record_function=True)
+    - bytes of the input and output tensors (record_bytes=True)
+    - elements pushed outside [qmin, qmax] before clamping (record_clipped=True)
+    - SQNR of quantize -> dequantize (record_sqnr=True, costs one extra dequantize)
+
+    With synchronize=True, CUDA work is waited for around each stage so wall
+    times belong to the stage that launched the kernels.
+
+    Stats are exported with to_dict()/to_json(), and every call with
+    export_chrome_trace() (trace=True), viewable in chrome://tracing or Perfetto.
+    """
+
+    def __init__(
+        self,
+        record_function=False,
+        record_bytes=False,
+        record_clipped=False,
+        record_sqnr=False,
+        synchronize=False,
+        trace=False,
+    ):
+        self.record_function = record_function
+        self.record_bytes = record_bytes
+        self.record_clipped = record_clipped
+        self.record_sqnr = record_sqnr
+        self.synchronize = synchronize
+        self.trace = trace
+
+        self.stats = {}
+        self.events = []
+        self.origin = time.perf_counter()
+        self._handle = None
+
+    def __enter__(self):
+        self._handle = register_hook(self)
+        return self
+
+    def __exit__(self, *exc):
+        self._handle.remove()
+        self._handle = None
+        return False
+
+    def _stage_stats(self, name, stage):
+        stages = self.stats.setdefault(name, {})
+        if stage not in stages:
+            stages[stage] = StageStats()
+        return stages[stage]
+
+    def start(self, stage, name, obj, args):
+        scope = None
+        if self.record_function:
+            from torch.profiler import record_function
+
+            scope = record_function(f"inwhale/{name}/{stage}")
+            scope.__enter__()
+        if self.synchronize and args:
+            _synchronize(args[0])
+        return stage, name, obj, args, scope, time.perf_counter()
+
+    def stop(self, token, result):
+        stage, name, obj, args, scope, start = token
+        if self.synchronize:
+            _synchronize(result)
+        elapsed = time.perf_counter() - start
+        if scope is not None:
+            scope.__exit__(None, None, None)
+
+        stats = self._stage_stats(name, stage)
+        stats.calls += 1
+        stats.total_time += elapsed
+        stats.min_time = min(stats.min_time, elapsed)
+        stats.max_time = max(stats.max_time, elapsed)
+
+        if self.trace:
+            self.events.append((name, stage, start - self.origin, elapsed))
+
+        x = args[0] if args else None
+        if result is None or not _is_tensor(x):
+            return
+
+        if self.record_bytes and _is_tensor(result):
+            stats.bytes_in += _nbytes(x)
+            stats.bytes_out += _nbytes(result)
+
+        if self.record_clipped and stage == "clamp":
+            outside = (x < obj.qmin) | (x > obj.qmax)
+            stats.clipped += int(outside.sum())
+            stats.elements += get_backend(x).numel(x)
+
+        if self.record_sqnr and stage == "quantize":
+            with suspended():
+                dx = obj.dequantize(result)
+            stats.sqnr_sum += sqnr(x, dx)
+            stats.sqnr_count += 1
+
+    def to_dict(self):
+        return {
+            name: {stage: s.to_dict() for stage, s in stages.items()}
+            for name, stages in self.stats.items()
+        }
+
+    def to_json(self, path=None):
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def chrome_trace(self):
+        events = [
+            {
+                "name": f"{name}/{stage}",
+                "cat": stage,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": elapsed * 1e6,
+                "pid": 0,
+                "tid": 0,
+            }
+            for name, stage, start, elapsed in self.events
+        ]
+        return {"traceEvents": events}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
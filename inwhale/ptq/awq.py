@@ -0,0 +1,142 @@
+import torch
+
+from ..core.groupwise import GroupwiseQuantizer
+from ..rounding.nearest import NearestRounding
+from .calibration import collect_activation_stats
+from .folding import fold_scales
+
+
+class AWQ:
+    """
+    Docstring for AWQ (Activation-aware Weight Quantization)
+
+    Observation behind AWQ: not all weights matter equally. Input channels that
+    carry large activations multiply into the output much more, so their weights'
+    rounding error matters more.
+
+    Instead of keeping those weights in higher precision, AWQ scales them up
+    before quantization (and scales the activation down by the same amount):
+
+    y = x @ W.T = (x / s) @ (W * s).T
+
+    Quantizing W * s gives salient columns relatively finer steps. The per-channel
+    scale is built from the mean activation magnitude, with one exponent `ratio`:
+
+    s = mean|x| ^ ratio,   ratio in {0, 1/n_grid, ..., (n_grid - 1)/n_grid}
+
+    (normalised so max(s) * min(s) = 1), and the ratio that minimises
+
+    || x @ W.T - (x / s) @ Q(W * s).T ||^2
+
+    on a cached calibration subsample wins. ratio = 0 means s = 1, i.e. plain
+    group-wise quantization, so the search can never do worse than that on the
+    calibration data.
+
+    All candidates are evaluated together: the candidate weights are stacked into
+    a [n_grid, out, in] tensor, fake-quantized by one GroupwiseQuantizer call and
+    multiplied against the subsample with one batched matmul.
+    `candidates_per_batch` bounds how many candidates are stacked at once, for
+    layers where n_grid copies of the weight do not fit in memory.
+
+    Finally s is folded into the previous op (see fold_scales), so the Linear
+    weights come out ready for GroupwiseQuantizer(bits, rounding, group_size).
+    """
+
+    def __init__(
+        self,
+        bits=4,
+        group_size=128,
+        n_grid=20,
+        max_samples=512,
+        candidates_per_batch=None,
+        rounding=None,
+    ):
+        if n_grid <= 0:
+            raise ValueError("n_grid must be positive.")
+        if max_samples <= 0:
+            raise ValueError("max_samples must be positive.")
+
+        self.bits = bits
+        self.group_size = group_size
+        self.n_grid = n_grid
+        self.max_samples = max_samples
+        self.candidates_per_batch = candidates_per_batch or n_grid
+        self.rounding = rounding if rounding is not None else NearestRounding()
+
+    def candidate_scales(self, mean_abs):
+        """
+        Returns (ratios [n_grid], scales [n_grid, in]) for every grid point at once.
+        """
+        ratios = (
+            torch.arange(self.n_grid, device=mean_abs.device, dtype=torch.float32)
+            / self.n_grid
+        )
+        base = mean_abs.float().clamp(min=1e-4)
+
+        scales = base.unsqueeze(0).pow(ratios.unsqueeze(1))
+        norm = scales.amax(dim=1, keepdim=True) * scales.amin(dim=1, keepdim=True)
+        scales = scales / norm.sqrt()
+        return ratios, scales
+
+    def candidate_losses(self, linears, x, scales):
+        """
+        Output MSE of every candidate scale, summed over the Linear layers that share x.
+
+        x:      [rows, in] calibration subsample
+        scales: [n_candidates, in]
+        returns [n_candidates]
+        """
+        x = x.float()
+        losses = torch.zeros(scales.shape[0], device=x.device)
+
+        for linear in linears:
+            w = linear.weight.detach().float()
+            reference = x @ w.t()
+
+            for start in range(0, scales.shape[0], self.candidates_per_batch):
+                s = scales[start : start + self.candidates_per_batch]
+
+                quantizer = GroupwiseQuantizer(
+                    self.bits, self.rounding, self.group_size
+                )
+                w_s = w.unsqueeze(0) * s.unsqueeze(1)
+                w_q = quantizer.dequantize(quantizer.quantize(w_s))
+
+                x_s = x.unsqueeze(0) / s.unsqueeze(1)
+                out = torch.matmul(x_s, w_q.transpose(1, 2))
+                error = (out - reference).pow(2).mean(dim=(1, 2))
+                losses[start : start + s.shape[0]] += error
+
+        return losses
+
+    def search_scales(self, linears, x, mean_abs):
+        """
+        Returns (best_scales [in], best_ratio) for Linear layers sharing the input x.
+        """
+        ratios, scales = self.candidate_scales(mean_abs)
+        losses = self.candidate_losses(linears, x, scales)
+        best = torch.argmin(losses)
+        return scales[best], ratios[best]
+
+    def apply(self, model, layers, batches):
+        """
+        Calibrates, searches and folds the scales for every (prev_op, linears) pair.
+
+        layers: list of (prev_op, [linear, ...]) pairs, the linears all reading
+        prev_op's output. One calibration sweep covers all pairs.
+
+        Returns the list of chosen scales, one [in] tensor per pair. The model is
+        modified in place and computes the same function as before.
+        """
+        inputs = [linears[0] for _, linears in layers]
+        observers, samples = collect_activation_stats(
+            model, inputs, batches, max_samples=self.max_samples
+        )
+
+        chosen = []
+        for (prev_op, linears), observer, x in zip(layers, observers, samples):
+            scales, _ = self.search_scales(linears, x, observer.mean_abs)
+            fold_scales(prev_op, linears, scales)
+            chosen.append(scales)
+
+        return chosen
@@ -0,0 +1,70 @@
+import torch
+
+from ..observers.magnitude import ChannelMagnitudeObserver
+
+
+def collect_activation_stats(model, modules, batches, max_samples=0, seed=0):
+    """
+    Runs the calibration batches through the model ONCE and records, for every
+    module in `modules`, per-channel statistics of the input it receives.
+
+    A forward pre-hook on each module feeds its input into a ChannelMagnitudeObserver.
+    With max_samples > 0 the hook also keeps max_samples input rows (tokens),
+    which methods like AWQ replay during their search. They are a uniform
+    sample over all batches, not the first rows: every row draws a random key
+    from a generator seeded with `seed`, and the rows with the max_samples
+    largest keys are kept (in their original order).
+
+    Every module must run at least once, otherwise a ValueError names it.
+
+    returns (observers, samples): one observer per module, and one
+    [<= max_samples, channels] tensor per module (None when max_samples == 0)
+    """
+    observers = [ChannelMagnitudeObserver() for _ in modules]
+    caches = [[] for _ in modules]
+    handles = []
+    generator = torch.Generator().manual_seed(seed)
+
+    for module, observer, cache in zip(modules, observers, caches):
+        hook = _make_hook(observer, cache, max_samples, generator)
+        handles.append(module.register_forward_pre_hook(hook))
+
+    try:
+        with torch.no_grad():
+            for batch in batches:
+                model(batch)
+    finally:
+        for handle in handles:
+            handle.remove()
+
+    names = {module: name for name, module in model.named_modules()}
+    for module, observer in zip(modules, observers):
+        if observer.abs_max is None:
+            name = names.get(module, type(module).__name__)
+            raise ValueError(
+                f"Module {name!r} received no input during calibration, "
+                f"is it used in the model's forward?"
+            )
+
+    samples = [cache[1] if cache else None for cache in caches]
+    return observers, samples
+
+
+def _make_hook(observer, cache, max_samples, generator):
+    def hook(module, args):
+        x = args[0].detach()
+        observer.observe(x)
+        if max_samples <= 0:
+            return
+
+        rows = x.reshape(-1, x.shape[-1]).float()
+        keys = torch.rand(rows.shape[0], generator=generator).to(rows.device)
+        if cache:
+            keys = torch.cat([cache[0], keys])
+            rows = torch.cat([cache[1], rows])
+        if rows.shape[0] > max_samples:
+            keep = keys.topk(max_samples).indices.sort().values
+            keys, rows = keys[keep], rows[keep]
+        cache[:] = [keys, rows]
+
+    return hook
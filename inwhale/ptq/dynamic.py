@@ -0,0 +1,136 @@
+import torch
+from torch import nn
+
+from ..core.packing import pack_int4, unpack_int4
+from ..core.uniform import SymmetricUniformQuantizer
+from ..observers.minmax import PerChannelMinMaxObserver
+from ..rounding.nearest import NearestRounding
+from .matmul import int8_matmul
+
+
+def quantize_per_token(x, bits, rounding, per_token=True):
+    """
+    Symmetric dynamic quantization of activations, no observer involved.
+
+    x: [tokens, hidden]
+
+    One aminmax over the hidden dimension gives every token (row) its own range,
+    then it is the usual SymmetricUniformQuantizer math:
+
+    scale[t] = max(|min_t|, |max_t|) / qmax
+    codes    = clamp(round(x / scale), qmin, qmax)
+
+    Nothing is remembered between calls, unlike an Observer whose history
+    would mix up ranges of unrelated batches. With per_token=False the whole
+    tensor shares one scale.
+
+    returns (codes [tokens, hidden], scale [tokens, 1] or [])
+    """
+    if not 2 <= bits <= 8:
+        raise ValueError(f"quantize_per_token needs 2 <= bits <= 8, got {bits}.")
+    qmin = -(1 << (bits - 1))
+    qmax = (1 << (bits - 1)) - 1
+
+    if per_token:
+        min_x, max_x = torch.aminmax(x, dim=-1, keepdim=True)
+    else:
+        min_x, max_x = torch.aminmax(x)
+
+    scale = torch.clamp(torch.max(min_x.abs(), max_x.abs()) / qmax, min=1e-8)
+    codes = torch.clamp(rounding.round(x / scale), qmin, qmax)
+    return codes, scale
+
+
+class DynamicQuantizedLinear(nn.Module):
+    """
+    Docstring for DynamicQuantizedLinear (dynamic PTQ)
+
+    Static PTQ fixes activation scales during calibration. Dynamic PTQ computes
+    them at run time from the activation itself, so no calibration data is
+    needed and every token gets a range that fits it exactly.
+
+    - weights: quantized ONCE at construction, per output row, with
+      SymmetricUniformQuantizer and a PerChannelMinMaxObserver. Only the codes
+      and the row scales are kept: bits <= 4 -> two codes per byte
+      (pack_int4, offset by 8 into 0..15), otherwise one int8 per code.
+    - activations: quantize_per_token on every call, one aminmax per tensor
+    - matmul: integer codes x integer codes, rescaled once at the end
+
+    y[t, o] ~= (Cx @ Cw.T)[t, o] * sx[t] * sw[o] + bias[o]
+
+    The weight stays resident in its compact form only. The integer matmul
+    needs int32 (or float64) operands, so forward widens (and unpacks) the
+    codes chunk_size output rows at a time: the transient copy is
+    chunk_size * in_features wide instead of a second full weight.
+    """
+
+    def __init__(self, linear, bits=8, rounding=None, per_token=True, chunk_size=256):
+        super().__init__()
+        if not 2 <= bits <= 8:
+            raise ValueError("DynamicQuantizedLinear needs 2 <= bits <= 8.")
+
+        self.in_features = linear.in_features
+        self.out_features = linear.out_features
+        self.bits = bits
+        self.per_token = per_token
+        self.chunk_size = chunk_size
+        self.rounding = rounding if rounding is not None else NearestRounding()
+
+        weight_quantizer = SymmetricUniformQuantizer(
+            bits, PerChannelMinMaxObserver(dim=0), self.rounding
+        )
+        codes = weight_quantizer.quantize(linear.weight.detach().float())
+
+        self.packed = bits <= 4 and self.in_features % 2 == 0
+        codes = pack_int4(codes + 8) if self.packed else codes.to(torch.int8)
+
+        self.register_buffer("weight_codes", codes)
+        self.register_buffer("weight_scale", weight_quantizer.scale)
+
+        if linear.bias is not None:
+            self.register_buffer("bias", linear.bias.detach().clone())
+        else:
+            self.bias = None
+
+    def _signed(self, codes):
+        if not self.packed:
+            return codes
+        return unpack_int4(codes).to(torch.int8) - 8
+
+    def int_weight(self):
+        """
+        Signed integer weight codes [out_features, in_features], as int8.
+        """
+        return self._signed(self.weight_codes)
+
+    def forward(self, x):
+        shape = x.shape
+        x = x.reshape(-1, self.in_features).float()
+
+        codes, scale = quantize_per_token(x, self.bits, self.rounding, self.per_token)
+        blocks = self.weight_codes.split(self.chunk_size)
+        out = torch.cat(
+            [int8_matmul(codes, self._signed(b)).float() for b in blocks], dim=1
+        )
+        out = out * scale * self.weight_scale.t()
+
+        if self.bias is not None:
+            out = out + self.bias
+        return out.reshape(*shape[:-1], self.out_features)
+
+
+def quantize_dynamic(model, bits=8, rounding=None, per_token=True):
+    """
+    Replaces every nn.Linear in the model with a DynamicQuantizedLinear, in place.
+    returns the model
+    """
+    for name, child in model.named_children():
+        if isinstance(child, nn.Linear):
+            setattr(
+                model,
+                name,
+                DynamicQuantizedLinear(child, bits, rounding, per_token),
+            )
+        else:
+            quantize_dynamic(child, bits, rounding, per_token)
+    return model
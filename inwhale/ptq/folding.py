@@ -0,0 +1,73 @@
+import torch
+from torch import nn
+
+
+def fold_scales(prev_op, linears, scales):
+    """
+    Folds per-input-channel scales into a layer pair without adding any runtime op.
+
+    For a Linear reading the output h of prev_op:
+    y = h @ W.T = (h / s) @ (W * s).T
+
+    so dividing prev_op's output channels by s and multiplying the Linear's input
+    columns by s leaves y unchanged in exact arithmetic.
+
+    prev_op can be a Linear (its output rows are divided) or any norm layer with
+    an elementwise `weight` (LayerNorm, RMSNorm). `linears` are all the Linear
+    layers reading prev_op's output; they all get the same column scaling.
+    """
+    weight = getattr(prev_op, "weight", None)
+    if weight is None:
+        raise TypeError(
+            f"Cannot fold scales into {type(prev_op).__name__}: it has no weight."
+        )
+
+    with torch.no_grad():
+        if isinstance(prev_op, nn.Linear):
+            weight.div_(scales.view(-1, 1).to(weight.dtype))
+        else:
+            weight.div_(scales.to(weight.dtype))
+
+        bias = getattr(prev_op, "bias", None)
+        if bias is not None:
+            bias.div_(scales.to(bias.dtype))
+
+        for linear in linears:
+            linear.weight.mul_(scales.view(1, -1).to(linear.weight.dtype))
+
+
+def fold_rotation(prev_op, linears, rotation):
+    """
+    Folds an orthogonal rotation Q (a HadamardRotation) into a layer pair, the
+    way fold_scales folds a diagonal one.
+
+    For a Linear reading h = x @ P.T + c, with Q.T @ Q = I:
+
+    y = h @ W.T = (h @ Q.T) @ (W @ Q.T).T
+
+    and h @ Q.T = x @ (Q @ P).T + c @ Q.T, so prev_op's output rows and bias
+    are rotated and every reader's input columns are rotated too. The hidden
+    activation between the two layers is then the rotated one, which is what
+    the activation quantizer sees, and the model is unchanged in exact
+    arithmetic.
+
+    Only a Linear prev_op is supported: an elementwise norm weight does not
+    commute with a rotation.
+    """
+    if not isinstance(prev_op, nn.Linear):
+        raise TypeError(
+            f"Cannot fold a rotation into {type(prev_op).__name__}: "
+            "expected a Linear."
+        )
+
+    with torch.no_grad():
+        weight = prev_op.weight
+        weight.copy_(rotation.rotate(weight.t().float()).t().to(weight.dtype))
+
+        if prev_op.bias is not None:
+            bias = prev_op.bias
+            bias.copy_(rotation.rotate(bias.float()).to(bias.dtype))
+
+        for linear in linears:
+            w = linear.weight
+            w.copy_(rotation.rotate(w.float()).to(w.dtype))
@@ -0,0 +1,247 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+from ..core.groupwise import GroupwiseQuantizer
+from ..core.packing import pack_int4, unpack_int4
+from ..rounding.nearest import NearestRounding
+
+
+class DequantCache:
+    """
+    Docstring for DequantCache
+
+    Without integer kernels a quantized layer has to turn its codes back into a
+    float weight before the matmul. Doing that for every layer up front gives
+    back all the memory quantization saved; doing it on every forward wastes
+    time. DequantCache sits in between:
+
+    get(layer) returns layer.dequantize_weight(), and keeps the result in an
+    LRU cache holding at most `max_bytes` of float weights. The codes stay
+    resident, so an evicted weight is simply dequantized again on next use.
+
+    max_bytes = 0            -> nothing cached, dequantize on every call
+    max_bytes >= all weights -> every weight dequantized once, like fp32
+
+    With prefetch=True, a background thread dequantizes the layer registered
+    after the one just requested, so it is usually ready by the time the
+    forward pass reaches it. Layers are registered in module order by
+    quantize_lazy.
+
+    A cached weight is only valid for the device and dtype it was made in;
+    layers call invalidate(layer) when either changes.
+    """
+
+    def __init__(self, max_bytes=256 << 20, prefetch=False):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative.")
+        self.max_bytes = max_bytes
+        self.prefetch = prefetch
+
+        self.weights = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.layers = []
+        self._next = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def register(self, layer):
+        if self.layers:
+            self._next[self.layers[-1]] = layer
+        self.layers.append(layer)
+
+    def _insert(self, layer, weight):
+        nbytes = weight.numel() * weight.element_size()
+        if nbytes > self.max_bytes:
+            return
+        self.weights[layer] = weight
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.weights.popitem(last=False)
+            self.nbytes -= evicted.numel() * evicted.element_size()
+
+    def _prefetch(self, layer):
+        with self._lock:
+            if layer in self.weights or layer in self._pending:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+            self._pending[layer] = self._executor.submit(
+                self._load, layer, True
+            )
+
+    def _load(self, layer, prefetched=False):
+        weight = layer.dequantize_weight()
+        with self._lock:
+            # invalidate() during a prefetch drops the pending entry: stale
+            stale = prefetched and self._pending.pop(layer, None) is None
+            if not stale and layer not in self.weights:
+                self._insert(layer, weight)
+        return weight
+
+    def get(self, layer):
+        with self._lock:
+            weight = self.weights.get(layer)
+            if weight is not None:
+                self.weights.move_to_end(layer)
+                self.hits += 1
+            else:
+                self.misses += 1
+            future = self._pending.get(layer) if weight is None else None
+
+        if weight is None:
+            weight = future.result() if future is not None else self._load(layer)
+
+        following = self._next.get(layer)
+        if self.prefetch and following is not None:
+            self._prefetch(following)
+        return weight
+
+    def invalidate(self, layer):
+        """
+        Drops the cached (or pending) weight of one layer.
+        """
+        with self._lock:
+            weight = self.weights.pop(layer, None)
+            if weight is not None:
+                self.nbytes -= weight.numel() * weight.element_size()
+            self._pending.pop(layer, None)
+
+    def clear(self):
+        with self._lock:
+            self.weights.clear()
+            self.nbytes = 0
+
+    def close(self):
+        """
+        Stops the prefetch thread.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+class LazyQuantizedLinear(nn.Module):
+    """
+    Docstring for LazyQuantizedLinear
+
+    Keeps only the packed codes of the weight, plus one scale and zero_point per
+    group (GroupwiseQuantizer, group_size = in_features means one per row):
+
+    bits <= 4 -> two codes per byte (pack_int4), otherwise one uint8 per code
+
+    The float weight exists only while it is needed:
+
+    forward(x) = linear(x, cache.get(self), bias)
+
+    and cache.get dequantizes it on first use, keeping it around as long as the
+    memory budget of the (shared) DequantCache allows. Without a cache the
+    weight is dequantized on every call.
+
+    The weight is dequantized straight into the dtype of the inputs (and the
+    device of the codes), so a cached weight is used as is, with no per-call
+    copy. A new input dtype or a move (.to(), .cuda(), ...) invalidates it.
+    """
+
+    def __init__(self, linear, bits=4, group_size=None, rounding=None, cache=None):
+        super().__init__()
+        if bits > 8:
+            raise ValueError("LazyQuantizedLinear stores uint8 codes, bits <= 8.")
+
+        self.in_features = linear.in_features
+        self.out_features = linear.out_features
+        self.bits = bits
+        self.group_size = group_size or linear.in_features
+        self.cache = cache
+        self.dtype = torch.float32
+
+        quantizer = GroupwiseQuantizer(
+            bits,
+            rounding if rounding is not None else NearestRounding(),
+            group_size=self.group_size,
+        )
+        codes = quantizer.quantize(linear.weight.detach().float())
+
+        groups = codes.numel() // self.group_size
+        scale = torch.as_tensor(quantizer.scale, dtype=torch.float32)
+        zero_point = torch.as_tensor(quantizer.zero_point, dtype=torch.float32)
+
+        self.packed = bits <= 4 and self.in_features % 2 == 0
+        codes = pack_int4(codes) if self.packed else codes.to(torch.uint8)
+
+        self.register_buffer("weight_codes", codes)
+        self.register_buffer("weight_scale", scale.expand(groups, 1).clone())
+        self.register_buffer("weight_zero_point", zero_point.expand(groups, 1).clone())
+
+        if linear.bias is not None:
+            self.register_buffer("bias", linear.bias.detach().clone())
+        else:
+            self.bias = None
+
+        if cache is not None:
+            cache.register(self)
+
+    def dequantize_weight(self):
+        codes = self.weight_codes
+        codes = unpack_int4(codes) if self.packed else codes
+        groups = codes.float().reshape(-1, self.group_size)
+        weight = (groups - self.weight_zero_point) * self.weight_scale
+        weight = weight.reshape(self.out_features, self.in_features)
+        return weight.to(self.dtype)
+
+    def _apply(self, fn, *args, **kwargs):
+        # a cached weight would stay on the old device
+        if self.cache is not None:
+            self.cache.invalidate(self)
+        return super()._apply(fn, *args, **kwargs)
+
+    def forward(self, x):
+        if x.dtype != self.dtype:
+            self.dtype = x.dtype
+            if self.cache is not None:
+                self.cache.invalidate(self)
+
+        if self.cache is not None:
+            weight = self.cache.get(self)
+        else:
+            weight = self.dequantize_weight()
+        bias = self.bias.to(x.dtype) if self.bias is not None else None
+        return F.linear(x, weight, bias)
+
+
+def quantize_lazy(
+    model,
+    bits=4,
+    group_size=None,
+    rounding=None,
+    max_bytes=256 << 20,
+    prefetch=False,
+    cache=None,
+):
+    """
+    Replaces every nn.Linear in the model with a LazyQuantizedLinear, in place.
+    All layers share one DequantCache (a new one with `max_bytes` and
+    `prefetch` unless `cache` is given), reachable as layer.cache.
+    returns the model
+    """
+    if cache is None:
+        cache = DequantCache(max_bytes, prefetch)
+
+    for name, child in model.named_children():
+        if isinstance(child, nn.Linear):
+            setattr(
+                model,
+                name,
+                LazyQuantizedLinear(child, bits, group_size, rounding, cache),
+            )
+        else:
+            quantize_lazy(child, bits, group_size, rounding, cache=cache)
+    return model
@@ -0,0 +1,241 @@
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+from ..core.uniform import SymmetricUniformQuantizer
+from ..observers.minmax import PerChannelMinMaxObserver
+from ..rounding.nearest import NearestRounding
+
+
+def randomized_svd(weight, rank, oversample=8, power_iterations=2, generator=None):
+    """
+    Top-`rank` singular triplets of weight [m, n] without a full SVD
+    (Halko, Martinsson & Tropp, 2011).
+
+    1. sketch the range with k = rank + oversample random probes:
+       Y = W @ Omega,  Omega [n, k] Gaussian,  Q = qr(Y)
+    2. power iterations Q = qr(W @ qr(W.T @ Q)) sharpen the sketch when the
+       spectrum decays slowly; re-orthonormalizing every time keeps the small
+       singular directions from being lost to round-off
+    3. B = Q.T @ W is only [k, n], so its SVD is cheap: B = Ub S Vh
+       and W ~= (Q @ Ub) S Vh
+
+    The cost is a few [m, n] x [n, k] matmuls, not the O(m n min(m, n)) of
+    torch.linalg.svd on the whole matrix.
+
+    returns u [m, rank], s [rank], vh [rank, n]
+    """
+    weight = weight.detach().float()
+    m, n = weight.shape
+    k = min(rank + oversample, m, n)
+
+    omega = torch.randn(n, k, generator=generator).to(weight.device)
+    q, _ = torch.linalg.qr(weight @ omega)
+    for _ in range(power_iterations):
+        z, _ = torch.linalg.qr(weight.t() @ q)
+        q, _ = torch.linalg.qr(weight @ z)
+
+    ub, s, vh = torch.linalg.svd(q.t() @ weight, full_matrices=False)
+    u = q @ ub
+    return u[:, :rank], s[:rank], vh[:rank]
+
+
+def choose_rank(s, weight_norm, shape, max_error=None, max_bytes=None, bits=8):
+    """
+    Smallest rank that meets the error budget, capped by the size budget.
+
+    s: singular values (descending) from randomized_svd
+    weight_norm: ||W||_F, so the truncation error of rank r is known exactly
+    from the energy the first r directions capture:
+
+    error(r) = sqrt(||W||_F^2 - sum_{i<=r} s_i^2) / ||W||_F
+
+    max_error: largest allowed relative Frobenius error of the truncation
+    max_bytes: largest allowed size of both factors, r * (m + n) * bits / 8
+
+    With neither budget every singular value in s is kept.
+    """
+    rank = s.numel()
+
+    if max_error is not None:
+        total = float(weight_norm) ** 2
+        remaining = (total - torch.cumsum(s.double() ** 2, dim=0)).clamp(min=0)
+        errors = remaining.sqrt() / max(total**0.5, 1e-12)
+        within = torch.nonzero(errors <= max_error).flatten()
+        if within.numel():
+            rank = int(within[0]) + 1
+
+    if max_bytes is not None:
+        m, n = shape
+        rank = min(rank, int(max_bytes * 8 // ((m + n) * bits)))
+
+    return max(rank, 1)
+
+
+def _default_quantizer():
+    return SymmetricUniformQuantizer(
+        8, PerChannelMinMaxObserver(dim=0), NearestRounding()
+    )
+
+
+class LowRankQuantizedLinear(nn.Module):
+    """
+    Docstring for LowRankQuantizedLinear
+
+    A second axis of compression next to the bit width: the weight is
+    approximated by a rank-r product and both factors are quantized
+
+    W ~= L @ R,   L = U sqrt(S) [out, r],   R = sqrt(S) Vh [r, in]
+
+    with U, S, Vh from randomized_svd. Splitting sqrt(S) over both factors
+    gives them similar ranges, which keeps either one from eating the
+    quantization error. `quantizer` is a callable returning a fresh
+    quantizer (any inwhale quantizer), one per factor; the default is 8-bit
+    symmetric with one scale per row.
+
+    The rank is either given, or chosen from the spectrum with choose_rank:
+    the smallest rank whose truncation error is below `max_error`, capped so
+    the factors fit in `max_bytes`. Only the first `max_rank` directions are
+    ever computed.
+
+    Optionally the error the factors leave, W - L' @ R' with L', R' the
+    dequantized factors, is itself quantized with `residual_quantizer`
+    (a callable as well), typically at very few bits.
+
+    The codes and the quantizers' parameters (scale, zero_point, ...) are
+    registered as buffers, left_codes, left_scale, right_codes, ..., so they
+    follow state_dict() and .to(device); the quantizer objects only supply
+    the dequantize() math.
+
+    forward never builds the [out, in] matrix from the factors:
+
+    y = (x @ R'.T) @ L'.T + b    (+ x @ E'.T with a residual)
+
+    which is (in + out) * r multiply-adds per token instead of in * out.
+    """
+
+    def __init__(
+        self,
+        linear,
+        rank=None,
+        quantizer=None,
+        residual_quantizer=None,
+        max_rank=256,
+        max_error=None,
+        max_bytes=None,
+        oversample=8,
+        power_iterations=2,
+        seed=0,
+    ):
+        super().__init__()
+        self.in_features = linear.in_features
+        self.out_features = linear.out_features
+        quantizer = quantizer if quantizer is not None else _default_quantizer
+
+        weight = linear.weight.detach().float()
+        shape = tuple(weight.shape)
+        max_rank = min(rank or max_rank, *shape)
+
+        generator = torch.Generator().manual_seed(seed)
+        u, s, vh = randomized_svd(
+            weight, max_rank, oversample, power_iterations, generator
+        )
+
+        self.left_quantizer = quantizer()
+        self.right_quantizer = quantizer()
+        if rank is None:
+            rank = choose_rank(
+                s,
+                torch.linalg.norm(weight),
+                shape,
+                max_error,
+                max_bytes,
+                self.left_quantizer.bits,
+            )
+        self.rank = min(rank, max_rank)
+
+        root = s[: self.rank].sqrt()
+        left = u[:, : self.rank] * root
+        right = root.unsqueeze(1) * vh[: self.rank]
+
+        self._params = {}
+        self._store("left", self.left_quantizer.quantize(left))
+        self._store("right", self.right_quantizer.quantize(right))
+
+        if residual_quantizer is not None:
+            residual = weight - self.left() @ self.right()
+            self.residual_quantizer = residual_quantizer()
+            self._store("residual", self.residual_quantizer.quantize(residual))
+        else:
+            self.residual_quantizer = None
+            self.register_buffer("residual_codes", None)
+
+        if linear.bias is not None:
+            self.register_buffer("bias", linear.bias.detach().clone())
+        else:
+            self.bias = None
+
+    def _store(self, prefix, codes):
+        # codes and tensor parameters become buffers, anything else (e.g.
+        # ResidualCodes, a float scale) stays a plain attribute
+        quantizer = getattr(self, f"{prefix}_quantizer")
+        names = []
+        for name, value in quantizer._cache_state().items():
+            if torch.is_tensor(value):
+                self.register_buffer(f"{prefix}_{name}", value.detach().clone())
+                names.append(name)
+        self._params[prefix] = names
+
+        if torch.is_tensor(codes):
+            self.register_buffer(f"{prefix}_codes", codes.detach())
+        else:
+            setattr(self, f"{prefix}_codes", codes)
+
+    def _dequantize(self, prefix):
+        quantizer = getattr(self, f"{prefix}_quantizer")
+        quantizer._restore_cache_state(
+            {name: getattr(self, f"{prefix}_{name}") for name in self._params[prefix]}
+        )
+        return quantizer.dequantize(getattr(self, f"{prefix}_codes"))
+
+    def left(self):
+        return self._dequantize("left")
+
+    def right(self):
+        return self._dequantize("right")
+
+    def dequantize_weight(self):
+        """
+        The full [out, in] approximation. Only for inspection: forward does
+        not need it.
+        """
+        weight = self.left() @ self.right()
+        if self.residual_codes is not None:
+            weight = weight + self._dequantize("residual")
+        return weight
+
+    def forward(self, x):
+        right = self.right().to(x.dtype)
+        left = self.left().to(x.dtype)
+        bias = self.bias.to(x.dtype) if self.bias is not None else None
+
+        out = F.linear(F.linear(x, right), left, bias)
+        if self.residual_codes is not None:
+            residual = self._dequantize("residual")
+            out = out + F.linear(x, residual.to(x.dtype))
+        return out
+
+
+def quantize_low_rank(model, **kwargs):
+    """
+    Replaces every nn.Linear in the model with a LowRankQuantizedLinear, in
+    place. kwargs go to every layer, so a max_error / max_bytes budget gives
+    each layer the rank its own spectrum needs (see layer.rank).
+    returns the model
+    """
+    for name, child in model.named_children():
+        if isinstance(child, nn.Linear):
+            setattr(model, name, LowRankQuantizedLinear(child, **kwargs))
+        else:
+            quantize_low_rank(child, **kwargs)
+    return model
@@ -0,0 +1,19 @@
+import torch
+
+
+def int8_matmul(a, b):
+    """
+    Integer matmul of quantization codes.
+
+    a: [m, k] codes in [-128, 127]
+    b: [n, k] codes in [-128, 127]
+    returns a @ b.T, exact
+
+    On CPU the codes are multiplied as int32, the accumulator type of real
+    int8 kernels. Other devices have no general integer matmul, so float64 is
+    used there; every product and partial sum is an integer far below 2^53,
+    so the result is still exact.
+    """
+    if a.device.type == "cpu":
+        return torch.matmul(a.to(torch.int32), b.to(torch.int32).t())
+    return torch.matmul(a.to(torch.float64), b.to(torch.float64).t())
@@ -0,0 +1,345 @@
+import hashlib
+import json
+import os
+import weakref
+
+import torch
+from torch import nn
+
+from ..analysis.sweep import sweep
+from ..cache import tensor_key
+from ..core.uniform import SymmetricUniformQuantizer
+from ..observers.minmax import MinMaxObserver
+from ..rounding.nearest import NearestRounding
+from .calibration import collect_activation_stats
+
+
+def fingerprint(*tensors):
+    """
+    Content hash of tensors: same values, dtype and shape -> same key,
+    wherever they live in memory.
+    """
+    digest = hashlib.sha256()
+    for t in tensors:
+        t = t.detach().contiguous().cpu()
+        digest.update(f"{t.dtype}{tuple(t.shape)}".encode())
+        digest.update(t.reshape(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _function_key(fn):
+    # a loss function is identified by its name and bytecode
+    name = getattr(fn, "__qualname__", type(fn).__qualname__)
+    key = f"{getattr(fn, '__module__', '')}.{name}"
+    code = getattr(fn, "__code__", None)
+    if code is not None:
+        body = code.co_code + repr(code.co_consts).encode()
+        key += hashlib.sha256(body).hexdigest()
+    return key
+
+
+class MixedPrecisionAllocator:
+    """
+    Docstring for MixedPrecisionAllocator
+
+    One bit width for every layer wastes bits: some layers barely notice 2-bit
+    weights, others fall apart below 8. Mixed precision gives each layer its own
+    width under a global budget.
+
+    1. measure(): for every layer l and candidate width b, a sensitivity score e[l][b]
+       - "weight":  ||W - Q_b(W)||^2 / n                     (no data needed)
+       - "output":  ||X W.T - X Q_b(W).T||^2 / n              (calibration inputs X)
+       - "hessian": tr(H_l) / n_l * ||W - Q_b(W)||^2          (HAWQ-v2, needs a loss)
+         with the Hessian trace estimated by Hutchinson probes:
+         tr(H) ~= mean_v v.T H v,  v in {-1, +1}^n
+
+       Each layer's curve is cached on disk under a key built from the weight's
+       content hash (plus the data and settings it depends on), so re-measuring
+       an unchanged model only reads small JSON files. The "output" and
+       "hessian" errors also depend on the rest of the network, so their keys
+       include a hash of the whole model state and of loss_fn.
+
+    2. allocate(): choose one width per layer to
+
+       minimize   sum_l e[l][b_l]
+       subject to sum_l cost[l][b_l] <= budget
+
+       cost defaults to the weight size in bytes (numel * b / 8); pass your own
+       costs (e.g. measured latencies) for a latency budget. This is a
+       multiple-choice knapsack, solved exactly by dynamic programming over a
+       discretised budget ("knapsack") or by the usual greedy upgrade order
+       ("greedy"). Planning for a new budget only re-runs this step.
+
+    The result is a {layer name: bits} dict for the existing quantizers.
+    """
+
+    def __init__(
+        self,
+        bits=(2, 3, 4, 8),
+        proxy="weight",
+        cache_dir=None,
+        quantizer=SymmetricUniformQuantizer,
+        rounding=NearestRounding,
+        num_probes=8,
+        max_samples=512,
+    ):
+        if proxy not in ("weight", "output", "hessian"):
+            raise ValueError(f"Unknown proxy {proxy!r}.")
+        self.bits = tuple(sorted(bits))
+        self.proxy = proxy
+        self.cache_dir = cache_dir
+        self.quantizer = quantizer
+        self.rounding = rounding
+        self.num_probes = num_probes
+        self.max_samples = max_samples
+        self._last_data_key = None
+
+    def layers(self, model):
+        """
+        Named modules with a weight matrix (2+ dims): Linear, Conv, Embedding...
+        """
+        return {
+            name: module
+            for name, module in model.named_modules()
+            if isinstance(getattr(module, "weight", None), nn.Parameter)
+            and module.weight.dim() >= 2
+        }
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key):
+        if self.cache_dir is None or not os.path.exists(self._cache_path(key)):
+            return None
+        with open(self._cache_path(key)) as f:
+            return {int(b): e for b, e in json.load(f).items()}
+
+    def _store(self, key, curve):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self._cache_path(key), "w") as f:
+            json.dump({str(b): e for b, e in curve.items()}, f)
+
+    def _key(self, weight, data_key=""):
+        settings = f"{self.proxy}|{self.bits}|{self.quantizer.__name__}|"
+        settings += f"{self.rounding.__name__}|{self.num_probes}|{data_key}"
+        return hashlib.sha256((fingerprint(weight) + settings).encode()).hexdigest()
+
+    def _data_key(self, model, batches, loss_fn):
+        if self.proxy == "weight":
+            return ""
+        # a layer's inputs and loss depend on every other layer's weights.
+        # Hashing all of them is costly, so the hash is reused while the same
+        # tensors are unmodified (tensor_key: same storage, same version)
+        # the module's own tensors, state_dict() would return fresh views
+        state = dict(model.named_parameters())
+        state.update(model.named_buffers())
+        tensors = [*state.values(), *batches]
+        identity = (tuple(tensor_key(t) for t in tensors), tuple(state), loss_fn)
+        if self._last_data_key is not None:
+            last_identity, refs, key = self._last_data_key
+            same = len(refs) == len(tensors) and all(
+                ref() is t for ref, t in zip(refs, tensors)
+            )
+            if same and identity == last_identity and None not in identity[0]:
+                return key
+
+        key = fingerprint(*batches) + "|" + ",".join(state)
+        key += fingerprint(*state.values())
+        if loss_fn is not None:
+            key += "|" + _function_key(loss_fn)
+        refs = [weakref.ref(t) for t in tensors]
+        self._last_data_key = (identity, refs, key)
+        return key
+
+    def _weight_errors(self, weight):
+        rows = sweep(
+            weight,
+            bits=self.bits,
+            roundings=(self.rounding,),
+            quantizers=(self.quantizer,),
+        )
+        return {row["bits"]: row["mse"] for row in rows}
+
+    def _dequantized(self, weight, bits):
+        q = self.quantizer(bits, MinMaxObserver(), self.rounding())
+        return q.dequantize(q.quantize(weight))
+
+    def _output_errors(self, module, x):
+        if not isinstance(module, nn.Linear):
+            raise TypeError(
+                f"The 'output' proxy only supports Linear layers, "
+                f"got {type(module).__name__}."
+            )
+        weight = module.weight.detach().float()
+        reference = x @ weight.t()
+        errors = {}
+        for b in self.bits:
+            out = x @ self._dequantized(weight, b).t()
+            errors[b] = float((out - reference).pow(2).mean())
+        return errors
+
+    def hessian_traces(self, model, layers, batches, loss_fn):
+        """
+        Hutchinson estimate of tr(H_l) for each layer's weight.
+        loss_fn(model, batch) -> scalar loss
+        """
+        params = [module.weight for module in layers.values()]
+        traces = [0.0 for _ in params]
+        count = 0
+
+        for batch in batches:
+            loss = loss_fn(model, batch)
+            grads = torch.autograd.grad(loss, params, create_graph=True)
+
+            for _ in range(self.num_probes):
+                probes = [torch.randint_like(p, 2) * 2 - 1 for p in params]
+                hv = torch.autograd.grad(grads, params, probes, retain_graph=True)
+                for i, (v, h) in enumerate(zip(probes, hv)):
+                    traces[i] += float((v * h).sum())
+                count += 1
+
+        return {name: t / count for name, t in zip(layers, traces)}
+
+    def measure(self, model, batches=None, loss_fn=None):
+        """
+        Sensitivity curves {layer name: {bits: error}}, from the cache when possible.
+
+        batches are needed for the "output" proxy (model inputs) and the
+        "hessian" proxy (passed to loss_fn(model, batch)).
+        """
+        layers = self.layers(model)
+        if self.proxy != "weight" and batches is None:
+            raise ValueError(f"The {self.proxy!r} proxy needs calibration batches.")
+        if self.proxy == "hessian" and loss_fn is None:
+            raise ValueError("The 'hessian' proxy needs a loss_fn.")
+
+        batches = list(batches) if batches is not None else []
+        data_key = self._data_key(model, batches, loss_fn)
+
+        keys = {name: self._key(m.weight, data_key) for name, m in layers.items()}
+        curves = {}
+        missing = []
+        for name in layers:
+            curve = self._load(keys[name])
+            if curve is None:
+                missing.append(name)
+            else:
+                curves[name] = curve
+
+        if not missing:
+            return curves
+
+        if self.proxy == "output":
+            todo = [layers[name] for name in missing]
+            _, samples = collect_activation_stats(
+                model, todo, batches, max_samples=self.max_samples
+            )
+            inputs = dict(zip(missing, samples))
+        elif self.proxy == "hessian":
+            traces = self.hessian_traces(model, layers, batches, loss_fn)
+
+        for name in missing:
+            weight = layers[name].weight.detach()
+            if self.proxy == "weight":
+                curve = self._weight_errors(weight)
+            elif self.proxy == "output":
+                curve = self._output_errors(layers[name], inputs[name])
+            else:
+                errors = self._weight_errors(weight)
+                curve = {b: traces[name] * e for b, e in errors.items()}
+
+            self._store(keys[name], curve)
+            curves[name] = curve
+
+        return curves
+
+    def sizes(self, model):
+        """
+        Default costs: weight storage in bytes, {layer name: {bits: bytes}}.
+        """
+        return {
+            name: {b: module.weight.numel() * b / 8 for b in self.bits}
+            for name, module in self.layers(model).items()
+        }
+
+    def allocate(self, curves, costs, budget, method="knapsack", resolution=2048):
+        """
+        {layer name: bits} minimising total error with total cost <= budget.
+        """
+        names = list(curves)
+        minimum = sum(min(costs[n].values()) for n in names)
+        if minimum > budget:
+            raise ValueError(
+                f"Budget {budget} is below the smallest possible cost {minimum}."
+            )
+
+        if method == "greedy":
+            return self._greedy(names, curves, costs, budget)
+        if method == "knapsack":
+            return self._knapsack(names, curves, costs, budget, resolution)
+        raise ValueError(f"Unknown method {method!r}.")
+
+    def _greedy(self, names, curves, costs, budget):
+        """
+        Start every layer at its cheapest width, then keep applying the upgrade
+        with the best error reduction per unit of extra cost that still fits.
+        """
+        choice = {n: min(costs[n], key=costs[n].get) for n in names}
+        spent = sum(costs[n][choice[n]] for n in names)
+
+        while True:
+            best, best_gain = None, 0.0
+            for n in names:
+                for b in self.bits:
+                    extra = costs[n][b] - costs[n][choice[n]]
+                    gain = curves[n][choice[n]] - curves[n][b]
+                    if extra <= 0 or gain <= 0 or spent + extra > budget:
+                        continue
+                    if gain / extra > best_gain:
+                        best, best_gain = (n, b), gain / extra
+            if best is None:
+                return choice
+            n, b = best
+            spent += costs[n][b] - costs[n][choice[n]]
+            choice[n] = b
+
+    def _knapsack(self, names, curves, costs, budget, resolution):
+        """
+        Multiple-choice knapsack DP. The budget is split into `resolution` units
+        and every cost is rounded UP to whole units, so the plan always fits.
+
+        dp[c] = smallest total error of the layers so far using at most c units;
+        each layer's update is one vectorised shift-and-min per bit width.
+        """
+        unit = budget / resolution
+        inf = float("inf")
+        dp = torch.zeros(resolution + 1, dtype=torch.float64)
+        picks = []
+
+        for n in names:
+            best = torch.full_like(dp, inf)
+            pick = torch.full((resolution + 1,), -1, dtype=torch.long)
+            for i, b in enumerate(self.bits):
+                units = int(-(-costs[n][b] // unit))
+                if units > resolution:
+                    continue
+                candidate = torch.full_like(dp, inf)
+                candidate[units:] = dp[: resolution + 1 - units] + curves[n][b]
+                better = candidate < best
+                best = torch.where(better, candidate, best)
+                pick = torch.where(better, torch.full_like(pick, i), pick)
+            dp = best
+            picks.append(pick)
+
+        if torch.isinf(dp[-1]):
+            raise ValueError("No allocation fits the budget at this resolution.")
+
+        choice = {}
+        c = resolution
+        for n, pick in zip(reversed(names), reversed(picks)):
+            b = self.bits[int(pick[c])]
+            choice[n] = b
+            c -= int(-(-costs[n][b] // unit))
+        return choice
@@ -0,0 +1,125 @@
+import torch
+from torch import nn
+
+from ..core.uniform import SymmetricUniformQuantizer
+from ..observers.minmax import PerChannelMinMaxObserver
+from ..rounding.nearest import NearestRounding
+from .dynamic import quantize_per_token
+from .matmul import int8_matmul
+
+
+class OutlierLinear(nn.Module):
+    """
+    Docstring for OutlierLinear (LLM.int8()-style outlier decomposition)
+
+    Large transformers produce a handful of activation COLUMNS (hidden features)
+    with magnitudes far above everything else. Quantizing those with the rest
+    forces a huge scale and wipes out the small values: the accuracy cliff of
+    plain SymmetricUniformQuantizer on activations.
+
+    LLM.int8() splits the matmul by column instead:
+
+    O = { j : max |x[:, j]| >= threshold }
+
+    x @ W.T = x[:, O] @ W[:, O].T           (floating point, few columns)
+            + x[:, ~O] @ W[:, ~O].T         (int8, almost all columns)
+
+    The int8 part uses per-row scales for the activations (one per token, see
+    quantize_per_token) and per-row scales for the weight (one per output
+    feature, SymmetricUniformQuantizer with a PerChannelMinMaxObserver):
+
+    x[:, ~O] @ W.T ~= (Cx @ Cw.T) * sx * sw.T
+
+    where Cx, Cw are int8 codes and Cx @ Cw.T is accumulated in integers.
+
+    Outlier features are systematic: the same few hidden features, batch
+    after batch. So the candidate set O_cal is fixed at construction from
+    calibration inputs (or given directly as `outlier_columns`), and only
+    those columns of W are kept in fp16, a small [out, |O_cal|] buffer next
+    to the int8 codes. At run time the threshold still decides per batch:
+
+    O = { j in O_cal : max |x[:, j]| >= threshold }
+
+    computed as a mask over O_cal, so removing O from x is one index_copy,
+    gathering it one index_select and a multiply by the mask. No index list
+    ever goes back to the host, so forward has no device sync. A column
+    outside O_cal takes the int8 path even if it crosses the threshold; the
+    default (no calibration) is plain int8 everywhere.
+    """
+
+    def __init__(
+        self,
+        linear,
+        threshold=6.0,
+        rounding=None,
+        calibration=None,
+        outlier_columns=None,
+    ):
+        super().__init__()
+        self.in_features = linear.in_features
+        self.out_features = linear.out_features
+        self.threshold = threshold
+        self.rounding = rounding if rounding is not None else NearestRounding()
+
+        weight = linear.weight.detach().float()
+        weight_quantizer = SymmetricUniformQuantizer(
+            8, PerChannelMinMaxObserver(dim=0), self.rounding
+        )
+        codes = weight_quantizer.quantize(weight)
+
+        self.register_buffer("weight_codes", codes.to(torch.int8))
+        self.register_buffer("weight_scale", weight_quantizer.scale)
+
+        if outlier_columns is None:
+            outlier_columns = torch.zeros(0, dtype=torch.long)
+            if calibration is not None:
+                if torch.is_tensor(calibration):
+                    calibration = [calibration]
+                peak = torch.zeros(self.in_features)
+                for x in calibration:
+                    x = x.detach().reshape(-1, self.in_features).float().cpu()
+                    peak = torch.maximum(peak, x.abs().amax(dim=0))
+                outlier_columns = torch.nonzero(peak >= threshold).flatten()
+        columns = torch.as_tensor(outlier_columns, dtype=torch.long)
+        columns = columns.to(weight.device)
+
+        self.register_buffer("outlier_index", columns)
+        self.register_buffer("outlier_weight", weight[:, columns].half())
+
+        if linear.bias is not None:
+            self.register_buffer("bias", linear.bias.detach().clone())
+        else:
+            self.bias = None
+
+    def outlier_columns(self, x):
+        """
+        Indices of the input columns whose max |x| reaches the threshold.
+        For inspection only: forward works with a mask over outlier_index.
+        """
+        return torch.nonzero(x.abs().amax(dim=0) >= self.threshold).flatten()
+
+    def _int8_forward(self, x):
+        codes, scale = quantize_per_token(x, 8, self.rounding)
+        acc = int8_matmul(codes, self.weight_codes)
+        return acc.float() * scale * self.weight_scale.t()
+
+    def forward(self, x):
+        shape = x.shape
+        x = x.reshape(-1, self.in_features).float()
+
+        if self.outlier_index.numel() == 0:
+            out = self._int8_forward(x)
+        else:
+            candidates = x.index_select(1, self.outlier_index)
+            active = candidates.abs().amax(dim=0) >= self.threshold
+            outlier_x = candidates * active
+            out = self._int8_forward(
+                x.index_copy(1, self.outlier_index, candidates - outlier_x)
+            )
+            weight = self.outlier_weight.float()
+            out = torch.addmm(out, outlier_x, weight.t())
+
+        if self.bias is not None:
+            out = out + self.bias
+
+        return out.reshape(*shape[:-1], self.out_features)
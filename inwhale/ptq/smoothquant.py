@@ -0,0 +1,92 @@
+import torch
+
+from .calibration import collect_activation_stats
+from .folding import fold_scales
+
+
+class SmoothQuant:
+    """
+    Docstring for SmoothQuant
+
+    W8A8 breaks on transformer activations because a few hidden channels carry
+    values 10-100x larger than the rest. A MinMaxObserver has to stretch the
+    scale to fit them, a PercentileObserver clips them away; either way most
+    channels are left with only a few integer levels.
+
+    Weights, on the other hand, are smooth and easy to quantize. SmoothQuant
+    moves the difficulty from activations to weights with a per-channel scale s:
+
+    y = x @ W.T = (x / s) @ (W * s).T
+
+    For input channel j:
+
+    s_j = max|x_j| ^ alpha / max|W_j| ^ (1 - alpha)
+
+    alpha = 1 flattens the activations (s_j = max|x_j|, every channel's max
+    becomes 1) and pushes all of their range into the weights. alpha = 0 does
+    the opposite: s_j = 1 / max|W_j| flattens the weights and multiplies the
+    activations by max|W_j|. 0.5 splits it evenly and is a good default.
+
+    The division by s is folded into the previous LayerNorm/Linear and the
+    multiplication into the Linear weights (see fold_scales), so the smoothed
+    model has no extra runtime op.
+
+    Since the weights change, any weight observer that has already seen them is
+    stale. If `weight_quantizer` is given (a callable returning a fresh
+    quantizer), apply() builds a new one per smoothed Linear and runs it on the
+    smoothed weight, so its observer sees the new range.
+    """
+
+    def __init__(self, alpha=0.5, weight_quantizer=None):
+        if not 0.0 <= alpha <= 1.0:
+            raise ValueError(f"alpha must be in [0, 1], got {alpha}.")
+        self.alpha = alpha
+        self.weight_quantizer = weight_quantizer
+        self.weight_quantizers = {}
+
+    def smoothing_factors(self, act_max, linears):
+        """
+        act_max: [in] per-channel max |x|
+        linears: Linear layers reading that activation
+        returns s: [in]
+        """
+        weight_max = torch.stack(
+            [linear.weight.detach().abs().amax(dim=0).float() for linear in linears]
+        ).amax(dim=0)
+
+        act_max = act_max.float().to(weight_max.device)
+        weight_max = weight_max.clamp(min=1e-5)
+
+        scales = act_max.pow(self.alpha) / weight_max.pow(1 - self.alpha)
+        return scales.clamp(min=1e-5)
+
+    def apply(self, model, layers, batches):
+        """
+        Smooths the whole model in place.
+
+        layers: list of (prev_op, [linear, ...]) pairs, the linears all reading
+        prev_op's output. One calibration sweep collects max |x| for every pair.
+
+        returns the list of smoothing factors, one [in] tensor per pair
+        """
+        self.weight_quantizers = {}
+        inputs = [linears[0] for _, linears in layers]
+        observers, _ = collect_activation_stats(model, inputs, batches)
+
+        chosen = []
+        for (prev_op, linears), observer in zip(layers, observers):
+            scales = self.smoothing_factors(observer.abs_max, linears)
+            fold_scales(prev_op, linears, scales)
+            chosen.append(scales)
+
+        if self.weight_quantizer is not None:
+            self._observe_weights(layers)
+
+        return chosen
+
+    def _observe_weights(self, layers):
+        for _, linears in layers:
+            for linear in linears:
+                quantizer = self.weight_quantizer()
+                quantizer.quantize(linear.weight.detach())
+                self.weight_quantizers[linear] = quantizer
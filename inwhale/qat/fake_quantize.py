@@ -0,0 +1,158 @@
+import torch
+from torch import nn
+
+from ..core.packing import pack_bits, unpack_bits
+from ..core.uniform import (
+    AsymmetricUniformQuantizer,
+    MidTreadUniformQuantizer,
+    SymmetricUniformQuantizer,
+)
+
+
+class FakeQuantizeFunction(torch.autograd.Function):
+    """
+    Quantize -> dequantize in one autograd node, with a straight-through estimator.
+
+    forward:  v = x / scale + zero_point
+              out = (clamp(round(v), qmin, qmax) - zero_point) * scale
+
+    backward: round() has zero gradient almost everywhere, so the STE pretends
+              it is the identity. Only the clamp is kept:
+
+              d out / d x = 1  if qmin <= v <= qmax
+                            0  otherwise (clipped)
+
+    Composing quantize() and dequantize() under autograd would save x / scale,
+    the rounded and the clamped tensors for backward. All backward needs is the
+    in-range mask, so that is the only thing saved, packed to 1 bit per element.
+    The mask is saved even when nothing was clipped: checking for that would
+    read the result back to the host on every step.
+    """
+
+    @staticmethod
+    def forward(ctx, x, scale, zero_point, qmin, qmax, rounding):
+        v = x / scale + zero_point
+        inside = (v >= qmin) & (v <= qmax)
+
+        q = torch.clamp(rounding.round(v), qmin, qmax)
+        out = (q - zero_point) * scale
+
+        ctx.shape = x.shape
+        ctx.save_for_backward(pack_bits(inside))
+        return out
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        (packed,) = ctx.saved_tensors
+        inside = unpack_bits(packed, grad_output.numel()).view(ctx.shape)
+        return grad_output * inside, None, None, None, None, None
+
+
+class FakeQuantize(nn.Module):
+    """
+    Docstring for FakeQuantize
+
+    Quantization-aware training needs the forward pass to SEE quantization error
+    while weights stay in floating point. A fake quantization module quantizes
+    and immediately dequantizes, so the output is a float tensor restricted to
+    the quantizer's grid.
+
+    It wraps an existing affine quantizer (SymmetricUniformQuantizer,
+    AsymmetricUniformQuantizer or MidTreadUniformQuantizer) and uses its
+    observer, rounding strategy, qmin and qmax.
+
+    Observer warm-up: for the first `warmup_steps` training forward passes the
+    observer sees the input and scale / zero_point are recomputed. After that
+    they are frozen, so the grid stops moving while the network adapts to it.
+    In eval mode the observer is never updated.
+
+    observed_steps and the quantizer's scale / zero_point are plain attributes
+    (scale may be a float or a per-channel tensor), so they are written to and
+    read from the state_dict explicitly. A loaded module resumes where it left
+    off: warm-up does not restart and eval works without new data.
+    """
+
+    def __init__(self, quantizer, warmup_steps=100):
+        super().__init__()
+        supported = (
+            SymmetricUniformQuantizer,
+            AsymmetricUniformQuantizer,
+            MidTreadUniformQuantizer,
+        )
+        if not isinstance(quantizer, supported):
+            raise TypeError(
+                f"FakeQuantize needs an affine uniform quantizer, "
+                f"got {type(quantizer).__name__}."
+            )
+
+        self.quantizer = quantizer
+        self.warmup_steps = warmup_steps
+        self.observed_steps = 0
+
+    def _save_to_state_dict(self, destination, prefix, keep_vars):
+        super()._save_to_state_dict(destination, prefix, keep_vars)
+        destination[prefix + "observed_steps"] = torch.tensor(self.observed_steps)
+        for name, value in self.quantizer._cache_state().items():
+            if value is not None:
+                destination[prefix + name] = torch.as_tensor(value).detach()
+
+    def _load_from_state_dict(
+        self,
+        state_dict,
+        prefix,
+        local_metadata,
+        strict,
+        missing_keys,
+        unexpected_keys,
+        error_msgs,
+    ):
+        key = prefix + "observed_steps"
+        if key in state_dict:
+            self.observed_steps = int(state_dict.pop(key))
+        elif strict:
+            missing_keys.append(key)
+
+        # scale / zero_point are absent when nothing had been observed yet
+        state = {}
+        for name in self.quantizer.cache_params:
+            if prefix + name in state_dict:
+                state[name] = state_dict.pop(prefix + name)
+        self.quantizer._restore_cache_state(state)
+
+        super()._load_from_state_dict(
+            state_dict,
+            prefix,
+            local_metadata,
+            strict,
+            missing_keys,
+            unexpected_keys,
+            error_msgs,
+        )
+
+    def _update_params(self, x):
+        self.quantizer.observer.observe(x.detach())
+        if hasattr(self.quantizer, "_compute_params"):
+            self.quantizer._compute_params()
+        else:
+            self.quantizer._compute_scale()
+        self.observed_steps += 1
+
+    def forward(self, x):
+        if self.training and self.observed_steps < self.warmup_steps:
+            self._update_params(x)
+
+        if self.quantizer.scale is None:
+            raise RuntimeError("No data observed yet.")
+
+        scale = torch.as_tensor(self.quantizer.scale, device=x.device)
+        zero_point = torch.as_tensor(
+            getattr(self.quantizer, "zero_point", 0.0), device=x.device
+        )
+        return FakeQuantizeFunction.apply(
+            x,
+            scale.to(x.dtype),
+            zero_point.to(x.dtype),
+            self.quantizer.qmin,
+            self.quantizer.qmax,
+            self.quantizer.rounding,
+        )
@@ -0,0 +1,187 @@
+import math
+
+import torch
+from torch import nn
+
+from ..core.uniform import AsymmetricUniformQuantizer, SymmetricUniformQuantizer
+from ..rounding.stochastic import StochasticRounding
+
+
+def _reduce_to(grad, like):
+    """
+    Sums a full-size gradient down to the (broadcast) shape of a parameter.
+    """
+    if like.dim() == 0:
+        return grad.sum()
+    return grad.sum_to_size(like.shape)
+
+
+class LSQFunction(torch.autograd.Function):
+    """
+    Fake quantization with learnable scale s and zero point z (LSQ / LSQ+).
+
+    forward:  v = x / s + z
+              q = clamp(round(v), qmin, qmax)
+              out = (q - z) * s
+
+    backward, with round() treated as identity (straight-through):
+
+              d out / d x = 1              inside  (qmin <= v <= qmax)
+                            0              clipped
+
+              d out / d s = q - v          inside
+                            qmin - z       clipped below
+                            qmax - z       clipped above
+
+              d out / d z = 0              inside
+                            -s             clipped
+
+    The scale and zero point gradients are multiplied by the LSQ gradient scale
+    g = 1 / sqrt(n * qmax), n = elements sharing one scale, which keeps their
+    updates on the same footing as the weight updates.
+
+    Both passes are single autograd nodes: forward produces only the output,
+    and backward rebuilds v from x (which the next layer keeps anyway) and
+    computes all three gradients in one go. Deterministic rounding is
+    recomputed in backward; stochastic rounding cannot be, so its codes are
+    saved as int16.
+    """
+
+    @staticmethod
+    def forward(ctx, x, scale, zero_point, qmin, qmax, grad_scale, rounding):
+        v = x / scale + zero_point
+        q = torch.clamp(rounding.round(v), qmin, qmax)
+
+        ctx.qmin = qmin
+        ctx.qmax = qmax
+        ctx.grad_scale = grad_scale
+        ctx.rounding = rounding
+        ctx.saved_codes = isinstance(rounding, StochasticRounding)
+
+        if ctx.saved_codes:
+            ctx.save_for_backward(x, scale, zero_point, q.to(torch.int16))
+        else:
+            ctx.save_for_backward(x, scale, zero_point)
+        return (q - zero_point) * scale
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        x, scale, zero_point, *codes = ctx.saved_tensors
+        qmin, qmax = ctx.qmin, ctx.qmax
+
+        v = x / scale + zero_point
+        if ctx.saved_codes:
+            q = codes[0].to(v.dtype)
+        else:
+            q = torch.clamp(ctx.rounding.round(v), qmin, qmax)
+
+        below = v < qmin
+        above = v > qmax
+        inside = ~(below | above)
+
+        grad_x = grad_output * inside
+
+        d_scale = torch.where(
+            inside, q - v, torch.where(below, qmin - zero_point, qmax - zero_point)
+        )
+        grad_s = _reduce_to(grad_output * d_scale, scale) * ctx.grad_scale
+
+        grad_z = None
+        if ctx.needs_input_grad[2]:
+            d_zero = torch.where(inside, torch.zeros_like(v), -scale.expand_as(v))
+            grad_z = _reduce_to(grad_output * d_zero, zero_point) * ctx.grad_scale
+
+        return grad_x, grad_s, grad_z, None, None, None, None
+
+
+class LSQQuantizer(nn.Module):
+    """
+    Docstring for LSQQuantizer (Learned Step Size Quantization)
+
+    Observers choose scale from the data range, which is not what minimises the
+    task loss. LSQ makes the scale an nn.Parameter and learns it by gradient
+    descent together with the weights; LSQ+ also learns the zero point, which
+    matters for asymmetric data such as activations after Swish/GELU.
+
+    Wrap an existing quantizer:
+
+    - SymmetricUniformQuantizer  -> LSQ   (learnable scale)
+    - AsymmetricUniformQuantizer -> LSQ+  (learnable scale and zero_point)
+
+    scale (and zero_point) are nn.Parameters from construction on, so the
+    optimizer can be built right away. Their values come from the wrapped
+    quantizer's observer the first time data is seen, or from an explicit
+    initialize(x); either way the SAME Parameter objects are filled in
+    place, so do it before the first optimizer step. With a per-channel
+    observer such as PerChannelMinMaxObserver the parameters are resized to
+    one entry per channel at that point.
+    """
+
+    def __init__(self, quantizer):
+        super().__init__()
+        supported = (SymmetricUniformQuantizer, AsymmetricUniformQuantizer)
+        if not isinstance(quantizer, supported):
+            raise TypeError(
+                f"LSQQuantizer needs a uniform quantizer, "
+                f"got {type(quantizer).__name__}."
+            )
+
+        self.quantizer = quantizer
+        self.learn_zero_point = isinstance(quantizer, AsymmetricUniformQuantizer)
+        self.scale = nn.Parameter(torch.ones(()))
+        if self.learn_zero_point:
+            self.zero_point = nn.Parameter(torch.zeros(()))
+        else:
+            self.register_parameter("zero_point", None)
+        self.register_buffer("initialized", torch.tensor(False))
+
+    def initialize(self, x):
+        """
+        Observes x once and copies the quantizer's scale (and zero_point)
+        into the parameters.
+        """
+        self.quantizer.observer.observe(x.detach())
+        if self.learn_zero_point:
+            self.quantizer._compute_params()
+        else:
+            self.quantizer._compute_scale()
+
+        scale = torch.as_tensor(self.quantizer.scale, dtype=x.dtype, device=x.device)
+        # .data keeps the Parameter objects an optimizer may already hold
+        self.scale.data = scale.detach().clone()
+
+        if self.learn_zero_point:
+            zero_point = torch.as_tensor(
+                self.quantizer.zero_point, dtype=x.dtype, device=x.device
+            )
+            self.zero_point.data = zero_point.detach().expand_as(scale).clone()
+        self.initialized.fill_(True)
+
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # per-channel parameters only get their shape on initialization
+        for name in ("scale", "zero_point"):
+            param = getattr(self, name)
+            if param is not None and prefix + name in state_dict:
+                param.data = param.data.new_empty(state_dict[prefix + name].shape)
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
+    def forward(self, x):
+        if not self.initialized:
+            self.initialize(x)
+
+        zero_point = self.zero_point
+        if zero_point is None:
+            zero_point = torch.zeros((), dtype=x.dtype, device=x.device)
+
+        n = x.numel() / self.scale.numel()
+        grad_scale = 1.0 / math.sqrt(n * self.quantizer.qmax)
+
+        return LSQFunction.apply(
+            x,
+            self.scale,
+            zero_point,
+            self.quantizer.qmin,
+            self.quantizer.qmax,
+            grad_scale,
+            self.quantizer.rounding,
+        )
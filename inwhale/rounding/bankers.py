@@ -1,6 +1,5 @@
-import torch
-
 from .base import RoundingStrategy
+from ..backend import get_backend
 
 
 class BankersRounding(RoundingStrategy):
@@ -17,13 +16,14 @@ class BankersRounding(RoundingStrategy):
     otherwise, we just round normally.
     """
     def round(self, x):
-        floored = torch.floor(x)
+        xp = get_backend(x)
+        floored = xp.floor(x)
         fractional = x - floored
-        is_half = torch.abs(fractional - 0.5) < 1e-6
+        is_half = xp.abs(fractional - 0.5) < 1e-6
 
-        rounded = torch.where(
+        rounded = xp.where(
             is_half,
-            torch.where((floored % 2) == 0, floored, floored + 1),
-            torch.round(x),
+            xp.where((floored % 2) == 0, floored, floored + 1),
+            xp.round(x),
         )
         return rounded
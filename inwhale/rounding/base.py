@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
 
+from ..profiling import instrument_methods
+
 
 class RoundingStrategy(ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_methods(cls, {"round": "round"})
+
     @abstractmethod
     def round(self, x):
         pass
@@ -1,6 +1,5 @@
-import torch
-
 from .base import RoundingStrategy
+from ..backend import get_backend
 
 
 class FloorRounding(RoundingStrategy):
@@ -10,7 +9,7 @@ class FloorRounding(RoundingStrategy):
     return: Tensor rounded down to the nearest integer.
     """
     def round(self, x):
-        return torch.floor(x)
+        return get_backend(x).floor(x)
 
 
 class CeilRounding(RoundingStrategy):
@@ -20,4 +19,4 @@ class CeilRounding(RoundingStrategy):
     return: Tensor rounded up to the nearest integer.
     """
     def round(self, x):
-        return torch.ceil(x)
+        return get_backend(x).ceil(x)
@@ -1,8 +1,7 @@
-import torch
-
 from .base import RoundingStrategy
+from ..backend import get_backend
 
 
 class NearestRounding(RoundingStrategy):
     def round(self, x):
-        return torch.round(x)
+        return get_backend(x).round(x)
@@ -1,6 +1,5 @@
-import torch
-
 from .base import RoundingStrategy
+from ..backend import get_backend
 
 
 class RoundAwayFromZero(RoundingStrategy):
@@ -16,4 +15,5 @@ class RoundAwayFromZero(RoundingStrategy):
         :param x: input tensor of numeric values
         :return: tensor with values rounded away from zero
         """
-        return torch.sign(x) * torch.ceil(torch.abs(x))
+        xp = get_backend(x)
+        return xp.sign(x) * xp.ceil(xp.abs(x))
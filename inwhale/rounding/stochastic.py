@@ -1,6 +1,5 @@
-import torch
-
 from .base import RoundingStrategy
+from ..backend import get_backend
 
 
 class StochasticRounding(RoundingStrategy):
@@ -56,24 +55,32 @@ class StochasticRounding(RoundingStrategy):
     b. deterministic 
         > same seed -> same random seq -> same roundin decisions
         > without seed -> uses global random state -> non reproducible
+
+    NOTE: NumPy arrays draw from a numpy.random.Generator seeded with the same
+    seed. It is just as reproducible, but it is a different "tape" than torch's,
+    so torch and NumPy inputs round differently.
     """
-    
+
     def __init__(self, seed=None):
         self.seed = seed
         self.generator = None
-        if seed is not None:
-            self.generator = torch.Generator()
-            self.generator.manual_seed(seed)
+        self.numpy_generator = None
+
+    def _generator(self, xp):
+        # created on first use, so a NumPy-only process never imports torch
+        if xp.name == "numpy":
+            if self.numpy_generator is None:
+                self.numpy_generator = xp.np.random.default_rng(self.seed)
+            return self.numpy_generator
+        if self.generator is None and self.seed is not None:
+            self.generator = xp.torch.Generator()
+            self.generator.manual_seed(self.seed)
+        # None falls back to the global RNG state
+        return self.generator
 
     def round(self, x):
-        floor_x = torch.floor(x)
+        xp = get_backend(x)
+        floor_x = xp.floor(x)
         frac = x - floor_x
-        if self.generator is not None:
-            random_vals = torch.rand(
-                x.shape, dtype=x.dtype, device=x.device, generator=self.generator
-            )
-        else:
-            # fallback uses global RNG state 
-            # kept without rand_like for compatibility
-            random_vals = torch.rand(x.shape, dtype=x.dtype, device=x.device)
-        return floor_x + (random_vals < frac).float()
+        random_vals = xp.rand(x.shape, like=x, generator=self._generator(xp))
+        return floor_x + (random_vals < frac)
@@ -1,6 +1,5 @@
-import torch 
-
 from .base import RoundingStrategy
+from ..backend import get_backend
 
 class TruncationRounding(RoundingStrategy):
     """
@@ -15,4 +14,4 @@ class TruncationRounding(RoundingStrategy):
     This method does not perform any rounding up; it always rounds towards zero.
     """
     def round(self, x):
-        return torch.trunc(x)
\ No newline at end of file
+        return get_backend(x).trunc(x)
\ No newline at end of file
@@ -0,0 +1,125 @@
+import torch
+from torch import nn
+
+from inwhale.core.groupwise import GroupwiseQuantizer
+from inwhale.observers.magnitude import ChannelMagnitudeObserver
+from inwhale.ptq.awq import AWQ
+from inwhale.ptq.calibration import collect_activation_stats
+from inwhale.ptq.folding import fold_scales
+from inwhale.rounding.nearest import NearestRounding
+
+
+def make_block(hidden=32, out=16):
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.LayerNorm(hidden), nn.Linear(hidden, out))
+    with torch.no_grad():
+        model[0].weight.uniform_(0.5, 1.5)
+        model[0].bias.normal_()
+        # a few salient channels, like real LLM activations
+        model[0].weight[:4] *= 20.0
+    return model
+
+
+def make_batches(hidden=32, n=4):
+    torch.manual_seed(1)
+    return [torch.randn(8, hidden) for _ in range(n)]
+
+
+def quantized_output_error(model, batches, group_size):
+    linear = model[1]
+    q = GroupwiseQuantizer(bits=4, rounding=NearestRounding(), group_size=group_size)
+    w_q = q.dequantize(q.quantize(linear.weight.detach()))
+
+    err = 0.0
+    with torch.no_grad():
+        for x in batches:
+            h = model[0](x)
+            err += ((h @ w_q.t()) - (h @ linear.weight.t())).pow(2).mean().item()
+    return err
+
+
+def test_magnitude_observer_statistics():
+    obs = ChannelMagnitudeObserver()
+    obs.observe(torch.tensor([[1.0, -2.0], [-3.0, 0.0]]))
+    obs.observe(torch.tensor([[0.5, 4.0]]))
+
+    assert torch.allclose(obs.abs_max, torch.tensor([3.0, 4.0]))
+    assert torch.allclose(obs.mean_abs, torch.tensor([4.5 / 3, 6.0 / 3]))
+
+    min_val, max_val = obs.get_range()
+    assert torch.allclose(min_val, -max_val)
+
+
+def test_fold_scales_preserves_function():
+    model = make_block()
+    x = torch.randn(5, 32)
+    before = model(x)
+
+    fold_scales(model[0], [model[1]], torch.rand(32) + 0.5)
+
+    assert torch.allclose(model(x), before, atol=1e-4)
+
+
+def test_batched_losses_match_per_candidate_loop():
+    model = make_block()
+    x = torch.randn(16, 32)
+    awq = AWQ(bits=4, group_size=8, n_grid=6, candidates_per_batch=4)
+
+    _, scales = awq.candidate_scales(x.abs().mean(dim=0))
+    batched = awq.candidate_losses([model[1]], x, scales)
+
+    w = model[1].weight.detach()
+    for i, s in enumerate(scales):
+        q = GroupwiseQuantizer(bits=4, rounding=NearestRounding(), group_size=8)
+        w_q = q.dequantize(q.quantize(w * s))
+        loss = ((x / s) @ w_q.t() - x @ w.t()).pow(2).mean()
+        assert torch.allclose(batched[i], loss, rtol=1e-4, atol=1e-6)
+
+
+def test_ratio_zero_is_identity_scale():
+    awq = AWQ(n_grid=4)
+    ratios, scales = awq.candidate_scales(torch.rand(10) + 0.1)
+
+    assert ratios[0] == 0
+    assert torch.allclose(scales[0], torch.ones(10))
+
+
+def test_apply_keeps_function_and_reduces_error():
+    model = make_block()
+    batches = make_batches()
+    reference = [model(x) for x in batches]
+    baseline = quantized_output_error(model, batches, group_size=8)
+
+    awq = AWQ(bits=4, group_size=8, n_grid=10)
+    scales = awq.apply(model, [(model[0], [model[1]])], batches)
+
+    assert scales[0].shape == (32,)
+    for x, y in zip(batches, reference):
+        assert torch.allclose(model(x), y, atol=1e-3)
+    assert quantized_output_error(model, batches, group_size=8) <= baseline * 1.0001
+
+
+def test_samples_drawn_from_every_batch():
+    model = make_block()
+    batches = [torch.full((8, 32), float(i)) for i in range(4)]
+
+    _, (x,) = collect_activation_stats(model, [model[0]], batches, max_samples=8)
+    _, (again,) = collect_activation_stats(model, [model[0]], batches, max_samples=8)
+
+    assert x.shape == (8, 32)
+    assert len(set(x[:, 0].tolist())) > 1
+    assert torch.equal(x, again)
+
+
+def test_module_that_never_ran_is_named():
+    model = make_block()
+    # registered in the model but never called by its forward
+    unused = nn.Linear(32, 32)
+    model[0].add_module("unused", unused)
+
+    try:
+        collect_activation_stats(model, [unused], make_batches())
+    except ValueError as e:
+        assert "0.unused" in str(e)
+    else:
+        raise AssertionError("Expected ValueError")
@@ -0,0 +1,72 @@
+import torch
+
+from inwhale.core.sparse import SparseCodes
+from inwhale.core.uniform import DeadZoneSymmetricQuantizer
+from inwhale.observers.minmax import MinMaxObserver, PerChannelMinMaxObserver
+from inwhale.rounding.nearest import NearestRounding
+
+
+def pruned(shape, keep=0.1, seed=0):
+    g = torch.Generator().manual_seed(seed)
+    w = torch.randn(shape, generator=g)
+    return w * (torch.rand(shape, generator=g) < keep)
+
+
+def make(observer=None, **kwargs):
+    return DeadZoneSymmetricQuantizer(
+        8, observer or MinMaxObserver(), NearestRounding(), **kwargs
+    )
+
+
+def test_sparse_codes_round_trip_and_size():
+    w = pruned((64, 128))
+    dense = make().quantize(w)
+    codes = make(sparse=True).quantize(w)
+
+    assert isinstance(codes, SparseCodes)
+    assert codes.values.dtype == torch.int8
+    assert torch.equal(codes.to_dense(), dense)
+    assert codes.sparsity >= 0.85
+    assert codes.nbytes < dense.numel() // 4
+
+
+def test_sparse_dequantize_matches_dense():
+    w = pruned((32, 64))
+    q_dense = make(PerChannelMinMaxObserver(dim=0))
+    q_sparse = make(PerChannelMinMaxObserver(dim=0), sparse=True)
+
+    expected = q_dense.dequantize(q_dense.quantize(w))
+    codes = q_sparse.quantize(w)
+
+    assert isinstance(codes, SparseCodes)
+    assert torch.allclose(q_sparse.dequantize(codes), expected)
+
+
+def test_dense_below_min_sparsity():
+    w = torch.randn(16, 16)
+    codes = make(sparse=True, min_sparsity=0.9).quantize(w)
+    assert isinstance(codes, torch.Tensor)
+
+
+def test_sparse_matmul():
+    w = pruned((32, 64))
+    x = torch.randn(64, 5)
+    q = make(sparse=True)
+
+    codes = q.quantize(w)
+    out = q.matmul(codes, x)
+
+    assert torch.allclose(out, q.dequantize(codes) @ x, atol=1e-5)
+
+
+def test_per_channel_constant_rows():
+    w = pruned((4, 16))
+    w[1] = 0.0  # a constant channel among normal ones
+    q = make(PerChannelMinMaxObserver(dim=0), sparse=True, min_sparsity=0.0)
+
+    codes = q.quantize(w)
+
+    assert q.scale.shape == (4, 1)
+    assert q.scale[1].item() == 1.0
+    assert torch.all(codes.to_dense()[1] == 0)
+    assert torch.isfinite(q.dequantize(codes)).all()
@@ -0,0 +1,107 @@
+import torch
+from torch import nn
+
+from inwhale.core.uniform import SymmetricUniformQuantizer
+from inwhale.observers.minmax import PerChannelMinMaxObserver
+from inwhale.ptq.dynamic import (
+    DynamicQuantizedLinear,
+    quantize_dynamic,
+    quantize_per_token,
+)
+from inwhale.rounding.nearest import NearestRounding
+
+
+def test_per_token_matches_per_channel_quantizer():
+    x = torch.randn(6, 16) * torch.arange(1.0, 7.0).unsqueeze(1)
+    q = SymmetricUniformQuantizer(8, PerChannelMinMaxObserver(dim=0), NearestRounding())
+
+    expected = q.quantize(x)
+    codes, scale = quantize_per_token(x, 8, NearestRounding())
+
+    assert torch.equal(codes, expected)
+    assert torch.allclose(scale, q.scale)
+    assert scale.shape == (6, 1)
+
+
+def test_per_tensor_scale():
+    x = torch.randn(4, 8)
+    _codes, scale = quantize_per_token(x, 8, NearestRounding(), per_token=False)
+
+    assert scale.dim() == 0
+    assert torch.allclose(scale, x.abs().max() / 127)
+
+
+def test_no_state_between_calls():
+    layer = DynamicQuantizedLinear(nn.Linear(8, 4))
+    small = torch.randn(3, 8) * 0.01
+
+    before = layer(small)
+    layer(torch.randn(3, 8) * 100)
+    after = layer(small)
+
+    assert torch.equal(before, after)
+
+
+def test_close_to_float_linear():
+    torch.manual_seed(0)
+    linear = nn.Linear(32, 16)
+    x = torch.randn(2, 5, 32)
+
+    out = DynamicQuantizedLinear(linear)(x)
+
+    assert out.shape == (2, 5, 16)
+    assert torch.allclose(out, linear(x), atol=0.05)
+
+
+def test_weights_stored_as_int8():
+    layer = DynamicQuantizedLinear(nn.Linear(8, 4), bits=6)
+
+    assert layer.weight_codes.dtype == torch.int8
+    assert layer.weight_codes.abs().max() <= 32
+
+
+def test_4bit_weights_packed_two_per_byte():
+    torch.manual_seed(0)
+    linear = nn.Linear(8, 4)
+    layer = DynamicQuantizedLinear(linear, bits=4)
+    odd = DynamicQuantizedLinear(nn.Linear(7, 4), bits=4)
+
+    assert layer.weight_codes.dtype == torch.uint8
+    assert layer.weight_codes.shape == (4, 4)
+    assert layer.int_weight().shape == (4, 8)
+    assert layer.int_weight().abs().max() <= 8
+    assert odd.weight_codes.dtype == torch.int8
+    assert layer(torch.randn(3, 8)).shape == (3, 4)
+
+
+def test_chunked_matmul_matches_full_weight():
+    torch.manual_seed(0)
+    linear = nn.Linear(16, 10)
+    x = torch.randn(5, 16)
+
+    for bits in (4, 8):
+        layer = DynamicQuantizedLinear(linear, bits=bits, chunk_size=3)
+        codes, scale = quantize_per_token(x, bits, NearestRounding())
+        expected = (codes @ layer.int_weight().float().t()) * scale
+        expected = expected * layer.weight_scale.t() + linear.bias
+
+        assert torch.allclose(layer(x), expected, atol=1e-5)
+
+
+def test_bits_validated():
+    for bits in (1, 9):
+        try:
+            quantize_per_token(torch.randn(2, 4), bits, NearestRounding())
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+
+
+def test_quantize_dynamic_replaces_linears():
+    model = nn.Sequential(nn.Linear(8, 8), nn.ReLU(), nn.Sequential(nn.Linear(8, 2)))
+    quantize_dynamic(model)
+
+    assert isinstance(model[0], DynamicQuantizedLinear)
+    assert isinstance(model[2][0], DynamicQuantizedLinear)
+    assert model(torch.randn(3, 8)).shape == (3, 2)
@@ -0,0 +1,111 @@
+import io
+
+import pytest
+import torch
+
+from inwhale.core.uniform import AsymmetricUniformQuantizer
+from inwhale.observers.minmax import MinMaxObserver
+from inwhale.rounding.nearest import NearestRounding
+
+np = pytest.importorskip("numpy")
+
+from inwhale.core.entropy import (
+    MIN_LANE_SYMBOLS,
+    EncodedBlock,
+    compress,
+    decompress,
+    normalize_frequencies,
+    rans_decode,
+    rans_encode,
+    read_chunks,
+    read_codes,
+    write_codes,
+)
+
+
+def weight_codes(shape=(256, 256)):
+    torch.manual_seed(0)
+    q = AsymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding())
+    return q.quantize(torch.randn(shape)), q
+
+
+def test_normalized_frequencies_sum_to_table_size():
+    counts = np.array([1000, 1, 0, 3, 50000])
+    freq = normalize_frequencies(counts, scale_bits=12)
+
+    assert freq.sum() == 4096
+    assert np.all((freq > 0) == (counts > 0))
+
+
+@pytest.mark.parametrize("lanes", [1, 7, 1024])
+def test_rans_round_trip(lanes):
+    rng = np.random.default_rng(0)
+    symbols = rng.choice(5, size=3001, p=[0.6, 0.2, 0.1, 0.07, 0.03])
+    freq = normalize_frequencies(np.bincount(symbols, minlength=5))
+
+    block = rans_encode(symbols, freq, lanes=lanes)
+
+    assert np.array_equal(rans_decode(block), symbols)
+
+
+def test_compress_round_trip_and_ratio():
+    codes, q = weight_codes()
+
+    chunks = list(compress(codes, q.qmin, q.qmax, block_size=1 << 15, lanes=64))
+    decoded = np.concatenate(list(decompress(chunks)))
+
+    assert len(chunks) == 2
+    assert np.array_equal(decoded, codes.flatten().numpy())
+    # min-max codes of gaussian weights carry about 7 of their 8 bits
+    assert sum(len(c) for c in chunks) < 0.95 * codes.numel()
+
+
+def test_single_symbol_block():
+    codes = torch.full((100,), 3.0)
+    chunks = list(compress(codes, 0, 255))
+    assert np.array_equal(next(decompress(chunks)), codes.numpy())
+
+
+def test_file_streaming():
+    codes, q = weight_codes((64, 128))
+    f = io.BytesIO()
+    write_codes(f, codes, q.qmin, q.qmax, block_size=1000)
+
+    f.seek(0)
+    assert np.array_equal(read_codes(f), codes.numpy())
+
+    f.seek(0)
+    shape, chunks = read_chunks(f)
+    sizes = [block.size for block in decompress(chunks)]
+    assert shape == (64, 128)
+    assert sizes[0] == 1000 and sum(sizes) == codes.numel()
+
+
+def test_out_of_range_codes():
+    try:
+        list(compress(torch.tensor([0.0, 300.0]), 0, 255))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Expected ValueError")
+
+
+def test_many_lanes_do_not_outgrow_input():
+    codes, q = weight_codes()
+
+    chunks = list(compress(codes, q.qmin, q.qmax, block_size=1 << 15, lanes=65536))
+
+    assert EncodedBlock.from_bytes(chunks[0]).lanes == (1 << 15) // MIN_LANE_SYMBOLS
+    assert sum(len(c) for c in chunks) < 0.95 * codes.numel()
+    decoded = np.concatenate(list(decompress(chunks)))
+    assert np.array_equal(decoded, codes.numpy().ravel())
+
+
+def test_non_integer_codes_rejected():
+    for codes in (torch.tensor([0.0, 1.5]), np.array([1 + 2j])):
+        try:
+            list(compress(codes, 0, 255))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Expected ValueError")
@@ -0,0 +1,127 @@
+import torch
+
+from inwhale.core.packing import pack_bits, unpack_bits
+from inwhale.core.uniform import AsymmetricUniformQuantizer, SymmetricUniformQuantizer
+from inwhale.observers.minmax import MinMaxObserver
+from inwhale.observers.percentile import PercentileObserver
+from inwhale.qat.fake_quantize import FakeQuantize
+from inwhale.rounding.nearest import NearestRounding
+
+
+def saved_bytes(fn, x):
+    sizes = []
+
+    def pack(t):
+        sizes.append(t.numel() * t.element_size())
+        return t
+
+    with torch.autograd.graph.saved_tensors_hooks(pack, lambda t: t):
+        out = fn(x)
+    return out, sum(sizes)
+
+
+def test_pack_unpack_round_trip():
+    mask = torch.rand(37) > 0.5
+    packed = pack_bits(mask)
+
+    assert packed.dtype == torch.uint8
+    assert packed.numel() == 5
+    assert torch.equal(unpack_bits(packed, 37), mask)
+
+
+def test_forward_matches_quantizer():
+    x = torch.randn(100)
+    q = SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding())
+    fq = FakeQuantize(SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding()))
+
+    expected = q.dequantize(q.quantize(x))
+
+    assert torch.allclose(fq(x), expected)
+
+
+def test_ste_gradient_masks_clipped_values():
+    x = torch.randn(1000, requires_grad=True)
+    quantizer = SymmetricUniformQuantizer(
+        8, PercentileObserver(0.05, 0.95), NearestRounding()
+    )
+    fq = FakeQuantize(quantizer)
+
+    fq(x).sum().backward()
+
+    v = x.detach() / quantizer.scale
+    inside = (v >= quantizer.qmin) & (v <= quantizer.qmax)
+    assert not inside.all()
+    assert torch.equal(x.grad, inside.float())
+
+
+def test_saves_only_a_bit_mask():
+    x = torch.randn(4096, requires_grad=True)
+    quantizer = AsymmetricUniformQuantizer(
+        4, PercentileObserver(0.01, 0.99), NearestRounding()
+    )
+    fq = FakeQuantize(quantizer)
+
+    _, nbytes = saved_bytes(fq, x)
+
+    assert nbytes == 4096 // 8
+
+
+def test_full_gradient_when_nothing_clipped():
+    x = torch.randn(4096, requires_grad=True)
+    fq = FakeQuantize(SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding()))
+
+    out, nbytes = saved_bytes(fq, x)
+    out.sum().backward()
+
+    assert nbytes == 4096 // 8
+    assert torch.equal(x.grad, torch.ones_like(x))
+
+
+def test_observer_frozen_after_warmup():
+    fq = FakeQuantize(
+        SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding()),
+        warmup_steps=2,
+    )
+    fq(torch.tensor([1.0, -1.0]))
+    fq(torch.tensor([2.0, -2.0]))
+    scale = fq.quantizer.scale.clone()
+
+    fq(torch.tensor([10.0, -10.0]))
+
+    assert torch.equal(fq.quantizer.scale, scale)
+    assert fq.observed_steps == 2
+
+
+def test_eval_mode_does_not_observe():
+    fq = FakeQuantize(SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding()))
+    fq.eval()
+    try:
+        fq(torch.randn(4))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+def test_state_dict_restores_params_and_warmup():
+    def make():
+        return FakeQuantize(
+            AsymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding()),
+            warmup_steps=2,
+        )
+
+    fq = make()
+    fq(torch.randn(16))
+    x = torch.randn(16)
+    expected = fq.eval()(x)
+
+    loaded = make()
+    loaded.load_state_dict(fq.state_dict())
+
+    assert loaded.observed_steps == 1
+    assert torch.equal(loaded.eval()(x), expected)
+
+    loaded.train()
+    loaded(torch.randn(16) * 10)
+    loaded(torch.randn(16) * 10)
+    assert loaded.observed_steps == 2
@@ -0,0 +1,95 @@
+import pytest
+import torch
+
+from inwhale.core.minifloat import (
+    FORMATS,
+    FP8Quantizer,
+    decode,
+    encode,
+    native_dtype,
+    round_and_encode,
+    round_to_format,
+)
+from inwhale.observers.minmax import MinMaxObserver, PerChannelMinMaxObserver
+from inwhale.rounding.floor_ceil import FloorRounding
+from inwhale.rounding.nearest import NearestRounding
+from inwhale.rounding.stochastic import StochasticRounding
+
+
+def test_known_bit_patterns():
+    e4m3, e5m2 = FORMATS["e4m3"], FORMATS["e5m2"]
+    values = torch.tensor([1.0, -2.0, 448.0, 2.0**-9, 0.0])
+
+    assert encode(values, e4m3).tolist() == [0x38, 0xC0, 0x7E, 0x01, 0x00]
+    assert encode(torch.tensor([1.0, 57344.0]), e5m2).tolist() == [0x3C, 0x7B]
+
+
+def test_every_code_round_trips():
+    for name in ("e4m3", "e5m2", "e2m1"):
+        fmt = FORMATS[name]
+        bits = 1 + fmt.exp_bits + fmt.man_bits
+        codes = torch.arange(1 << bits, dtype=torch.uint8)
+        values = decode(codes, fmt)
+        finite = values.abs() <= fmt.max_value
+
+        assert torch.equal(encode(values[finite], fmt), codes[finite])
+
+
+def test_rounding_strategies_on_the_grid():
+    fmt = FORMATS["e4m3"]
+    y = torch.tensor([1.06, 1.2, -3.3, 500.0, 1e-4])
+
+    nearest = round_to_format(y, fmt, NearestRounding())
+    floor = round_to_format(y, fmt, FloorRounding())
+
+    assert nearest.tolist() == [1.0, 1.25, -3.25, 448.0, 0.0]
+    assert floor.tolist() == [1.0, 1.125, -3.5, 448.0, 0.0]
+
+
+def test_round_and_encode_matches_two_pass():
+    torch.manual_seed(0)
+    y = torch.randn(4096) * torch.logspace(-4, 3, 4096)
+    y = torch.cat([y, torch.tensor([0.0, -0.0, 1e6, -1e6, 2.0**-10])])
+
+    for name in ("e4m3", "e5m2", "e3m2", "e2m3", "e2m1"):
+        fmt = FORMATS[name]
+        for rounding in (NearestRounding(), FloorRounding()):
+            expected = encode(round_to_format(y, fmt, rounding), fmt)
+            assert torch.equal(round_and_encode(y, fmt, rounding), expected)
+
+
+def test_fallback_matches_native_cast():
+    if native_dtype(FORMATS["e4m3"]) is None:
+        pytest.skip("torch build without float8 dtypes")
+    torch.manual_seed(0)
+    x = torch.randn(64, 64) * torch.logspace(-3, 2, 64)
+
+    for fmt in ("e4m3", "e5m2"):
+        native = FP8Quantizer(MinMaxObserver(), fmt=fmt)
+        fallback = FP8Quantizer(MinMaxObserver(), fmt=fmt, native=False)
+        assert torch.equal(native.quantize(x), fallback.quantize(x))
+
+
+def test_per_channel_round_trip():
+    torch.manual_seed(0)
+    w = torch.randn(16, 32) * torch.arange(1, 17).unsqueeze(1)
+    q = FP8Quantizer(PerChannelMinMaxObserver(dim=0), native=False)
+
+    codes = q.quantize(w)
+    dw = q.dequantize(codes)
+
+    assert codes.dtype == torch.uint8
+    assert q.scale.shape == (16, 1)
+    # 3 mantissa bits: relative error at most 2^-4 for normal values
+    assert torch.all((dw - w).abs() <= w.abs() * 2.0**-4 + q.scale * 2.0**-9)
+
+
+def test_stochastic_rounding_is_unbiased():
+    x = torch.full((20000,), 1.1)
+    x[0] = 448.0  # pins the scale to 1
+    q = FP8Quantizer(MinMaxObserver(), rounding=StochasticRounding(seed=0))
+
+    dx = q.dequantize(q.quantize(x))[1:]
+
+    assert set(dx.unique().tolist()) == {1.0, 1.125}
+    assert abs(float(dx.mean()) - 1.1) < 5e-3
@@ -0,0 +1,152 @@
+import torch
+
+from inwhale.core.groupwise import GroupwiseQuantizer
+from inwhale.observers.minmax import PerChannelMinMaxObserver
+from inwhale.rounding.nearest import NearestRounding
+
+
+def test_per_channel_observer_keeps_broadcastable_shape():
+    x = torch.tensor([[1.0, -2.0, 3.0], [0.5, 0.25, -0.75]])
+    obs = PerChannelMinMaxObserver(dim=0)
+    obs.observe(x)
+
+    min_val, max_val = obs.get_range()
+    assert min_val.shape == (2, 1)
+    assert torch.allclose(min_val.flatten(), torch.tensor([-2.0, -0.75]))
+    assert torch.allclose(max_val.flatten(), torch.tensor([3.0, 0.5]))
+
+
+def test_one_scale_per_group():
+    w = torch.randn(4, 16)
+    q = GroupwiseQuantizer(bits=4, rounding=NearestRounding(), group_size=8)
+
+    qx = q.quantize(w)
+
+    assert qx.shape == w.shape
+    assert q.scale.shape == (8, 1)
+    assert torch.all(qx >= q.qmin)
+    assert torch.all(qx <= q.qmax)
+
+
+def test_round_trip_error_bounded_by_group_scale():
+    torch.manual_seed(0)
+    w = torch.randn(8, 32)
+    q = GroupwiseQuantizer(bits=4, rounding=NearestRounding(), group_size=16)
+
+    dx = q.dequantize(q.quantize(w))
+
+    err = (dx - w).abs().reshape(-1, 16)
+    assert torch.all(err <= q.scale + 1e-6)
+
+
+def test_outlier_only_affects_its_group():
+    w = torch.randn(2, 16) * 0.1
+    w[0, 0] = 100.0
+    q = GroupwiseQuantizer(bits=8, rounding=NearestRounding(), group_size=8)
+
+    dx = q.dequantize(q.quantize(w))
+
+    # the groups without the outlier keep a fine step
+    assert torch.allclose(dx[1], w[1], atol=1e-2)
+    assert torch.allclose(dx[0, 8:], w[0, 8:], atol=1e-2)
+
+
+def test_constant_group_is_handled():
+    w = torch.cat([torch.full((8,), 0.5), torch.linspace(-1, 1, 8)])
+    q = GroupwiseQuantizer(bits=8, rounding=NearestRounding(), group_size=8)
+
+    dx = q.dequantize(q.quantize(w))
+
+    assert torch.isfinite(dx).all()
+    assert torch.allclose(dx[8:], w[8:], atol=1e-2)
+
+
+def test_group_size_must_divide_last_dim():
+    q = GroupwiseQuantizer(bits=4, rounding=NearestRounding(), group_size=5)
+    try:
+        q.quantize(torch.randn(3, 8))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_double_quant_stores_8bit_params_and_stays_close():
+    torch.manual_seed(0)
+    w = torch.randn(64, 256) * torch.linspace(0.1, 3.0, 64).unsqueeze(1)
+
+    plain = GroupwiseQuantizer(bits=4, rounding=NearestRounding(), group_size=64)
+    double = GroupwiseQuantizer(
+        bits=4,
+        rounding=NearestRounding(),
+        group_size=64,
+        double_quant=True,
+        scale_block=32,
+    )
+
+    plain_codes = plain.quantize(w)
+    double_codes = double.quantize(w)
+    plain_dx = plain.dequantize(plain_codes)
+    double_dx = double.dequantize(double_codes)
+
+    assert torch.equal(plain_codes, double_codes)
+    assert double.scale_codes.dtype == torch.uint8
+    assert double.scale_codes.shape == (256,)
+    assert double.zero_point_codes.dtype == torch.uint8
+    assert double.quantizer.scale is None
+
+    assert torch.equal(double.zero_point, plain.zero_point)
+    assert torch.allclose(double.scale, plain.scale, rtol=2e-2)
+    plain_err = (plain_dx - w).pow(2).mean()
+    double_err = (double_dx - w).pow(2).mean()
+    assert double_err < plain_err * 1.05
+
+
+def test_double_quant_fused_decode_matches_decoded_params():
+    torch.manual_seed(0)
+    w = torch.randn(5, 48)  # 15 groups, padded to whole scale blocks
+    q = GroupwiseQuantizer(
+        bits=3,
+        rounding=NearestRounding(),
+        group_size=16,
+        signed=True,
+        double_quant=True,
+        scale_block=4,
+    )
+
+    codes = q.quantize(w)
+    dx = q.dequantize(codes)
+
+    expected = (codes.reshape(-1, 16) - q.zero_point) * q.scale
+    assert q.scale.shape == (15, 1)
+    assert torch.allclose(dx, expected.reshape(5, 48), atol=1e-6)
+
+
+def test_double_quant_keeps_small_rows_relative_precision():
+    torch.manual_seed(0)
+    w = torch.randn(8, 64)
+    w[0] *= 1e-3  # tiny groups share a scale block with large ones
+
+    def row_error(double_quant):
+        q = GroupwiseQuantizer(
+            4, NearestRounding(), group_size=16, double_quant=double_quant
+        )
+        dx = q.dequantize(q.quantize(w))
+        assert torch.all(q.scale > 0)
+        return ((dx[0] - w[0]).norm() / w[0].norm()).item()
+
+    plain, double = row_error(False), row_error(True)
+
+    assert double < plain * 1.5
+
+
+def test_double_quant_keeps_identical_scales_exact():
+    w = torch.linspace(-1, 1, 8).repeat(4)
+    q = GroupwiseQuantizer(
+        bits=4, rounding=NearestRounding(), group_size=8, double_quant=True
+    )
+
+    dx = q.dequantize(q.quantize(w))
+
+    assert torch.allclose(q.scale, torch.full((4, 1), 2.0 / 15))
+    assert torch.allclose(dx, w, atol=2.0 / 15)
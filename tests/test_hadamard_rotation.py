@@ -0,0 +1,86 @@
+import torch
+from torch import nn
+
+from inwhale.core.hadamard import HadamardRotation, RotatedQuantizer, fwht
+from inwhale.core.uniform import SymmetricUniformQuantizer
+from inwhale.observers.minmax import MinMaxObserver
+from inwhale.ptq.folding import fold_rotation
+from inwhale.rounding.nearest import NearestRounding
+
+
+def sylvester(n):
+    h = torch.ones(1, 1)
+    while h.shape[0] < n:
+        h = torch.cat([torch.cat([h, h], 1), torch.cat([h, -h], 1)], 0)
+    return h
+
+
+def test_fwht_matches_hadamard_matmul():
+    torch.manual_seed(0)
+    x = torch.randn(5, 3, 64)
+
+    expected = x @ sylvester(64) / 8.0
+
+    assert torch.allclose(fwht(x), expected, atol=1e-5)
+    assert torch.allclose(fwht(fwht(x)), x, atol=1e-5)
+
+
+def test_non_power_of_two_uses_blocks():
+    torch.manual_seed(0)
+    x = torch.randn(4, 48)  # 3 blocks of 16
+
+    out = fwht(x)
+    blocks = x.reshape(4, 3, 16) @ sylvester(16) / 4.0
+
+    assert torch.allclose(out, blocks.reshape(4, 48), atol=1e-5)
+
+
+def test_rotation_is_orthogonal_and_invertible():
+    torch.manual_seed(0)
+    rotation = HadamardRotation(96, seed=3)
+    q = rotation.matrix()
+    x = torch.randn(10, 96)
+
+    assert torch.allclose(q @ q.t(), torch.eye(96), atol=1e-5)
+    assert torch.allclose(rotation.rotate(x), x @ q.t(), atol=1e-5)
+    assert torch.allclose(rotation.unrotate(rotation.rotate(x)), x, atol=1e-5)
+
+
+def test_rotation_tames_outliers():
+    torch.manual_seed(0)
+    w = torch.randn(64, 128)
+    w[:, 5] *= 50.0
+
+    def quantizer():
+        return SymmetricUniformQuantizer(4, MinMaxObserver(), NearestRounding())
+
+    plain = quantizer()
+    rotated = RotatedQuantizer(quantizer(), HadamardRotation(128))
+
+    plain_err = (plain.dequantize(plain.quantize(w)) - w).pow(2).mean()
+    rotated_err = (rotated.dequantize(rotated.quantize(w)) - w).pow(2).mean()
+
+    assert rotated_err < plain_err
+
+
+def test_fold_rotation_keeps_function():
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.Linear(8, 32), nn.Linear(32, 4))
+    x = torch.randn(6, 8)
+    reference = model(x)
+    rotation = HadamardRotation(32)
+
+    hidden = model[0](x)
+    fold_rotation(model[0], [model[1]], rotation)
+
+    assert torch.allclose(model(x), reference, atol=1e-5)
+    assert torch.allclose(model[0](x), rotation.rotate(hidden), atol=1e-5)
+
+
+def test_fold_rotation_needs_linear():
+    try:
+        fold_rotation(nn.LayerNorm(8), [nn.Linear(8, 4)], HadamardRotation(8))
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("Expected TypeError")
@@ -0,0 +1,93 @@
+import math
+
+import torch
+
+from inwhale.core.uniform import SymmetricUniformQuantizer
+from inwhale.observers.kl import KLDivergenceObserver, kl_divergences
+from inwhale.rounding.nearest import NearestRounding
+
+
+def reference_kl(hist, num_quant_bins):
+    # straightforward loop over candidates, one at a time
+    hist = hist.double().tolist()
+    out = []
+    for i in range(num_quant_bins, len(hist) + 1):
+        p = hist[:i]
+        p[-1] += sum(hist[i:])
+
+        q = [0.0] * i
+        for g in range(num_quant_bins):
+            start = math.ceil(g * i / num_quant_bins)
+            end = math.ceil((g + 1) * i / num_quant_bins)
+            group = hist[start:end]
+            filled = sum(1 for h in group if h > 0)
+            for j in range(start, end):
+                if hist[j] > 0:
+                    q[j] = sum(group) / filled
+
+        p_total, q_total = sum(p), sum(q)
+        kl = 0.0
+        for pj, qj in zip(p, q):
+            if pj > 0:
+                pj /= p_total
+                qj = max(qj / q_total if q_total > 0 else 0.0, 1e-12)
+                kl += pj * math.log(pj / qj)
+        out.append(kl)
+    return torch.tensor(out, dtype=torch.float64)
+
+
+def test_vectorized_matches_loop():
+    torch.manual_seed(0)
+    hist = torch.randint(0, 20, (40,)).float()
+    hist[5] = 0
+    hist[-3:] = 0
+
+    candidates, divergences = kl_divergences(hist, 8)
+
+    assert candidates.tolist() == list(range(8, 41))
+    assert torch.allclose(divergences, reference_kl(hist, 8), atol=1e-9)
+
+
+def test_threshold_clips_outliers():
+    torch.manual_seed(0)
+    x = torch.randn(10000)
+    x[0] = 50.0
+
+    obs = KLDivergenceObserver(bits=8, num_bins=2048)
+    obs.observe(x)
+    min_val, max_val = obs.get_range()
+
+    assert torch.allclose(min_val, -max_val)
+    assert 2.0 < max_val < 50.0
+
+
+def test_rebin_keeps_total_count():
+    obs = KLDivergenceObserver(bits=4, num_bins=64)
+    obs.observe(torch.rand(1000))
+    obs.observe(torch.rand(500) * 4.0)
+
+    assert obs.abs_max > 3.0
+    assert obs.hist.sum() == 1500
+
+
+def test_plugs_into_quantizer():
+    torch.manual_seed(0)
+    x = torch.randn(4096)
+    obs = KLDivergenceObserver(bits=8)
+    q = SymmetricUniformQuantizer(bits=8, observer=obs, rounding=NearestRounding())
+
+    qx = q.quantize(x)
+
+    assert torch.all(qx >= q.qmin)
+    assert torch.all(qx <= q.qmax)
+    _, max_val = obs.get_range()
+    assert torch.allclose(q.scale, max_val / q.qmax)
+
+
+def test_get_range_before_observe():
+    try:
+        KLDivergenceObserver().get_range()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
@@ -0,0 +1,133 @@
+import math
+
+import torch
+
+from inwhale.core.packing import pack_int4, unpack_int4
+from inwhale.llm.kv_cache import PagedKVCache
+
+
+def reference_attention(query, key, value):
+    scores = query @ key.transpose(-1, -2) / math.sqrt(query.shape[-1])
+    return torch.softmax(scores, dim=-1) @ value
+
+
+def test_int4_pack_round_trip():
+    codes = torch.randint(0, 16, (3, 8))
+    packed = pack_int4(codes)
+
+    assert packed.shape == (3, 4)
+    assert torch.equal(unpack_int4(packed).long(), codes)
+
+
+def test_read_back_close_to_original():
+    torch.manual_seed(0)
+    cache = PagedKVCache(num_pages=8, page_size=4, num_heads=2, head_dim=16)
+    cache.add_sequence("a")
+    key, value = torch.randn(2, 10, 16), torch.randn(2, 10, 16)
+
+    cache.append("a", key, value)
+    k, v = cache.read("a")
+
+    assert k.shape == (2, 10, 16)
+    assert cache.length("a") == 10
+    assert len(cache.block_tables["a"]) == 3
+    assert torch.allclose(k, key, atol=0.02)
+    assert torch.allclose(v, value, atol=0.02)
+
+
+def test_appending_does_not_requantize_old_tokens():
+    torch.manual_seed(0)
+    cache = PagedKVCache(num_pages=4, page_size=4, num_heads=1, head_dim=8, bits=4)
+    cache.add_sequence(0)
+
+    cache.append(0, torch.randn(1, 3, 8), torch.randn(1, 3, 8))
+    before, _ = cache.read(0)
+    cache.append(0, torch.randn(1, 2, 8) * 100, torch.randn(1, 2, 8))
+    after, _ = cache.read(0)
+
+    assert torch.equal(after[:, :3], before)
+
+
+def test_sequences_share_the_pool():
+    cache = PagedKVCache(num_pages=4, page_size=2, num_heads=1, head_dim=4)
+    cache.add_sequence("a")
+    cache.add_sequence("b")
+    a = torch.ones(1, 3, 4)
+    b = -torch.ones(1, 3, 4)
+
+    cache.append("a", a, a)
+    cache.append("b", b, b)
+
+    assert torch.allclose(cache.read("a")[0], a, atol=1e-2)
+    assert torch.allclose(cache.read("b")[0], b, atol=1e-2)
+
+    try:
+        cache.append("a", a, a)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+
+    cache.free("b")
+    cache.append("a", a, a)
+    assert cache.length("a") == 6
+
+
+def test_bad_shapes_take_no_pages():
+    cache = PagedKVCache(num_pages=4, page_size=2, num_heads=2, head_dim=4)
+    cache.add_sequence("a")
+    good = torch.randn(2, 3, 4)
+
+    for key, value in (
+        (torch.randn(3, 2, 4), torch.randn(3, 2, 4)),
+        (good, torch.randn(2, 3, 8)),
+        (good, torch.randn(2, 5, 4)),
+    ):
+        try:
+            cache.append("a", key, value)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+
+    assert len(cache.free_pages) == 4 and cache.length("a") == 0
+    cache.append("a", good, good)
+    assert len(cache.free_pages) == 2
+
+
+def test_attention_matches_reference():
+    torch.manual_seed(0)
+    for bits, atol in ((8, 0.02), (4, 0.2)):
+        cache = PagedKVCache(
+            num_pages=16, page_size=8, num_heads=4, head_dim=32, bits=bits, group_size=8
+        )
+        cache.add_sequence(0)
+        key, value = torch.randn(4, 40, 32), torch.randn(4, 40, 32)
+        for start in range(0, 40, 7):
+            cache.append(0, key[:, start : start + 7], value[:, start : start + 7])
+
+        query = torch.randn(4, 1, 32)
+        out = cache.attention(0, query)
+
+        assert torch.allclose(out, reference_attention(query, key, value), atol=atol)
+
+
+def test_causal_attention():
+    torch.manual_seed(0)
+    cache = PagedKVCache(num_pages=4, page_size=4, num_heads=1, head_dim=8)
+    cache.add_sequence(0)
+    key, value = torch.randn(1, 6, 8), torch.randn(1, 6, 8)
+    cache.append(0, key, value)
+
+    query = torch.randn(1, 2, 8)
+    out = cache.attention(0, query, causal=True)
+
+    first = reference_attention(query[:, :1], key[:, :5], value[:, :5])
+    assert torch.allclose(out[:, :1], first, atol=0.02)
+
+
+def test_int4_uses_half_the_code_memory():
+    c8 = PagedKVCache(num_pages=2, page_size=4, num_heads=1, head_dim=16, bits=8)
+    c4 = PagedKVCache(num_pages=2, page_size=4, num_heads=1, head_dim=16, bits=4)
+
+    assert c4.key_codes.numel() * 2 == c8.key_codes.numel()
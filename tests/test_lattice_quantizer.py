@@ -0,0 +1,94 @@
+import itertools
+
+import torch
+
+from inwhale.core.lattice import LatticeQuantizer, closest_dn, closest_e8
+from inwhale.core.uniform import SymmetricUniformQuantizer
+from inwhale.observers.minmax import MinMaxObserver, PerChannelMinMaxObserver
+from inwhale.rounding.nearest import NearestRounding
+
+
+def brute_force(x, points):
+    return (torch.cdist(x, points) ** 2).min(dim=1).values
+
+
+def test_closest_d4_matches_brute_force():
+    torch.manual_seed(0)
+    grid = torch.tensor(list(itertools.product(range(-3, 4), repeat=4))).float()
+    d4 = grid[grid.sum(dim=1) % 2 == 0]
+    x = torch.rand(500, 4) * 4 - 2
+
+    found = closest_dn(x)
+
+    assert torch.all(found.sum(dim=1) % 2 == 0)
+    assert torch.allclose((x - found).pow(2).sum(1), brute_force(x, d4), atol=1e-5)
+
+
+def test_closest_e8_matches_brute_force():
+    torch.manual_seed(0)
+    ints = torch.tensor(list(itertools.product(range(-1, 2), repeat=8))).float()
+    halves = torch.tensor(list(itertools.product((-1.5, -0.5, 0.5, 1.5), repeat=8)))
+    grid = torch.cat([ints, halves])
+    e8 = grid[grid.sum(dim=1) % 2 == 0]
+    x = torch.rand(200, 8) - 0.5
+
+    found = closest_e8(x)
+
+    assert torch.allclose((x - found).pow(2).sum(1), brute_force(x, e8), atol=1e-5)
+
+
+def test_round_trip_and_compact_indices():
+    torch.manual_seed(0)
+    w = torch.randn(16, 64)
+
+    e8 = LatticeQuantizer(2, MinMaxObserver(), lattice="e8")
+    d4 = LatticeQuantizer(2, PerChannelMinMaxObserver(dim=0), lattice="d4")
+
+    e8_codes = e8.quantize(w)
+    d4_codes = d4.quantize(w)
+
+    assert e8_codes.shape == (16, 8) and e8_codes.dtype == torch.int32
+    assert d4_codes.shape == (16, 16) and d4_codes.dtype == torch.uint8
+    assert d4.scale.shape == (16, 1)
+
+    points = e8.decode(e8_codes)
+    assert points.shape == w.shape
+    assert torch.all((points * 2) == torch.round(points * 2))
+    assert torch.allclose(e8.dequantize(e8_codes), points * e8.scale)
+    assert d4.dequantize(d4_codes).shape == w.shape
+
+
+def test_e8_beats_scalar_rounding_at_same_scale():
+    torch.manual_seed(0)
+    w = torch.randn(256, 256)
+
+    scalar = SymmetricUniformQuantizer(3, MinMaxObserver(), NearestRounding())
+    e8 = LatticeQuantizer(3, MinMaxObserver(), lattice="e8")
+
+    scalar_err = (scalar.dequantize(scalar.quantize(w)) - w).pow(2).mean()
+    e8_err = (e8.dequantize(e8.quantize(w)) - w).pow(2).mean()
+
+    assert e8_err < scalar_err
+
+
+def test_block_size_must_divide_last_dim():
+    q = LatticeQuantizer(2, MinMaxObserver(), lattice="e8")
+    try:
+        q.quantize(torch.randn(4, 12))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Expected ValueError")
+
+
+def test_e8_boundary_blocks_stay_within_one_step():
+    torch.manual_seed(0)
+    # many coordinates at or near the edges of the cube
+    w = torch.randn(512, 64).clamp(-1.5, 1.5)
+    q = LatticeQuantizer(2, MinMaxObserver(), lattice="e8")
+
+    points = q.decode(q.quantize(w))
+    y = torch.clamp(w / q.scale, q.qmin, q.qmax)
+
+    assert points.min() >= q.qmin and points.max() <= q.qmax
+    assert (points - y).abs().max() <= 1.0 + 1e-5
@@ -0,0 +1,85 @@
+import torch
+from torch import nn
+
+from inwhale.core.groupwise import GroupwiseQuantizer
+from inwhale.ptq.lazy import DequantCache, LazyQuantizedLinear, quantize_lazy
+from inwhale.rounding.nearest import NearestRounding
+
+
+def test_dequantized_weight_matches_groupwise_quantizer():
+    linear = nn.Linear(32, 8)
+    layer = LazyQuantizedLinear(linear, bits=4, group_size=16)
+
+    q = GroupwiseQuantizer(4, NearestRounding(), group_size=16)
+    expected = q.dequantize(q.quantize(linear.weight.detach()))
+
+    assert layer.weight_codes.dtype == torch.uint8
+    assert layer.weight_codes.shape == (8, 16)  # two 4-bit codes per byte
+    assert torch.allclose(layer.dequantize_weight(), expected, atol=1e-6)
+
+
+def test_forward_close_to_float_linear():
+    torch.manual_seed(0)
+    linear = nn.Linear(64, 16)
+    x = torch.randn(3, 64)
+
+    out = LazyQuantizedLinear(linear, bits=8)(x)
+
+    assert torch.allclose(out, linear(x), atol=0.05)
+
+
+def test_cache_budget_and_lru():
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.Linear(16, 16), nn.Linear(16, 16), nn.Linear(16, 16))
+    x = torch.randn(2, 16)
+    expected = model(x)
+
+    # room for two 16x16 float32 weights
+    quantize_lazy(model, bits=8, max_bytes=2 * 16 * 16 * 4)
+    cache = model[0].cache
+
+    out = model(x)
+    assert torch.allclose(out, expected, atol=0.1)
+    assert cache.misses == 3
+    assert len(cache.weights) == 2
+    assert model[0] not in cache.weights
+    assert cache.nbytes <= cache.max_bytes
+
+    model[2](x)
+    assert cache.hits == 1
+
+
+def test_zero_budget_keeps_nothing():
+    model = quantize_lazy(nn.Sequential(nn.Linear(8, 8)), max_bytes=0)
+    model(torch.randn(1, 8))
+    assert len(model[0].cache.weights) == 0
+
+
+def test_prefetch_loads_next_layer():
+    model = nn.Sequential(nn.Linear(8, 8), nn.ReLU(), nn.Linear(8, 8))
+    cache = DequantCache(prefetch=True)
+    quantize_lazy(model, bits=4, cache=cache)
+
+    cache.get(model[0])
+    cache.close()
+
+    assert model[2] in cache.weights
+    model(torch.randn(2, 8))
+    assert cache.hits >= 1
+
+
+def test_cached_weight_follows_dtype_and_moves():
+    model = quantize_lazy(nn.Sequential(nn.Linear(8, 8)), bits=8)
+    layer, cache = model[0], model[0].cache
+
+    model(torch.randn(2, 8))
+    assert cache.weights[layer].dtype == torch.float32
+
+    out = model(torch.randn(2, 8, dtype=torch.float64))
+    assert out.dtype == torch.float64
+    assert cache.weights[layer].dtype == torch.float64
+    model(torch.randn(2, 8, dtype=torch.float64))
+    assert cache.hits == 1
+
+    model.to("cpu")
+    assert layer not in cache.weights and cache.nbytes == 0
@@ -0,0 +1,116 @@
+import torch
+from torch import nn
+
+from inwhale.core.uniform import SymmetricUniformQuantizer
+from inwhale.observers.minmax import PerChannelMinMaxObserver
+from inwhale.ptq.lowrank import (
+    LowRankQuantizedLinear,
+    choose_rank,
+    quantize_low_rank,
+    randomized_svd,
+)
+from inwhale.rounding.nearest import NearestRounding
+
+
+def low_rank_linear(out_features=96, in_features=128, rank=8, noise=1e-3):
+    torch.manual_seed(0)
+    linear = nn.Linear(in_features, out_features)
+    with torch.no_grad():
+        weight = torch.randn(out_features, rank) @ torch.randn(rank, in_features)
+        linear.weight.copy_(weight + noise * torch.randn_like(weight))
+    return linear
+
+
+def quantizer(bits):
+    return lambda: SymmetricUniformQuantizer(
+        bits, PerChannelMinMaxObserver(dim=0), NearestRounding()
+    )
+
+
+def test_randomized_svd_matches_full_svd():
+    weight = low_rank_linear().weight.detach()
+    generator = torch.Generator().manual_seed(0)
+
+    u, s, vh = randomized_svd(weight, 8, generator=generator)
+    expected = torch.linalg.svdvals(weight)[:8]
+
+    assert u.shape == (96, 8) and vh.shape == (8, 128)
+    assert torch.allclose(s, expected, rtol=1e-3)
+    assert torch.allclose(u.t() @ u, torch.eye(8), atol=1e-4)
+
+
+def test_choose_rank_from_budgets():
+    s = torch.tensor([4.0, 2.0, 1.0, 0.5])
+    norm = s.pow(2).sum().sqrt()
+
+    assert choose_rank(s, norm, (10, 10)) == 4
+    assert choose_rank(s, norm, (10, 10), max_error=0.3) == 2
+    # two rank-1 factors of 8-bit codes = 20 bytes
+    assert choose_rank(s, norm, (10, 10), max_error=0.01, max_bytes=40) == 2
+
+
+def test_error_budget_finds_true_rank_and_keeps_function():
+    linear = low_rank_linear()
+    x = torch.randn(16, 128)
+
+    layer = LowRankQuantizedLinear(linear, max_error=0.01)
+
+    assert layer.rank == 8
+    reference = linear(x)
+    err = (layer(x) - reference).pow(2).mean() / reference.pow(2).mean()
+    assert err < 1e-3
+    expected = x @ layer.dequantize_weight().t() + linear.bias
+    assert torch.allclose(layer(x), expected, atol=1e-3)
+
+
+def test_quantized_residual_reduces_error():
+    linear = low_rank_linear(noise=0.5)
+    weight = linear.weight.detach()
+
+    plain = LowRankQuantizedLinear(linear, rank=4, quantizer=quantizer(4))
+    with_residual = LowRankQuantizedLinear(
+        linear, rank=4, quantizer=quantizer(4), residual_quantizer=quantizer(2)
+    )
+
+    plain_err = (plain.dequantize_weight() - weight).pow(2).mean()
+    residual_err = (with_residual.dequantize_weight() - weight).pow(2).mean()
+    assert residual_err < plain_err
+
+
+def test_quantize_low_rank_replaces_linears():
+    model = nn.Sequential(low_rank_linear(), nn.ReLU(), nn.Linear(96, 32))
+
+    quantize_low_rank(model, max_bytes=4096)
+
+    assert isinstance(model[0], LowRankQuantizedLinear)
+    assert isinstance(model[2], LowRankQuantizedLinear)
+    assert model[0].rank <= 4096 // (96 + 128)
+    assert model(torch.randn(3, 128)).shape == (3, 32)
+
+
+def test_codes_and_scales_are_buffers():
+    a = LowRankQuantizedLinear(low_rank_linear(), rank=4)
+    b = LowRankQuantizedLinear(nn.Linear(128, 96), rank=4)
+    x = torch.randn(3, 128)
+
+    keys = set(a.state_dict())
+    assert {"left_codes", "left_scale", "right_codes", "right_scale"} <= keys
+
+    b.load_state_dict(a.state_dict())
+    assert torch.equal(b(x), a(x))
+
+    a.to(torch.float64)
+    assert a.left_scale.dtype == torch.float64
+
+
+def test_residual_state_dict_round_trip():
+    linear = low_rank_linear(noise=0.5)
+    kwargs = dict(rank=4, quantizer=quantizer(4), residual_quantizer=quantizer(2))
+    a = LowRankQuantizedLinear(linear, **kwargs)
+    b = LowRankQuantizedLinear(nn.Linear(128, 96), **kwargs)
+    x = torch.randn(3, 128)
+
+    assert {"residual_codes", "residual_scale"} <= set(a.state_dict())
+
+    b.load_state_dict(a.state_dict())
+    assert torch.equal(b(x), a(x))
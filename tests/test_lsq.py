@@ -0,0 +1,138 @@
+import math
+
+import torch
+
+from inwhale.core.uniform import AsymmetricUniformQuantizer, SymmetricUniformQuantizer
+from inwhale.observers.minmax import MinMaxObserver, PerChannelMinMaxObserver
+from inwhale.qat.lsq import LSQQuantizer
+from inwhale.rounding.nearest import NearestRounding
+from inwhale.rounding.stochastic import StochasticRounding
+
+
+def reference_lsq(x, scale, zero_point, qmin, qmax):
+    # the LSQ paper's reference formulation, built from differentiable ops
+    n = x.numel() / scale.numel()
+    g = 1.0 / math.sqrt(n * qmax)
+
+    s = scale * g + (scale - scale * g).detach()
+    z = zero_point * g + (zero_point - zero_point * g).detach()
+
+    v = torch.clamp(x / s + z, qmin, qmax)
+    v = v + (torch.round(v) - v).detach()
+    return (v - z) * s
+
+
+def test_initialized_from_observer():
+    x = torch.randn(64)
+    quantizer = SymmetricUniformQuantizer(4, MinMaxObserver(), NearestRounding())
+    lsq = LSQQuantizer(quantizer)
+
+    lsq(x)
+
+    assert isinstance(lsq.scale, torch.nn.Parameter)
+    assert torch.allclose(lsq.scale, x.abs().max() / 7)
+    assert lsq.zero_point is None
+
+
+def test_lsq_gradients_match_reference():
+    torch.manual_seed(0)
+    x = torch.randn(256) * 2
+    lsq = LSQQuantizer(SymmetricUniformQuantizer(4, MinMaxObserver(), NearestRounding()))
+    lsq.initialize(x)
+    with torch.no_grad():
+        lsq.scale.mul_(0.5)  # force some clipping
+
+    x1 = x.clone().requires_grad_()
+    lsq(x1).pow(2).sum().backward()
+
+    x2 = x.clone().requires_grad_()
+    scale = lsq.scale.detach().clone().requires_grad_()
+    reference_lsq(x2, scale, torch.zeros(()), -8, 7).pow(2).sum().backward()
+
+    assert torch.allclose(x1.grad, x2.grad)
+    assert torch.allclose(lsq.scale.grad, scale.grad, rtol=1e-4)
+
+
+def test_lsq_plus_per_channel_gradients_match_reference():
+    torch.manual_seed(0)
+    x = torch.randn(4, 32) + torch.arange(4.0).unsqueeze(1)
+    quantizer = AsymmetricUniformQuantizer(
+        4, PerChannelMinMaxObserver(dim=0), NearestRounding()
+    )
+    lsq = LSQQuantizer(quantizer)
+    lsq.initialize(x)
+    with torch.no_grad():
+        lsq.scale.mul_(0.7)
+
+    assert lsq.scale.shape == (4, 1)
+    assert lsq.zero_point.shape == (4, 1)
+
+    x1 = x.clone().requires_grad_()
+    lsq(x1).pow(2).sum().backward()
+
+    x2 = x.clone().requires_grad_()
+    scale = lsq.scale.detach().clone().requires_grad_()
+    zero_point = lsq.zero_point.detach().clone().requires_grad_()
+    reference_lsq(x2, scale, zero_point, 0, 15).pow(2).sum().backward()
+
+    assert torch.allclose(x1.grad, x2.grad)
+    assert torch.allclose(lsq.scale.grad, scale.grad, rtol=1e-4, atol=1e-6)
+    assert torch.allclose(lsq.zero_point.grad, zero_point.grad, rtol=1e-4, atol=1e-6)
+
+
+def test_stochastic_rounding_backward_uses_forward_codes():
+    x = torch.randn(128, requires_grad=True)
+    lsq = LSQQuantizer(
+        SymmetricUniformQuantizer(4, MinMaxObserver(), StochasticRounding(seed=0))
+    )
+
+    lsq(x).sum().backward()
+
+    assert torch.isfinite(lsq.scale.grad)
+
+
+def test_scale_is_learned():
+    torch.manual_seed(0)
+    x = torch.randn(1024)
+    lsq = LSQQuantizer(SymmetricUniformQuantizer(3, MinMaxObserver(), NearestRounding()))
+    lsq.initialize(x)
+    optimizer = torch.optim.SGD(lsq.parameters(), lr=1.0)
+
+    def loss():
+        return (lsq(x) - x).pow(2).mean()
+
+    before = loss().item()
+    for _ in range(100):
+        optimizer.zero_grad()
+        loss().backward()
+        optimizer.step()
+
+    assert loss().item() < before
+
+
+def test_optimizer_built_before_first_forward():
+    torch.manual_seed(0)
+    x = torch.randn(4, 64) * torch.arange(1.0, 5.0).unsqueeze(1)
+    quantizer = AsymmetricUniformQuantizer(
+        3, PerChannelMinMaxObserver(dim=0), NearestRounding()
+    )
+    lsq = LSQQuantizer(quantizer)
+    params = list(lsq.parameters())
+    optimizer = torch.optim.Adam(params, lr=1e-2)
+
+    (lsq(x) - x).pow(2).mean().backward()
+    initial = lsq.scale.detach().clone()
+    optimizer.step()
+
+    assert params[0] is lsq.scale and params[1] is lsq.zero_point
+    assert lsq.scale.shape == (4, 1)
+    assert not torch.equal(lsq.scale, initial)
+
+    loaded = LSQQuantizer(
+        AsymmetricUniformQuantizer(
+            3, PerChannelMinMaxObserver(dim=0), NearestRounding()
+        )
+    )
+    loaded.load_state_dict(lsq.state_dict())
+    assert torch.equal(loaded.scale, lsq.scale)
+    assert torch.equal(loaded(x), lsq(x))
@@ -0,0 +1,146 @@
+import itertools
+
+import torch
+from torch import nn
+
+from inwhale.ptq.mixed_precision import MixedPrecisionAllocator, fingerprint
+
+
+def make_model():
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.Linear(16, 32), nn.ReLU(), nn.Linear(32, 8))
+    with torch.no_grad():
+        # heavy-tailed layer: suffers much more at low bits
+        model[2].weight[0, 0] = 5.0
+    return model
+
+
+def brute_force(alloc, curves, costs, budget):
+    names = list(curves)
+    best, best_err = None, float("inf")
+    for combo in itertools.product(alloc.bits, repeat=len(names)):
+        cost = sum(costs[n][b] for n, b in zip(names, combo))
+        err = sum(curves[n][b] for n, b in zip(names, combo))
+        if cost <= budget and err < best_err:
+            best, best_err = dict(zip(names, combo)), err
+    return best
+
+
+def test_fingerprint_is_content_based():
+    a = torch.randn(4, 4)
+    assert fingerprint(a) == fingerprint(a.clone())
+    assert fingerprint(a) != fingerprint(a + 1)
+
+
+def test_weight_curves_decrease_with_bits():
+    alloc = MixedPrecisionAllocator()
+    curves = alloc.measure(make_model())
+
+    assert set(curves) == {"0", "2"}
+    for curve in curves.values():
+        errors = [curve[b] for b in alloc.bits]
+        assert errors == sorted(errors, reverse=True)
+
+
+def test_knapsack_matches_brute_force_and_fits():
+    alloc = MixedPrecisionAllocator()
+    model = make_model()
+    curves = alloc.measure(model)
+    costs = alloc.sizes(model)
+
+    for budget in (200, 300, 500):
+        plan = alloc.allocate(curves, costs, budget)
+        assert sum(costs[n][b] for n, b in plan.items()) <= budget
+        assert plan == brute_force(alloc, curves, costs, budget)
+
+
+def test_greedy_fits_budget():
+    alloc = MixedPrecisionAllocator()
+    model = make_model()
+    curves = alloc.measure(model)
+    costs = alloc.sizes(model)
+
+    plan = alloc.allocate(curves, costs, 300, method="greedy")
+    assert sum(costs[n][b] for n, b in plan.items()) <= 300
+
+
+def test_budget_too_small():
+    alloc = MixedPrecisionAllocator()
+    model = make_model()
+    try:
+        alloc.allocate(alloc.measure(model), alloc.sizes(model), 10)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_curves_are_cached_on_disk(tmp_path):
+    model = make_model()
+    alloc = MixedPrecisionAllocator(cache_dir=str(tmp_path))
+    first = alloc.measure(model)
+    assert len(list(tmp_path.iterdir())) == 2
+
+    alloc._weight_errors = None  # would fail if anything were re-measured
+    assert alloc.measure(model) == first
+
+    with torch.no_grad():
+        model[0].weight.mul_(2.0)
+    alloc = MixedPrecisionAllocator(cache_dir=str(tmp_path))
+    alloc.measure(model)
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def test_output_cache_sees_other_layers_and_loss(tmp_path):
+    model = make_model()
+    batches = [torch.randn(4, 16) for _ in range(2)]
+    alloc = MixedPrecisionAllocator(proxy="output", cache_dir=str(tmp_path))
+    alloc.measure(model, batches)
+    assert len(list(tmp_path.iterdir())) == 2
+
+    # layer "2" is unchanged, but its inputs now come from a different layer "0"
+    with torch.no_grad():
+        model[0].weight.mul_(2.0)
+    alloc.measure(model, batches)
+    assert len(list(tmp_path.iterdir())) == 4
+
+    def loss_a(model, batch):
+        return model(batch).pow(2).mean()
+
+    def loss_b(model, batch):
+        return model(batch).abs().mean()
+
+    hessian = MixedPrecisionAllocator(
+        proxy="hessian", num_probes=1, cache_dir=str(tmp_path)
+    )
+    hessian.measure(model, batches, loss_a)
+    hessian.measure(model, batches, loss_b)
+    assert len(list(tmp_path.iterdir())) == 8
+
+
+def test_output_and_hessian_proxies():
+    model = make_model()
+    batches = [torch.randn(4, 16) for _ in range(2)]
+
+    output = MixedPrecisionAllocator(proxy="output").measure(model, batches)
+    assert output["0"][2] > output["0"][8] > 0
+
+    def loss_fn(model, batch):
+        return model(batch).pow(2).mean()
+
+    hessian = MixedPrecisionAllocator(proxy="hessian", num_probes=2)
+    curves = hessian.measure(model, batches, loss_fn)
+    assert curves["2"][2] > curves["2"][8]
+
+
+def test_data_key_hashed_once_while_unchanged():
+    model = make_model()
+    batches = [torch.randn(4, 16) for _ in range(2)]
+    alloc = MixedPrecisionAllocator(proxy="output")
+
+    first = alloc._data_key(model, batches, None)
+    assert alloc._data_key(model, batches, None) is first
+
+    with torch.no_grad():
+        model[0].weight.mul_(2.0)
+    assert alloc._data_key(model, batches, None) != first
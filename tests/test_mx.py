@@ -0,0 +1,74 @@
+import torch
+
+from inwhale.core.mx import MXQuantizer
+from inwhale.core.packing import pack_int6, unpack_int6
+from inwhale.core.uniform import SymmetricUniformQuantizer
+from inwhale.observers.minmax import MinMaxObserver
+from inwhale.rounding.nearest import NearestRounding
+
+
+def weights():
+    torch.manual_seed(0)
+    w = torch.randn(8, 256)
+    w[:, 7] *= 100.0  # one outlier column
+    return w
+
+
+def test_int6_packing_round_trip():
+    codes = torch.randint(0, 64, (3, 32), dtype=torch.uint8)
+
+    packed = pack_int6(codes)
+
+    assert packed.shape == (3, 24)
+    assert torch.equal(unpack_int6(packed), codes)
+
+
+def test_packed_shapes_and_shared_exponents():
+    w = weights()
+    for fmt, width in (("mxfp4", 16), ("mxfp6_e2m3", 24), ("mxfp8_e4m3", 32)):
+        q = MXQuantizer(fmt)
+        codes = q.quantize(w)
+
+        assert codes.dtype == torch.uint8
+        assert codes.shape == (8, 8, width)
+        assert q.shared_exponent.shape == (8, 8, 1)
+        assert q.dequantize(codes).shape == w.shape
+
+
+def test_shared_exponent_puts_block_max_in_top_binade():
+    x = torch.zeros(1, 32)
+    x[0, 3] = 5.0  # 5 = 1.25 * 2^2
+    q = MXQuantizer("mxfp8_e4m3")
+
+    q.quantize(x)
+
+    # floor(log2(5)) - 8 = -6, biased by 127
+    assert q.shared_exponent.item() == 121
+    assert torch.equal(q.dequantize(q.quantize(x)), x)
+
+
+def test_mxint8_and_exact_values():
+    x = torch.tensor([[1.0, -0.5, 0.25, 1.5] * 8])
+    q = MXQuantizer("mxint8")
+
+    assert torch.equal(q.dequantize(q.quantize(x)), x)
+
+
+def test_block_scales_beat_per_tensor_scale():
+    w = weights()
+    mx = MXQuantizer("mxfp4")
+    per_tensor = SymmetricUniformQuantizer(4, MinMaxObserver(), NearestRounding())
+
+    mx_err = (mx.dequantize(mx.quantize(w)) - w).pow(2).mean()
+    tensor_err = (per_tensor.dequantize(per_tensor.quantize(w)) - w).pow(2).mean()
+
+    assert mx_err < tensor_err
+
+
+def test_block_size_must_divide_last_dim():
+    try:
+        MXQuantizer("mxfp4").quantize(torch.randn(2, 40))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Expected ValueError")
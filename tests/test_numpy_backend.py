@@ -0,0 +1,215 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+import torch
+
+from inwhale.backend import NumpyBackend, TorchBackend, get_backend
+from inwhale.core.groupwise import GroupwiseQuantizer
+from inwhale.core.non_uniform import LogarithmicQuantizer
+from inwhale.core.uniform import (
+    AsymmetricUniformQuantizer,
+    DeadZoneSymmetricQuantizer,
+    MidRiseUniformQuantizer,
+    MidTreadUniformQuantizer,
+    SymmetricUniformQuantizer,
+)
+from inwhale.observers.kl import KLDivergenceObserver
+from inwhale.observers.minmax import MinMaxObserver, PerChannelMinMaxObserver
+from inwhale.observers.percentile import PercentileObserver
+from inwhale.rounding.bankers import BankersRounding
+from inwhale.rounding.floor_ceil import CeilRounding, FloorRounding
+from inwhale.rounding.nearest import NearestRounding
+from inwhale.rounding.round_away_zero import RoundAwayFromZero
+from inwhale.rounding.stochastic import StochasticRounding
+from inwhale.rounding.truncation import TruncationRounding
+
+np = pytest.importorskip("numpy")
+
+
+def sample(shape=(16, 64), seed=0):
+    g = torch.Generator().manual_seed(seed)
+    x = torch.randn(shape, generator=g) * 3.0
+    return x, x.numpy().copy()
+
+
+def test_get_backend():
+    x, x_np = sample()
+    assert isinstance(get_backend(x), TorchBackend)
+    assert isinstance(get_backend(x_np), NumpyBackend)
+    assert isinstance(get_backend(1.0), NumpyBackend)
+
+
+@pytest.mark.parametrize(
+    "rounding_cls",
+    [
+        NearestRounding,
+        BankersRounding,
+        FloorRounding,
+        CeilRounding,
+        RoundAwayFromZero,
+        TruncationRounding,
+    ],
+)
+def test_rounding_bit_identical(rounding_cls):
+    x, x_np = sample()
+    x = torch.cat([x.flatten(), torch.tensor([0.5, 1.5, -2.5, 0.0])])
+    x_np = x.numpy().copy()
+
+    out = rounding_cls().round(x_np)
+    assert isinstance(out, np.ndarray)
+    assert np.array_equal(out, rounding_cls().round(x).numpy())
+
+
+@pytest.mark.parametrize(
+    "make",
+    [
+        lambda obs: SymmetricUniformQuantizer(8, obs, NearestRounding()),
+        lambda obs: SymmetricUniformQuantizer(4, obs, BankersRounding()),
+        lambda obs: AsymmetricUniformQuantizer(8, obs, NearestRounding()),
+        lambda obs: DeadZoneSymmetricQuantizer(4, obs, NearestRounding()),
+        lambda obs: MidTreadUniformQuantizer(3, obs, NearestRounding()),
+        lambda obs: MidRiseUniformQuantizer(3, obs, FloorRounding()),
+    ],
+)
+def test_uniform_quantizers_bit_identical(make):
+    x, x_np = sample()
+
+    q_torch = make(MinMaxObserver())
+    q_np = make(MinMaxObserver())
+
+    qx = q_torch.quantize(x)
+    qx_np = q_np.quantize(x_np)
+
+    assert isinstance(qx_np, np.ndarray)
+    assert qx_np.dtype == np.float32
+    assert np.array_equal(qx_np, qx.numpy())
+    assert np.array_equal(q_np.dequantize(qx_np), q_torch.dequantize(qx).numpy())
+
+
+def test_per_channel_asymmetric_bit_identical():
+    x, x_np = sample()
+    x[3] = 1.0
+    x_np[3] = 1.0
+
+    q_torch = AsymmetricUniformQuantizer(
+        4, PerChannelMinMaxObserver(dim=0), NearestRounding()
+    )
+    q_np = AsymmetricUniformQuantizer(
+        4, PerChannelMinMaxObserver(dim=0), NearestRounding()
+    )
+
+    qx = q_torch.quantize(x)
+    qx_np = q_np.quantize(x_np)
+
+    assert q_np.scale.shape == (16, 1)
+    assert np.array_equal(qx_np, qx.numpy())
+    assert np.array_equal(q_np.dequantize(qx_np), q_torch.dequantize(qx).numpy())
+
+
+def test_groupwise_double_quant_numpy():
+    torch.manual_seed(0)
+    x = torch.randn(5, 48)  # 15 groups, padded to whole scale blocks
+    x_np = x.numpy()
+
+    def make():
+        return GroupwiseQuantizer(
+            4, NearestRounding(), group_size=16, double_quant=True, scale_block=4
+        )
+
+    q_torch, q_np = make(), make()
+    qx = q_torch.quantize(x)
+    qx_np = q_np.quantize(x_np)
+
+    assert q_np.scale_codes.dtype == np.uint8
+    assert np.array_equal(q_np.scale_codes, q_torch.scale_codes.numpy())
+    assert np.array_equal(q_np.zero_point, q_torch.zero_point.numpy())
+    assert np.allclose(
+        q_np.dequantize(qx_np), q_torch.dequantize(qx).numpy(), atol=1e-6
+    )
+
+
+def test_logarithmic_quantizer_numpy():
+    x, x_np = sample()
+    x_np[0, 0] = 0.0
+    x[0, 0] = 0.0
+
+    qx = LogarithmicQuantizer(4, MinMaxObserver(), NearestRounding()).quantize(x)
+    qx_np = LogarithmicQuantizer(4, MinMaxObserver(), NearestRounding()).quantize(
+        x_np
+    )
+
+    assert qx_np[0, 0] == 0.0
+    # log2 comes from different libraries, only last-bit differences are allowed
+    # and those never move the rounded exponent on this input
+    assert np.array_equal(qx_np, qx.numpy())
+
+
+def test_observers_numpy():
+    x, x_np = sample()
+
+    percentile = PercentileObserver(0.01, 0.99)
+    percentile.observe(x_np)
+    lo, hi = percentile.get_range()
+    ref_lo, ref_hi = np.quantile(x_np, [0.01, 0.99])
+    assert np.isclose(lo, ref_lo) and np.isclose(hi, ref_hi)
+
+    kl_np = KLDivergenceObserver(bits=8, num_bins=512)
+    kl_torch = KLDivergenceObserver(bits=8, num_bins=512)
+    kl_np.observe(x_np)
+    kl_torch.observe(x)
+    t_np = float(kl_np.get_range()[1])
+    t_torch = float(kl_torch.get_range()[1])
+    assert abs(t_np - t_torch) <= 2 * kl_np.abs_max / kl_np.num_bins
+
+
+def test_reductions_accept_int_and_tuple_dims():
+    x, x_np = sample()
+    xp = get_backend(x_np)
+
+    for dim in (0, -1, (0, 1), [1]):
+        axis = tuple(dim) if isinstance(dim, list) else dim
+        assert np.array_equal(xp.amin(x_np, dim), x_np.min(axis=axis))
+        assert np.array_equal(xp.amax(x_np, dim), x_np.max(axis=axis))
+
+
+def test_kl_observer_numpy_emits_no_warnings():
+    _, x_np = sample()
+    kl = KLDivergenceObserver(bits=8, num_bins=512)
+    kl.observe(x_np)
+
+    with np.errstate(divide="raise", invalid="raise"):
+        kl.get_range()
+
+
+def test_stochastic_rounding_numpy_is_reproducible():
+    x_np = np.linspace(-3, 3, 1000, dtype=np.float32)
+
+    a = StochasticRounding(seed=65).round(x_np)
+    b = StochasticRounding(seed=65).round(x_np)
+
+    assert np.array_equal(a, b)
+    assert np.all((a == np.floor(x_np)) | (a == np.ceil(x_np)))
+
+
+def test_numpy_path_does_not_import_torch():
+    code = textwrap.dedent(
+        """
+        import sys
+        import numpy as np
+        from inwhale.core.uniform import SymmetricUniformQuantizer
+        from inwhale.core.non_uniform import LogarithmicQuantizer
+        from inwhale.observers.minmax import MinMaxObserver
+        from inwhale.rounding.stochastic import StochasticRounding
+
+        x = np.linspace(-1, 1, 64, dtype=np.float32)
+        q = SymmetricUniformQuantizer(8, MinMaxObserver(), StochasticRounding(0))
+        q.dequantize(q.quantize(x))
+        LogarithmicQuantizer(4, MinMaxObserver(), StochasticRounding(0)).quantize(x)
+        assert "torch" not in sys.modules
+        """
+    )
+    root = Path(__file__).resolve().parents[1]
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=root)
@@ -0,0 +1,86 @@
+import torch
+from torch import nn
+
+from inwhale.ptq.outlier import OutlierLinear, int8_matmul
+
+
+def make_inputs(rows=16, features=32, outlier_columns=(3, 17)):
+    torch.manual_seed(0)
+    x = torch.randn(rows, features)
+    for c in outlier_columns:
+        x[:, c] *= 40.0
+    return x
+
+
+def test_int8_matmul_is_exact():
+    a = torch.randint(-128, 128, (5, 64)).float()
+    b = torch.randint(-128, 128, (7, 64)).float()
+
+    out = int8_matmul(a, b)
+
+    assert torch.equal(out.long(), a.long() @ b.long().t())
+
+
+def test_outlier_columns_detected():
+    x = make_inputs()
+    layer = OutlierLinear(nn.Linear(32, 8), threshold=6.0, calibration=x)
+
+    assert layer.outlier_columns(x).tolist() == [3, 17]
+    assert layer.outlier_index.tolist() == [3, 17]
+
+
+def test_decomposition_beats_plain_int8():
+    x = make_inputs()
+    linear = nn.Linear(32, 8)
+    reference = linear(x)
+
+    mixed = OutlierLinear(linear, threshold=6.0, calibration=x)
+    plain = OutlierLinear(linear, threshold=6.0)
+
+    mixed_err = (mixed(x) - reference).pow(2).mean()
+    plain_err = (plain(x) - reference).pow(2).mean()
+
+    assert mixed_err < plain_err
+    assert torch.allclose(mixed(x), reference, atol=0.2)
+
+
+def test_only_calibrated_outliers_kept_in_fp16():
+    x = make_inputs()
+    linear = nn.Linear(32, 8)
+    layer = OutlierLinear(linear, threshold=6.0, calibration=[x[:8], x[8:]])
+
+    assert "weight_fp16" not in layer.state_dict()
+    assert layer.outlier_weight.shape == (8, 2)
+    assert layer.outlier_weight.dtype == torch.float16
+
+    # a batch where the calibrated columns stay small runs as plain int8
+    quiet = make_inputs(outlier_columns=())
+    plain = OutlierLinear(linear, threshold=6.0)
+    assert torch.allclose(layer(quiet), plain(quiet))
+
+
+def test_keeps_leading_dims_and_bias():
+    linear = nn.Linear(32, 8)
+    layer = OutlierLinear(linear)
+    x = torch.randn(2, 3, 32)
+
+    out = layer(x)
+
+    assert out.shape == (2, 3, 8)
+    assert torch.allclose(out, linear(x), atol=0.05)
+
+
+def test_outlier_columns_use_float_weight():
+    x = make_inputs()
+    linear = nn.Linear(32, 8, bias=False)
+    layer = OutlierLinear(linear, threshold=6.0, outlier_columns=[3, 17])
+
+    expected = linear.weight.detach().half()[:, [3, 17]]
+    assert torch.equal(layer.outlier_weight, expected)
+
+    # only the outlier columns differ from plain int8
+    mask = torch.zeros(32, dtype=torch.bool)
+    mask[[3, 17]] = True
+    int8 = OutlierLinear(linear, threshold=6.0)
+    expected = int8(x * ~mask) + (x * mask) @ expected.float().t()
+    assert torch.allclose(layer(x), expected, atol=1e-5)
@@ -0,0 +1,180 @@
+import torch
+
+from inwhale.cache import ParamCache, tensor_key
+from inwhale.core.groupwise import GroupwiseQuantizer
+from inwhale.core.non_uniform import LogarithmicQuantizer
+from inwhale.core.uniform import (
+    AsymmetricUniformQuantizer,
+    DeadZoneSymmetricQuantizer,
+    SymmetricUniformQuantizer,
+)
+from inwhale.observers.minmax import MinMaxObserver
+from inwhale.observers.mse import MSEObserver
+from inwhale.rounding.nearest import NearestRounding
+
+
+class CountingObserver(MinMaxObserver):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def observe(self, x):
+        self.calls += 1
+        super().observe(x)
+
+
+def test_hit_skips_observer_and_returns_same_codes():
+    w = torch.randn(32, 32)
+    obs = CountingObserver()
+    q = AsymmetricUniformQuantizer(8, obs, NearestRounding())
+    q.cache = ParamCache()
+
+    qx = q.quantize(w)
+    scale, zero_point = q.scale, q.zero_point
+    again = q.quantize(w)
+
+    assert obs.calls == 1
+    assert q.cache.hits == 1
+    assert torch.equal(again, qx)
+    assert again.dtype == qx.dtype
+    assert torch.equal(q.scale, scale) and torch.equal(q.zero_point, zero_point)
+
+
+def test_hit_restores_params_after_other_tensor():
+    a = torch.randn(16, 16)
+    b = torch.randn(16, 16) * 10
+    q = DeadZoneSymmetricQuantizer(4, MSEObserver(4), NearestRounding())
+    q.cache = ParamCache()
+
+    qa = q.quantize(a)
+    scale_a, threshold_a = q.scale, q.threshold
+    q.quantize(b)
+    qa_again = q.quantize(a)
+
+    assert torch.equal(qa_again, qa)
+    assert torch.equal(q.scale, scale_a)
+    assert torch.equal(q.threshold, threshold_a)
+
+
+def test_in_place_mutation_invalidates():
+    w = torch.randn(8, 8)
+    obs = CountingObserver()
+    q = SymmetricUniformQuantizer(8, obs, NearestRounding())
+    q.cache = ParamCache()
+
+    key = tensor_key(w)
+    q.quantize(w)
+    w.mul_(2.0)
+    assert tensor_key(w) != key
+
+    qx = q.quantize(w)
+
+    assert obs.calls == 2
+    assert torch.allclose(q.dequantize(qx), w, atol=float(q.scale))
+
+
+def test_returned_codes_are_not_aliased():
+    w = torch.randn(8, 8)
+    q = SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding())
+    q.cache = ParamCache()
+
+    qx = q.quantize(w)
+    expected = qx.clone()
+    qx.zero_()
+
+    assert torch.equal(q.quantize(w), expected)
+
+
+def test_lru_eviction_under_byte_budget():
+    tensors = [torch.randn(64, 64) for _ in range(4)]
+    q = SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding())
+    # int8 codes take 4096 bytes each, room for two entries
+    q.cache = ParamCache(max_bytes=2 * 4096 + 64)
+
+    for t in tensors:
+        q.quantize(t)
+
+    assert len(q.cache) == 2
+    assert q.cache.nbytes <= q.cache.max_bytes
+    q.quantize(tensors[0])
+    assert q.cache.hits == 0
+    q.quantize(tensors[3])
+    assert q.cache.hits == 1
+
+
+def test_codes_compacted_from_declared_range_only():
+    w = torch.randn(64, 64)
+    uniform = SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding())
+    # power-of-two values, not integer codes
+    log = LogarithmicQuantizer(4, MinMaxObserver(), NearestRounding())
+    for q in (uniform, log):
+        q.cache = ParamCache()
+
+    expected = uniform.quantize(w)
+    assert uniform.cache.nbytes < w.numel() * 2
+    assert torch.equal(uniform.quantize(w), expected)
+
+    expected = log.quantize(w)
+    assert log.cache.nbytes >= w.numel() * 4
+    assert torch.equal(log.quantize(w), expected)
+
+
+def test_observer_cache_and_groupwise():
+    w = torch.randn(4, 32)
+    obs = MSEObserver(4)
+    obs.cache = ParamCache()
+    obs.observe(w)
+    first = obs.get_range()
+    obs.observe(torch.randn(4, 32) * 5)
+    obs.observe(w)
+    assert obs.cache.hits == 1
+    assert torch.equal(obs.get_range()[1], first[1])
+
+    q = GroupwiseQuantizer(4, NearestRounding(), group_size=16)
+    q.cache = ParamCache()
+    qx = q.quantize(w)
+    scale = q.scale
+    q.quantize(torch.randn(4, 32))
+    assert torch.equal(q.quantize(w), qx)
+    assert torch.equal(q.scale, scale)
+
+
+def test_grad_tracking_inputs_bypass_cache():
+    w = torch.nn.Parameter(torch.randn(8, 8))
+    obs = CountingObserver()
+    q = SymmetricUniformQuantizer(8, obs, NearestRounding())
+    q.cache = ParamCache()
+
+    first = q.quantize(w)
+    second = q.quantize(w)
+
+    assert obs.calls == 2 and len(q.cache) == 0
+    assert first.requires_grad and second.requires_grad
+
+    with torch.no_grad():
+        q.quantize(w)
+        q.quantize(w)
+    assert q.cache.hits == 1
+
+
+def test_data_writes_need_invalidate():
+    w = torch.nn.Parameter(torch.randn(8, 8))
+    q = SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding())
+    q.cache = ParamCache()
+
+    with torch.no_grad():
+        q.quantize(w)
+        # documented limitation: .data writes keep w's version counter
+        w.data.mul_(3.0)
+        q.quantize(w)
+        assert q.cache.hits == 1
+
+        w.mul_(2.0)  # in place under no_grad bumps the version
+        q.quantize(w)
+        assert q.cache.hits == 1
+
+        w.data.mul_(2.0)
+        q.cache.invalidate(w)
+        q.quantize(w)
+        assert q.cache.hits == 1
+        assert torch.allclose(q.scale, w.abs().max() / q.qmax)
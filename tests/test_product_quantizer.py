@@ -0,0 +1,80 @@
+import torch
+
+from inwhale.core.product import OptimizedProductQuantizer, ProductQuantizer
+
+
+def database(n=2000, dim=16, seed=0):
+    g = torch.Generator().manual_seed(seed)
+    # correlated dimensions, so a rotation helps OPQ
+    mixing = torch.randn(dim, dim, generator=g)
+    return torch.randn(n, dim, generator=g) @ mixing
+
+
+def small_pq(cls=ProductQuantizer, **kwargs):
+    return cls(4, bits=4, iterations=20, batch_size=512, seed=0, **kwargs)
+
+
+def test_codes_shape_and_round_trip():
+    x = database()
+    pq = small_pq()
+
+    codes = pq.quantize(x)
+    dx = pq.dequantize(codes)
+
+    assert codes.shape == (2000, 4)
+    assert codes.dtype == torch.uint8
+    assert pq.codebooks.shape == (4, 16, 4)
+    assert (dx - x).pow(2).mean() < x.pow(2).mean()
+
+
+def test_adc_scores_match_decoded_distances():
+    x = database()
+    queries = database(5, seed=1)
+    pq = small_pq(chunk_size=300)
+    codes = pq.quantize(x)
+    decoded = pq.dequantize(codes)
+
+    l2 = pq.scores(queries, codes, metric="l2")
+    ip = pq.scores(queries, codes, metric="ip")
+
+    assert l2.shape == (5, 2000)
+    assert torch.allclose(l2, torch.cdist(queries, decoded) ** 2, rtol=1e-3, atol=1e-2)
+    assert torch.allclose(ip, queries @ decoded.t(), rtol=1e-3, atol=1e-2)
+
+
+def test_chunked_search_matches_full_topk():
+    x = database()
+    queries = database(3, seed=2)
+    pq = small_pq(chunk_size=128)
+    codes = pq.quantize(x)
+
+    for metric, largest in (("l2", False), ("ip", True)):
+        full = pq.scores(queries, codes, metric).topk(10, dim=1, largest=largest)
+        scores, index = pq.search(queries, codes, k=10, metric=metric)
+        assert torch.allclose(scores, full.values)
+        assert torch.equal(
+            torch.sort(index, dim=1).values, torch.sort(full.indices, dim=1).values
+        )
+
+
+def test_opq_rotation_is_orthogonal_and_helps():
+    x = database()
+    pq = small_pq()
+    opq = small_pq(OptimizedProductQuantizer, opq_iterations=4)
+
+    pq_err = (pq.dequantize(pq.quantize(x)) - x).pow(2).mean()
+    opq_codes = opq.quantize(x)
+    opq_err = (opq.dequantize(opq_codes) - x).pow(2).mean()
+
+    eye = torch.eye(16)
+    assert torch.allclose(opq.rotation @ opq.rotation.t(), eye, atol=1e-4)
+    assert opq_err <= pq_err * 1.05
+
+    queries = database(2, seed=3)
+    decoded = opq.dequantize(opq_codes)
+    assert torch.allclose(
+        opq.scores(queries, opq_codes),
+        torch.cdist(queries, decoded) ** 2,
+        rtol=1e-3,
+        atol=1e-1,
+    )
@@ -0,0 +1,149 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from inwhale.core.uniform import SymmetricUniformQuantizer
+from inwhale.observers.minmax import MinMaxObserver
+from inwhale.observers.percentile import PercentileObserver
+from inwhale.profiling import Profiler, register_hook
+from inwhale.rounding.nearest import NearestRounding
+
+
+def make_quant(observer=None, name=None):
+    q = SymmetricUniformQuantizer(
+        bits=8, observer=observer or MinMaxObserver(), rounding=NearestRounding()
+    )
+    if name is not None:
+        q.name = name
+    return q
+
+
+def test_disabled_hooks_record_nothing():
+    prof = Profiler()
+    q = make_quant()
+    q.quantize(torch.randn(10))
+
+    assert prof.stats == {}
+
+
+def test_stages_grouped_under_quantizer_name():
+    q = make_quant(name="layer1.weight")
+
+    with Profiler() as prof:
+        q.quantize(torch.randn(100))
+        q.quantize(torch.randn(100))
+
+    stages = prof.to_dict()["layer1.weight"]
+    for stage in ("quantize", "observe", "get_range", "compute_scale", "round", "clamp"):
+        assert stage in stages
+    assert stages["quantize"]["calls"] == 2
+    assert stages["quantize"]["total_time"] > 0
+
+
+def test_unnamed_quantizer_uses_class_name():
+    with Profiler() as prof:
+        make_quant().quantize(torch.randn(10))
+
+    assert "SymmetricUniformQuantizer" in prof.stats
+
+
+def test_bytes_clipped_and_sqnr():
+    x = torch.randn(1000)
+    q = make_quant(observer=PercentileObserver(0.05, 0.95), name="act")
+
+    with Profiler(record_bytes=True, record_clipped=True, record_sqnr=True) as prof:
+        q.quantize(x)
+
+    stats = prof.to_dict()["act"]
+    assert stats["quantize"]["bytes_in"] == x.numel() * 4
+    assert stats["clamp"]["clipped"] > 0
+    assert 0 < stats["clamp"]["clip_rate"] < 0.2
+    assert stats["quantize"]["sqnr_db"] > 10
+    # the extra dequantize for SQNR is not counted
+    assert "dequantize" not in stats
+
+
+def test_results_unchanged_by_profiling():
+    x = torch.randn(50)
+    expected = make_quant().quantize(x)
+
+    with Profiler(record_clipped=True, record_sqnr=True):
+        got = make_quant().quantize(x)
+
+    assert torch.equal(expected, got)
+
+
+def test_json_and_chrome_trace_export(tmp_path):
+    q = make_quant(name="w")
+    with Profiler(trace=True) as prof:
+        q.dequantize(q.quantize(torch.randn(10)))
+
+    data = json.loads(prof.to_json(tmp_path / "stats.json"))
+    assert data["w"]["dequantize"]["calls"] == 1
+
+    prof.export_chrome_trace(tmp_path / "trace.json")
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    names = {e["name"] for e in trace["traceEvents"]}
+    assert "w/quantize" in names
+    assert all(e["ph"] == "X" for e in trace["traceEvents"])
+
+
+def test_custom_hook():
+    seen = []
+
+    class Recorder:
+        def start(self, stage, name, obj, args):
+            return stage
+
+        def stop(self, token, result):
+            seen.append(token)
+
+    handle = register_hook(Recorder())
+    try:
+        NearestRounding().round(torch.tensor([0.4]))
+    finally:
+        handle.remove()
+
+    NearestRounding().round(torch.tensor([0.4]))
+    assert seen == ["round"]
+
+
+def test_wrappers_installed_only_while_hooked():
+    plain = NearestRounding.__dict__["round"]
+    with Profiler():
+        assert NearestRounding.__dict__["round"] is not plain
+    assert NearestRounding.__dict__["round"] is plain
+
+
+def test_names_are_per_thread():
+    seen = []
+
+    class Recorder:
+        def start(self, stage, name, obj, args):
+            if threading.current_thread() is not threading.main_thread():
+                seen.append(name)
+
+        def stop(self, token, result):
+            pass
+
+    def other():
+        NearestRounding().round(torch.tensor([0.4]))
+
+    class Blocking(NearestRounding):
+        # runs `other` in a second thread while "main" is on this thread's stack
+        def round(self, x):
+            with ThreadPoolExecutor(1) as pool:
+                pool.submit(other).result()
+            return super().round(x)
+
+    q = SymmetricUniformQuantizer(8, MinMaxObserver(), Blocking())
+    q.name = "main"
+    handle = register_hook(Recorder())
+    try:
+        q.quantize(torch.randn(8))
+    finally:
+        handle.remove()
+
+    assert seen == ["NearestRounding"]
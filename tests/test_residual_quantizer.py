@@ -0,0 +1,81 @@
+import torch
+
+from inwhale.core.non_uniform import LogarithmicQuantizer
+from inwhale.core.residual import ResidualCodes, ResidualQuantizer
+from inwhale.core.uniform import SymmetricUniformQuantizer
+from inwhale.core.vector import VectorQuantizer
+from inwhale.observers.minmax import MinMaxObserver
+from inwhale.rounding.nearest import NearestRounding
+
+
+def uniform(bits):
+    return SymmetricUniformQuantizer(bits, MinMaxObserver(), NearestRounding())
+
+
+def mse(a, b):
+    return float((a - b).pow(2).mean())
+
+
+def test_each_stage_reduces_error():
+    torch.manual_seed(0)
+    x = torch.randn(64, 64)
+
+    one = ResidualQuantizer([uniform(4)])
+    two = ResidualQuantizer([uniform(4), uniform(4)])
+    three = ResidualQuantizer([uniform(4), uniform(4), uniform(4)])
+
+    errors = [mse(q.dequantize(q.quantize(x)), x) for q in (one, two, three)]
+    assert errors[0] > errors[1] > errors[2]
+    assert three.bits == 12
+
+
+def test_shared_buffer_round_trip():
+    torch.manual_seed(0)
+    x = torch.randn(32, 16)
+    q = ResidualQuantizer(
+        [
+            uniform(8),
+            LogarithmicQuantizer(4, MinMaxObserver(), NearestRounding()),
+            VectorQuantizer(4, dim=4, iterations=5, seed=0),
+        ]
+    )
+
+    codes = q.quantize(x)
+
+    assert isinstance(codes, ResidualCodes)
+    assert len(codes) == 3
+    assert codes[0].dtype == torch.float32
+    assert codes[2].dtype == torch.uint8 and codes[2].shape == (32, 4)
+    # int8 codes, raw float32 log codes, uint8 codebook indices (+ alignment)
+    assert codes.nbytes <= 32 * 16 * (1 + 4) + 32 * 4 + 4
+
+    expected = sum(s.dequantize(codes[i]) for i, s in enumerate(q.stages))
+    assert torch.equal(q.dequantize(codes), expected)
+
+
+def test_beam_search_not_worse_than_greedy():
+    torch.manual_seed(0)
+    x = torch.randn(512, 8)
+
+    def stages():
+        return [VectorQuantizer(4, dim=8, iterations=20, seed=s) for s in range(3)]
+
+    greedy = ResidualQuantizer(stages())
+    greedy_err = mse(greedy.dequantize(greedy.quantize(x)), x)
+
+    beam = ResidualQuantizer(greedy.stages, beam_width=8, chunk_size=100)
+    beam_codes = beam.quantize(x)
+    beam_err = mse(beam.dequantize(beam_codes), x)
+
+    assert beam_codes[0].shape == (512, 1)
+    assert beam_err <= greedy_err * 1.001
+
+
+def test_beam_search_needs_codebook_stages():
+    q = ResidualQuantizer([uniform(4), uniform(4)], beam_width=4)
+    try:
+        q.quantize(torch.randn(4, 4))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Expected ValueError")
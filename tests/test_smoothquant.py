@@ -0,0 +1,97 @@
+import torch
+from torch import nn
+
+from inwhale.core.uniform import SymmetricUniformQuantizer
+from inwhale.observers.minmax import MinMaxObserver
+from inwhale.ptq.smoothquant import SmoothQuant
+from inwhale.rounding.nearest import NearestRounding
+
+
+def make_model(hidden=16):
+    torch.manual_seed(0)
+    model = nn.Sequential(
+        nn.LayerNorm(hidden),
+        nn.Linear(hidden, hidden),
+        nn.ReLU(),
+        nn.Linear(hidden, 8),
+    )
+    with torch.no_grad():
+        # outlier channels in the LayerNorm output
+        model[0].weight[:2] = 50.0
+    return model
+
+
+def make_batches(hidden=16):
+    torch.manual_seed(1)
+    return [torch.randn(4, hidden) for _ in range(3)]
+
+
+def activation_range(model, batches):
+    obs = MinMaxObserver()
+    with torch.no_grad():
+        for x in batches:
+            obs.observe(model[0](x))
+    min_val, max_val = obs.get_range()
+    return max(min_val.abs(), max_val.abs())
+
+
+def test_smoothing_keeps_function():
+    model = make_model()
+    batches = make_batches()
+    reference = [model(x) for x in batches]
+
+    sq = SmoothQuant(alpha=0.5)
+    scales = sq.apply(model, [(model[0], [model[1]])], batches)
+
+    assert scales[0].shape == (16,)
+    for x, y in zip(batches, reference):
+        assert torch.allclose(model(x), y, atol=1e-3)
+
+
+def test_smoothing_shrinks_activation_range():
+    model = make_model()
+    batches = make_batches()
+    before = activation_range(model, batches)
+
+    SmoothQuant(alpha=0.8).apply(model, [(model[0], [model[1]])], batches)
+
+    assert activation_range(model, batches) < before
+
+
+def test_alpha_zero_balances_nothing_into_activations():
+    model = make_model()
+    sq = SmoothQuant(alpha=0.0)
+    act_max = torch.rand(16) + 1.0
+
+    scales = sq.smoothing_factors(act_max, [model[1]])
+    weight_max = model[1].weight.abs().amax(dim=0)
+
+    assert torch.allclose(scales, 1.0 / weight_max, rtol=1e-5)
+
+
+def test_weight_observers_are_rerun_on_smoothed_weights():
+    model = make_model()
+    batches = make_batches()
+
+    def weight_quantizer():
+        return SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding())
+
+    sq = SmoothQuant(alpha=0.5, weight_quantizer=weight_quantizer)
+    sq.apply(model, [(model[0], [model[1]])], batches)
+
+    quantizer = sq.weight_quantizers[model[1]]
+    _, max_val = quantizer.observer.get_range()
+    assert torch.allclose(max_val, model[1].weight.max())
+
+    other = make_model()
+    sq.apply(other, [(other[0], [other[1]])], batches)
+    assert list(sq.weight_quantizers) == [other[1]]
+
+
+def test_invalid_alpha():
+    try:
+        SmoothQuant(alpha=1.5)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
@@ -0,0 +1,126 @@
+import torch
+from torch import nn
+
+from inwhale.analysis.sweep import sweep
+from inwhale.core.uniform import (
+    AsymmetricUniformQuantizer,
+    MidTreadUniformQuantizer,
+    SymmetricUniformQuantizer,
+)
+from inwhale.observers.kl import KLDivergenceObserver
+from inwhale.observers.minmax import MinMaxObserver
+from inwhale.observers.mse import MSEObserver
+from inwhale.observers.percentile import PercentileObserver
+from inwhale.profiling import Profiler
+from inwhale.rounding.floor_ceil import FloorRounding
+from inwhale.rounding.nearest import NearestRounding
+
+
+def reference_mse(x, quantizer_cls, observer, rounding_cls, bits):
+    q = quantizer_cls(bits, observer, rounding_cls())
+    dx = q.dequantize(q.quantize(x))
+    return float((dx - x).double().pow(2).mean())
+
+
+def test_batched_matches_quantizers():
+    torch.manual_seed(0)
+    x = torch.randn(1000)
+
+    rows = sweep(
+        x,
+        bits=(2, 4, 8),
+        roundings=(NearestRounding, FloorRounding),
+        quantizers=(SymmetricUniformQuantizer, AsymmetricUniformQuantizer),
+        chunk_size=300,
+    )
+
+    assert len(rows) == 2 * 2 * 3
+    classes = {
+        "SymmetricUniformQuantizer": SymmetricUniformQuantizer,
+        "AsymmetricUniformQuantizer": AsymmetricUniformQuantizer,
+    }
+    roundings = {"NearestRounding": NearestRounding, "FloorRounding": FloorRounding}
+    for row in rows:
+        expected = reference_mse(
+            x,
+            classes[row["quantizer"]],
+            MinMaxObserver(),
+            roundings[row["rounding"]],
+            row["bits"],
+        )
+        assert abs(row["mse"] - expected) <= 1e-6 * max(expected, 1e-12)
+        assert row["clip_rate"] >= 0.0
+
+
+def test_error_shrinks_with_bits():
+    x = torch.randn(500)
+    rows = sweep(x, bits=(2, 3, 4, 8))
+
+    mses = [row["mse"] for row in rows]
+    sqnrs = [row["sqnr"] for row in rows]
+    assert mses == sorted(mses, reverse=True)
+    assert sqnrs == sorted(sqnrs)
+
+
+def test_bit_dependent_and_shared_observers():
+    torch.manual_seed(0)
+    x = torch.randn(2000)
+    x[0] = 30.0
+
+    rows = sweep(
+        x,
+        bits=(4, 8),
+        observers=(PercentileObserver, MSEObserver, KLDivergenceObserver),
+    )
+    by_key = {(r["observer"], r["bits"]): r for r in rows}
+
+    # clipping observers trade clipped outliers for finer steps
+    for name in ("PercentileObserver", "KLDivergenceObserver"):
+        assert by_key[(name, 8)]["clip_rate"] > 0
+    assert by_key[("MSEObserver", 4)]["mse"] > by_key[("MSEObserver", 8)]["mse"]
+
+    kl = KLDivergenceObserver(bits=8)
+    expected = reference_mse(x, SymmetricUniformQuantizer, kl, NearestRounding, 8)
+    got = by_key[("KLDivergenceObserver", 8)]["mse"]
+    assert abs(got - expected) <= 1e-6 * expected
+
+
+def test_fallback_quantizer_and_one_bit():
+    x = torch.randn(200)
+
+    (mid_tread,) = sweep(x, bits=(4,), quantizers=(MidTreadUniformQuantizer,))
+    expected = reference_mse(
+        x, MidTreadUniformQuantizer, MinMaxObserver(), NearestRounding, 4
+    )
+    assert abs(mid_tread["mse"] - expected) <= 1e-9
+    assert mid_tread["clip_rate"] == 0.0
+
+    (binary,) = sweep(x, bits=(1,))
+    expected = reference_mse(
+        x, SymmetricUniformQuantizer, MinMaxObserver(), NearestRounding, 1
+    )
+    assert abs(binary["mse"] - expected) <= 1e-9
+    assert binary["clip_rate"] is None
+
+
+def test_reference_path_leaves_user_profiler_alone():
+    x = torch.randn(200)
+    q = SymmetricUniformQuantizer(8, MinMaxObserver(), NearestRounding())
+    q.name = "mine"
+
+    with Profiler(record_clipped=True) as prof:
+        q.quantize(x)
+        (row,) = sweep(x, bits=(4,), quantizers=(MidTreadUniformQuantizer,))
+        q.quantize(x)
+
+    assert "sweep" not in prof.stats
+    assert prof.stats["mine"]["quantize"].calls == 2
+    assert prof.stats["mine"]["clamp"].elements == 2 * x.numel()
+    assert row["clip_rate"] == 0.0
+
+
+def test_model_sweeps_weight_matrices():
+    model = nn.Sequential(nn.Linear(8, 4), nn.ReLU(), nn.Linear(4, 2))
+    rows = sweep(model, bits=(4,))
+
+    assert {row["tensor"] for row in rows} == {"0.weight", "2.weight"}
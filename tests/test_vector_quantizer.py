@@ -0,0 +1,66 @@
+import torch
+
+from inwhale.core.vector import (
+    VectorQuantizer,
+    kmeans_plus_plus,
+    nearest,
+    squared_distances,
+)
+
+
+def clustered(n=2000, dim=4, clusters=8, seed=0):
+    g = torch.Generator().manual_seed(seed)
+    centers = torch.randn(clusters, dim, generator=g) * 5
+    labels = torch.randint(clusters, (n,), generator=g)
+    return centers[labels] + 0.05 * torch.randn(n, dim, generator=g), centers
+
+
+def test_squared_distances_matches_cdist():
+    x, _ = clustered(100)
+    c = torch.randn(7, 4)
+    assert torch.allclose(
+        squared_distances(x, c), torch.cdist(x, c) ** 2, rtol=1e-4, atol=1e-3
+    )
+
+
+def test_chunked_threaded_assignment_matches_full():
+    x, _ = clustered(1000)
+    c = torch.randn(16, 4) * 5
+    expected = torch.cdist(x, c).argmin(dim=1)
+
+    assert torch.equal(nearest(x, c, chunk_size=64), expected)
+    assert torch.equal(nearest(x, c, chunk_size=64, num_threads=4), expected)
+
+
+def test_kmeans_plus_plus_picks_distinct_clusters():
+    x, centers = clustered(2000, clusters=4)
+    init = kmeans_plus_plus(x, 4, torch.Generator().manual_seed(0))
+
+    closest = torch.cdist(init, centers).argmin(dim=1)
+    assert len(set(closest.tolist())) == 4
+
+
+def test_vector_quantizer_recovers_clusters():
+    x, _centers = clustered(4000, dim=4, clusters=8)
+    w = x.reshape(-1, 16)  # four 4-d vectors per row
+
+    q = VectorQuantizer(bits=3, dim=4, iterations=50, batch_size=512, seed=0)
+    codes = q.quantize(w)
+    dx = q.dequantize(codes)
+
+    assert codes.dtype == torch.uint8
+    assert codes.shape == (1000, 4)
+    assert dx.shape == w.shape
+    assert (dx - w).pow(2).mean() < 0.05
+
+
+def test_uint16_codes_and_reused_codebook():
+    x, _ = clustered(3000, dim=2)
+    q = VectorQuantizer(bits=9, dim=2, iterations=5, seed=0)
+
+    codes = q.quantize(x)
+    codebook = q.codebook
+
+    assert codes.dtype == torch.uint16
+    q.quantize(x[:10])
+    assert q.codebook is codebook